@@ -7,9 +7,10 @@ Purpose:
 """
 
 from django.contrib import admin
-from .models import Event, User, Ticket  # Import the models you want to manage in the admin panel
+from .models import Event, User, Ticket, WaitlistEntry  # Import the models you want to manage in the admin panel
 
 # Register models to make them appear in the Django admin dashboard
 admin.site.register(User)   # Allows managing user accounts (students, organizers, admins)
 admin.site.register(Event)  # Allows managing event records
-admin.site.register(Ticket) # allows managing tickets
\ No newline at end of file
+admin.site.register(Ticket) # allows managing tickets
+admin.site.register(WaitlistEntry) # allows managing event waitlists
@@ -0,0 +1,134 @@
+"""
+checkin_stream.py
+-----------------
+Purpose:
+Publish/subscribe for live check-ins, feeding the Server-Sent Events
+endpoint GET /api/events/<id>/checkins/stream.
+
+- Broker: Per-process registry of open streams. Each stream owns an
+  asyncio queue on the event loop serving it; deliveries from request
+  threads are handed over with call_soon_threadsafe().
+- LocalFanout: Cross-worker fan-out stand-in. It hands a message
+  straight to this process's broker, which is all a single-worker
+  deployment needs. With several workers, point
+  settings.CHECKIN_STREAM_FANOUT at a class with the same publish()
+  that goes through a shared channel (e.g. Redis PUBLISH) and calls
+  broker.deliver() from each worker's subscriber.
+- publish_checkins(): Called by the check-in views; sends once the
+  transaction commits, so rolled-back check-ins are never announced.
+
+Messages are dicts:
+    {"event_id": 7, "delta": 2, "checked_in": 120,
+     "arrivals": [{"ticket_id": 51, "user": "Ana", "checked_in_at": "..."}]}
+checked_in is the event's total after the change. Check-ins only ever
+raise it, so a client that keeps the largest value it has seen stays
+correct even if messages are dropped (a full queue) or arrive out of order.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Event
+
+QUEUE_SIZE = 100  # messages buffered per stream before new ones are dropped
+
+
+class Subscription:
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass  # a slow client skips messages; the next total corrects it
+
+    def deliver(self, message):
+        """Thread-safe: queue `message` on the stream's event loop."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # loop already closed (client gone)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, event_id):
+        """Open a subscription for the calling coroutine's event loop."""
+        subscription = Subscription(event_id)
+        with self._lock:
+            self._subscriptions[event_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            streams = self._subscriptions.get(subscription.event_id)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del self._subscriptions[subscription.event_id]
+
+    def deliver(self, event_id, message):
+        with self._lock:
+            streams = list(self._subscriptions.get(event_id, ()))
+        for subscription in streams:
+            subscription.deliver(message)
+
+    def subscriber_count(self, event_id=None):
+        with self._lock:
+            if event_id is not None:
+                return len(self._subscriptions.get(event_id, ()))
+            return sum(len(streams) for streams in self._subscriptions.values())
+
+
+broker = Broker()
+
+
+class LocalFanout:
+    """Single-process stand-in for a shared pub/sub channel."""
+
+    def publish(self, event_id, message):
+        broker.deliver(event_id, message)
+
+
+_fanout = None
+
+
+def get_fanout():
+    global _fanout
+    if _fanout is None:
+        _fanout = import_string(settings.CHECKIN_STREAM_FANOUT)()
+    return _fanout
+
+
+def publish_checkins(event_id, arrivals):
+    """
+    Announce check-ins for one event once the current transaction commits.
+    `arrivals` is a list of {"ticket_id", "user", "checked_in_at"} dicts.
+    The total is read after the commit, so it includes these check-ins.
+    """
+    arrivals = [{**arrival, "checked_in_at": arrival["checked_in_at"].isoformat()} for arrival in arrivals]
+
+    def publish():
+        checked_in = Event.objects.filter(id=event_id).values_list("tickets_used", flat=True).first()
+        get_fanout().publish(event_id, {
+            "event_id": event_id,
+            "delta": len(arrivals),
+            "checked_in": checked_in,
+            "arrivals": arrivals,
+        })
+
+    transaction.on_commit(publish)
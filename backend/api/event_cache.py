@@ -0,0 +1,154 @@
+"""
+event_cache.py
+--------------
+Purpose:
+Response cache for the event listing (GET /api/events/).
+
+Anonymous users and students all see the same approved events, so their
+listing is rendered once and served from Django's cache until an event
+changes. Entries are keyed by visibility class (public, one organizer,
+admin) and the filter/pagination query params, and carry an ETag so
+clients can revalidate with If-None-Match.
+
+Invalidation is generation based: every key contains the current
+generation number, and saving or deleting an Event bumps it, so all
+listings are rebuilt on their next request. Ticket counters change
+without Event.save(), so entries also expire after
+EVENT_LIST_CACHE_TIMEOUT seconds (which also bounds how far
+?live= / ?upcoming= results can lag behind the clock).
+
+Structure:
+- cache_key(): Key for a listing request.
+- get() / store(): Read and write entries (counting hits and misses).
+- invalidate() / invalidate_on_commit(): Drop every cached listing.
+- stats() / reset_stats(): Hit/miss counters for this process.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.http import quote_etag
+
+from .models import Event
+
+GENERATION_KEY = 'event_list:generation'
+
+# Query params that change the listing's content
+KEY_PARAMS = ('date', 'date_from', 'date_to', 'live', 'upcoming', 'category', 'organization',
+              'ids', 'cursor', 'page_size', 'fields')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def visibility_class(user):
+    """Users in the same class see the same listing."""
+    if not user.is_authenticated or user.role == 'student':
+        return 'public'
+    if user.role == 'organizer':
+        return f'organizer:{user.id}'
+    return user.role
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock, not 1, so an evicted counter never
+        # comes back to a generation that still has entries
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def cache_key(request):
+    params = {name: request.query_params[name] for name in KEY_PARAMS if name in request.query_params}
+    raw = json.dumps([visibility_class(request.user), params], sort_keys=True)
+    return f"event_list:{_generation()}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def get(key):
+    """Return the cached entry ({'etag', 'body'}) or None."""
+    entry = cache.get(key)
+    _record('hits' if entry is not None else 'misses')
+    return entry
+
+
+def store(key, body):
+    """Cache a rendered JSON body and return its entry."""
+    entry = {"etag": quote_etag(hashlib.sha256(body).hexdigest()), "body": body}
+    cache.set(key, entry, settings.EVENT_LIST_CACHE_TIMEOUT)
+    return entry
+
+
+def _bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate():
+    _bump_generation()
+    _record('invalidations')
+
+
+def invalidate_on_commit():
+    """
+    Invalidate for a change made in the current transaction.
+
+    The generation is bumped right away (so the writing request reads its
+    own change) and again once the transaction commits: a listing rendered
+    by another request between the first bump and the commit still sees
+    the old rows, and the second bump drops it. After a rollback only the
+    harmless first bump remains.
+    """
+    _bump_generation()
+    transaction.on_commit(invalidate)
+
+
+def stats():
+    with _stats_lock:
+        hits, misses, invalidations = _stats['hits'], _stats['misses'], _stats['invalidations']
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "invalidations": invalidations,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "timeout": settings.EVENT_LIST_CACHE_TIMEOUT,
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ------------------------------------
+# INVALIDATION
+# ------------------------------------
+# Covers creation (EventListCreateView), edits (EventDetailView,
+# OrganizerUpdateEventView), approval/rejection (ManageEventStatusView)
+# and deletion. Ticket counter updates use queryset.update() and do
+# not fire these.
+@receiver(post_save, sender=Event)
+def _event_saved(sender, instance, **kwargs):
+    invalidate_on_commit()
+
+
+@receiver(post_delete, sender=Event)
+def _event_deleted(sender, instance, **kwargs):
+    invalidate_on_commit()
@@ -0,0 +1,185 @@
+"""
+facets.py
+---------
+Purpose:
+Facet counts for the discovery page: how many approved events there are
+per category, organization, ticket type and date bucket.
+
+- compute_facets(): One grouped query per facet over an Event queryset.
+- FacetCache: Per-process cache of facet results.
+  * The unfiltered result (all approved events, month buckets) is kept
+    current incrementally: Event save/delete signals add or subtract the
+    event's facet values when it enters, leaves or changes inside the
+    approved set, so approving an event does not trigger a recount. The
+    deltas are applied when the transaction commits.
+  * Filtered results are cached by their params and dropped whenever an
+    approved event changes.
+  * Everything is rebuilt after EVENT_FACETS_TIMEOUT seconds, which also
+    bounds drift between worker processes.
+"""
+
+import datetime
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.dateparse import parse_date
+
+from .models import Event
+
+FACET_FIELDS = ('category', 'organization', 'ticket_type')
+DATE_BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+DEFAULT_BUCKET = 'month'
+
+
+def bucket_start(date, granularity):
+    """Python equivalent of the Trunc* function used for date buckets."""
+    if isinstance(date, str):
+        date = parse_date(date)
+    if granularity == 'day':
+        return date
+    if granularity == 'week':
+        return date - datetime.timedelta(days=date.weekday())  # ISO weeks start on Monday
+    return date.replace(day=1)
+
+
+def next_bucket(start, granularity):
+    """Start of the bucket after the one starting at `start`."""
+    if granularity == 'day':
+        return start + datetime.timedelta(days=1)
+    if granularity == 'week':
+        return start + datetime.timedelta(days=7)
+    return (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def compute_facets(queryset, granularity=DEFAULT_BUCKET):
+    """Return {facet: Counter(value -> count)} using one grouped query per facet."""
+    counts = {}
+    for field in FACET_FIELDS:
+        rows = queryset.exclude(**{field: ''}).values(field).annotate(count=Count('id')).order_by()
+        counts[field] = Counter({row[field]: row['count'] for row in rows})
+    rows = (
+        queryset.annotate(bucket=DATE_BUCKETS[granularity]('date'))
+        .values('bucket').annotate(count=Count('id')).order_by()
+    )
+    counts['date'] = Counter({row['bucket']: row['count'] for row in rows})
+    return counts
+
+
+def format_facets(counts):
+    """Facet values sorted by count (dates chronologically), zero counts dropped."""
+    facets = {
+        field: [
+            {"value": value, "count": count}
+            for value, count in sorted(counts[field].items(), key=lambda item: (-item[1], item[0]))
+            if count > 0
+        ]
+        for field in FACET_FIELDS
+    }
+    facets['date'] = [
+        {"value": value.isoformat(), "count": count}
+        for value, count in sorted(counts['date'].items())
+        if count > 0
+    ]
+    return {"total": sum(counts['ticket_type'].values()), "facets": facets}
+
+
+class FacetCache:
+    max_filtered = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base = None
+        self._filtered = {}
+        self._built_at = 0.0
+
+    @property
+    def active(self):
+        return self._base is not None or bool(self._filtered)
+
+    def get(self, params, queryset):
+        """
+        Facets for `queryset` (approved events with `params` applied).
+        `params` holds the non-empty filter params, including 'date_bucket'.
+        """
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            if time.monotonic() - self._built_at > settings.EVENT_FACETS_TIMEOUT:
+                self._base = None
+                self._filtered.clear()
+                self._built_at = time.monotonic()
+
+            if not key:
+                if self._base is None:
+                    self._base = compute_facets(queryset)
+                return format_facets(self._base)
+
+            if key not in self._filtered:
+                if len(self._filtered) >= self.max_filtered:
+                    self._filtered.pop(next(iter(self._filtered)))  # oldest first
+                counts = compute_facets(queryset, params.get('date_bucket', DEFAULT_BUCKET))
+                self._filtered[key] = format_facets(counts)
+            return self._filtered[key]
+
+    def apply(self, before, after):
+        """Move one event's facet values out of / into the approved set."""
+        if before is None and after is None:
+            return
+        with self._lock:
+            self._filtered.clear()
+            if self._base is None:
+                return
+            for values, delta in ((before, -1), (after, 1)):
+                if values is None:
+                    continue
+                for field in FACET_FIELDS:
+                    if values[field]:
+                        self._base[field][values[field]] += delta
+                self._base['date'][bucket_start(values['date'], DEFAULT_BUCKET)] += delta
+
+    def reset(self):
+        with self._lock:
+            self._base = None
+            self._filtered.clear()
+
+
+facet_cache = FacetCache()
+
+
+def _approved_values(instance):
+    if instance.status != 'approved':
+        return None
+    return {field: getattr(instance, field) for field in FACET_FIELDS + ('date',)}
+
+
+@receiver(pre_save, sender=Event)
+def _remember_facet_values(sender, instance, **kwargs):
+    # The old row is only needed when there is cached state to correct
+    if instance.pk and facet_cache.active:
+        instance._facets_before = (
+            Event.objects.filter(pk=instance.pk, status='approved').values(*FACET_FIELDS, 'date').first()
+        )
+
+
+# Deltas are applied once the write commits, so a rolled-back save or
+# delete never reaches the cached counts. Values are captured now, while
+# the instance still holds them.
+@receiver(post_save, sender=Event)
+def _update_facets(sender, instance, **kwargs):
+    before = instance.__dict__.pop('_facets_before', None)
+    if facet_cache.active:
+        after = _approved_values(instance)
+        transaction.on_commit(lambda: facet_cache.apply(before, after))
+
+
+@receiver(post_delete, sender=Event)
+def _remove_from_facets(sender, instance, **kwargs):
+    if facet_cache.active:
+        before = _approved_values(instance)
+        transaction.on_commit(lambda: facet_cache.apply(before, None))
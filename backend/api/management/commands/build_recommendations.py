@@ -0,0 +1,44 @@
+"""
+build_recommendations.py
+---------
+Purpose:
+Batch job that recomputes every student's recommended events from the
+ticket table (see api/recommendations.py). Run the full rebuild
+periodically (e.g. nightly from cron) and --claims-only every few
+minutes to fold new ticket claims into the stored results in between.
+
+Usage:
+    python manage.py build_recommendations
+    python manage.py build_recommendations --chunk-size 5000
+    python manage.py build_recommendations --claims-only
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.recommendations import DEFAULT_CHUNK_SIZE, rebuild, refresh_claims
+
+
+class Command(BaseCommand):
+    help = "Recompute stored event recommendations for all students."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Students scored per matrix block (bounds memory use).")
+        parser.add_argument('--claims-only', action='store_true',
+                            help="Only fold tickets claimed since the last run into the stored results.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['claims_only']:
+            students = refresh_claims()
+            self.stdout.write(self.style.SUCCESS(
+                f"Applied new claims for {students} student(s) in {time.monotonic() - started:.1f}s."
+            ))
+            return
+        students, candidates = rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored recommendations for {students} student(s) from {candidates} upcoming event(s) "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,45 @@
+"""
+qr_worker.py
+---------
+Purpose:
+Background worker that renders QR codes for newly claimed tickets.
+
+Usage:
+    python manage.py qr_worker                 # run forever
+    python manage.py qr_worker --once          # drain the queue and exit
+    python manage.py qr_worker --workers 4 --batch-size 200
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.qr import render_pending_qr_codes
+
+
+class Command(BaseCommand):
+    help = "Render QR codes for pending tickets using a local process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Render processes (default: CPU count).")
+        parser.add_argument('--batch-size', type=int, default=100, help="Tickets taken from the queue per batch.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                close_old_connections()
+                rendered = render_pending_qr_codes(options['batch_size'], pool=pool)
+                total += rendered
+                if rendered:
+                    self.stdout.write(f"Rendered {rendered} QR code(s).")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"QR worker finished: {total} QR code(s) rendered."))
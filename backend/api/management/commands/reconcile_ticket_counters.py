@@ -0,0 +1,77 @@
+"""
+reconcile_ticket_counters.py
+---------
+Purpose:
+Repair drift between Event ticket counters and the tickets table.
+
+Events are checked in id-ordered batches: one grouped COUNT query per
+batch, and only events whose counters differ are updated. Each batch
+runs in one transaction with its event rows locked, so concurrent
+ticket changes wait for it instead of being overwritten. A run can be
+resumed with --start-id (the last processed id is printed per batch).
+
+Usage:
+    python manage.py reconcile_ticket_counters
+    python manage.py reconcile_ticket_counters --batch-size 500 --start-id 12000 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from api.models import Event, Ticket
+
+
+class Command(BaseCommand):
+    help = "Recount tickets per event and fix drifted Event counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Events checked per batch.")
+        parser.add_argument('--start-id', type=int, default=0, help="Only check events with a larger id.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        last_id = options['start_id']
+        checked = drifted = 0
+
+        while True:
+            with transaction.atomic():
+                # Lock the batch's event rows before counting. Every ticket
+                # change (claim, check-in, cancellation, deletion) updates its
+                # event row in the same transaction, so none can commit between
+                # the count and the write below and be overwritten by it.
+                events = Event.objects.filter(id__gt=last_id).order_by('id')
+                if not options['dry_run']:
+                    events = events.select_for_update()
+                events = list(events.values_list('id', *Event.COUNTER_FIELDS)[:options['batch_size']])
+                if not events:
+                    break
+
+                actual = {
+                    row['event_id']: (row['claimed'], row['used'], row['cancelled'])
+                    for row in Ticket.objects.filter(event_id__in=[e[0] for e in events])
+                    .values('event_id')
+                    .annotate(
+                        claimed=Count('id'),
+                        used=Count('id', filter=Q(status='used')),
+                        cancelled=Count('id', filter=Q(status='cancelled')),
+                    )
+                    .order_by()
+                }
+
+                for event_id, *stored in events:
+                    counts = actual.get(event_id, (0, 0, 0))
+                    if tuple(stored) == counts:
+                        continue
+                    drifted += 1
+                    self.stdout.write(f"Event {event_id}: {tuple(stored)} -> {counts}")
+                    if not options['dry_run']:
+                        Event.objects.filter(id=event_id).update(
+                            **dict(zip(Event.COUNTER_FIELDS, counts)), **Event.version_bump()
+                        )
+
+            checked += len(events)
+            last_id = events[-1][0]
+            self.stdout.write(f"Checked events up to id {last_id}.")
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} event(s), {drifted} drifted."))
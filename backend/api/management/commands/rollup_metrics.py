@@ -0,0 +1,38 @@
+"""
+rollup_metrics.py
+---------
+Purpose:
+Fold new users, events, ticket claims and check-ins into the hourly and
+daily metric rollups (see api/rollups.py). Each run only reads rows past
+the per-metric watermark, so it can run every few minutes; the first run
+backfills the whole history.
+
+Usage:
+    python manage.py rollup_metrics                  # one pass (cron)
+    python manage.py rollup_metrics --interval 60    # run forever, a pass every 60s
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.rollups import roll_up
+
+
+class Command(BaseCommand):
+    help = "Incrementally update the hourly/daily metric rollup tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep running, sleeping this many seconds between passes.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            counted = roll_up()
+            summary = ", ".join(f"{metric}: {count}" for metric, count in counted.items())
+            self.stdout.write(f"Rolled up {summary}.")
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+def mark_existing_qr_codes_ready(apps, schema_editor):
+    """Tickets that already have a stored image don't need the QR worker."""
+    Ticket = apps.get_model('api', 'Ticket')
+    Ticket.objects.exclude(qr_code__isnull=True).exclude(qr_code='').update(qr_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='qr_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_qr_codes_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-18 12:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_ticket_counters(apps, schema_editor):
+    """Initialise the counters from the tickets table."""
+    Event = apps.get_model('api', 'Event')
+    Ticket = apps.get_model('api', 'Ticket')
+    counts = (
+        Ticket.objects.values('event_id')
+        .annotate(
+            claimed=Count('id'),
+            used=Count('id', filter=Q(status='used')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+        )
+        .order_by()
+    )
+    for row in counts:
+        Event.objects.filter(id=row['event_id']).update(
+            tickets_claimed=row['claimed'],
+            tickets_used=row['used'],
+            tickets_cancelled=row['cancelled'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='tickets_cancelled',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_claimed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_used',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ticket_counters, migrations.RunPython.noop),
+    ]
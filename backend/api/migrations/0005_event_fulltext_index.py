@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 12:51
+
+from django.db import migrations
+
+
+def create_fulltext_index(apps, schema_editor):
+    """MySQL only; other databases use the in-process fallback in api/search.py."""
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            "CREATE FULLTEXT INDEX event_fulltext_idx ON api_event (title, description, location)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX event_fulltext_idx ON api_event")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_event_ticket_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
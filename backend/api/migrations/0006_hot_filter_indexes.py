@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_event_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'date'], name='event_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', 'status'], name='event_organizer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventfeedback',
+            index=models.Index(fields=['event', 'created_at'], name='feedback_event_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', 'status'], name='ticket_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['event', 'status'], name='ticket_event_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'status'], name='user_role_status_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 13:06
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Initialise the rating aggregates from the feedback table."""
+    Event = apps.get_model('api', 'Event')
+    EventFeedback = apps.get_model('api', 'EventFeedback')
+    aggregates = (
+        EventFeedback.objects.values('event_id')
+        .annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)},
+        )
+        .order_by()
+    )
+    for row in aggregates:
+        Event.objects.filter(id=row['event_id']).update(
+            rating_count=row['count'],
+            rating_sum=row['total'],
+            **{f'rating_{stars}': row[f'stars_{stars}'] for stars in range(1, 6)},
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_versioned_events_tickets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
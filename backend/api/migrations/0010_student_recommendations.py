@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 13:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_event_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentRecommendations',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('category_affinity', models.JSONField(default=dict)),
+                ('candidates', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'student_recommendations',
+            },
+        ),
+    ]
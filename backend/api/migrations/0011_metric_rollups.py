@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_student_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('period_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'metric_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('metric', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('processed_through', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_at'], name='event_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['claimed_at'], name='ticket_claimed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['used_at'], name='ticket_used_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at'], name='user_created_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='metricrollup',
+            unique_together={('metric', 'granularity', 'period_start')},
+        ),
+    ]
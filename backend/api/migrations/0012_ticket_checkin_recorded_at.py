@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 14:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_checkin_recorded_at(apps, schema_editor):
+    """
+    Existing check-ins were rolled up by used_at, so recording them at
+    their used_at keeps the watermark from counting them a second time.
+    """
+    Ticket = apps.get_model('api', 'Ticket')
+    Ticket.objects.filter(used_at__isnull=False).update(checkin_recorded_at=F('used_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_metric_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_used_idx',
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='checkin_recorded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_checkin_recorded_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['checkin_recorded_at'], name='ticket_checkin_recorded_idx'),
+        ),
+    ]
@@ -10,20 +10,28 @@ Define the structure of your database tables for the project.
 Structure:
 - CustomUserManager: Handles user creation logic.
 - User: Core authentication model with roles and statuses.
+- VersionedModel: Abstract base adding a version bumped on every write.
 - Event: Represents events created by organizers (requires admin approval).
 - AuditLog: Tracks admin approval/suspension actions.
 - Ticket: Manages student event ticket claims.
+- WaitlistEntry: FIFO queue of students waiting for a seat at a sold-out event.
+- EventFeedback: Star ratings and comments (aggregated onto Event).
+- StudentRecommendations: Precomputed recommended events per student.
+- MetricRollup / RollupWatermark: Hourly and daily platform metric counts.
 """
 
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-import qrcode
-from io import BytesIO
-from django.core.files import File
 import os
+from .ticket_codes import make_ticket_code
 
 # ============================================================
 # CUSTOM USER MANAGER
@@ -127,6 +135,46 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     class Meta:
         db_table = 'users' # Explicit table name in MySQL
+        indexes = [
+            models.Index(fields=['role', 'status'], name='user_role_status_idx'),
+            models.Index(fields=['created_at'], name='user_created_idx'),  # metric rollups
+        ]
+
+# ============================================================
+# VERSIONED BASE MODEL
+# ============================================================
+
+class VersionedModel(models.Model):
+    """
+    Adds `version` (bumped on every write) and `updated_at`, used as
+    ETag / Last-Modified validators so conditional GETs can be answered
+    from a version lookup alone.
+
+    queryset.update() and bulk_update() bypass save(), so every bulk
+    writer must include **version_bump() in its update.
+    """
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def version_bump():
+        """Fields to add to a queryset.update() call that changes the row."""
+        return {'version': F('version') + 1, 'updated_at': timezone.now()}
+
+    def save(self, *args, **kwargs):
+        bumped = self.pk is not None and not self._state.adding
+        if bumped:
+            # Increment in the database so concurrent writers never reuse a version
+            self.version = F('version') + 1
+            self.updated_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'version', 'updated_at'}
+        super().save(*args, **kwargs)
+        if bumped:
+            self.refresh_from_db(fields=['version'])
 
 # ============================================================
 # EVENT MODEL
@@ -136,7 +184,7 @@ class User(AbstractBaseUser, PermissionsMixin):
 User = get_user_model()
 
 # Event model
-class Event(models.Model):
+class Event(VersionedModel):
     """
     Event model to represent university or organization events.
     Each event is associated with an organizer (a User).
@@ -186,15 +234,86 @@ class Event(models.Model):
     )
     approved_at = models.DateTimeField(null=True, blank=True)
 
+    # Ticket counters (maintained by Ticket in the same transaction as the
+    # ticket change; `manage.py reconcile_ticket_counters` repairs drift)
+    tickets_claimed = models.PositiveIntegerField(default=0)  # all tickets, any status
+    tickets_used = models.PositiveIntegerField(default=0)
+    tickets_cancelled = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ('tickets_claimed', 'tickets_used', 'tickets_cancelled')
+
+    # Rating aggregates (maintained by EventFeedback on create/change/delete)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)  # 1-5 star histogram
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    RATING_FIELDS = ('rating_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remaining seats as loaded, so an edit can be applied as a delta
+        instance._loaded_capacity = instance.__dict__.get('capacity')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Never write the ticket counters or rating aggregates back from an
+        in-memory instance: they are only changed with F() updates, and a
+        stale copy would undo concurrent claims or reviews.
+
+        The same goes for capacity (remaining seats, decremented by every
+        claim): it is only written when the instance changed it, and then
+        as the change relative to the loaded value (never below zero), so
+        claims made since the event was loaded stay counted.
+        """
+        capacity_delta = None
+        adding = self._state.adding
+        if self.pk and not adding:
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.COUNTER_FIELDS + self.RATING_FIELDS
+                ]
+            loaded = getattr(self, '_loaded_capacity', None)
+            if loaded is not None and 'capacity' in kwargs['update_fields']:
+                kwargs['update_fields'] = [name for name in kwargs['update_fields'] if name != 'capacity']
+                if self.capacity != loaded:
+                    capacity_delta = self.capacity - loaded
+                    self.capacity = Greatest(F('capacity') + capacity_delta, 0)
+                    kwargs['update_fields'].append('capacity')
+        super().save(*args, **kwargs)
+        if capacity_delta is not None:
+            self.refresh_from_db(fields=['capacity'])
+        if adding or capacity_delta is not None:
+            self._loaded_capacity = self.capacity
+
+    class Meta:
+        indexes = [
+            # Listing filters/ordering: status + date range + start time (public), date/time alone (admin)
+            models.Index(fields=['status', 'date', 'start_time'], name='event_status_schedule_idx'),
+            models.Index(fields=['date', 'start_time'], name='event_schedule_idx'),
+            models.Index(fields=['organizer', 'status'], name='event_organizer_status_idx'),
+            models.Index(fields=['created_at'], name='event_created_idx'),  # metric rollups
+        ]
+
     def __str__(self):
         """Readable representation of the event."""
         return f"{self.title} ({self.status})"
     
     def average_rating(self):
-        feedbacks = self.feedbacks.all()
-        if not feedbacks.exists():
+        """Average star rating from the stored aggregates (no feedback query)."""
+        if not self.rating_count:
             return None
-        return round(sum(f.rating for f in feedbacks) / feedbacks.count(), 1)
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def rating_histogram(self):
+        """Number of ratings per star, {1: n, ..., 5: n}."""
+        return {stars: getattr(self, f'rating_{stars}') for stars in range(1, 6)}
 
 # ============================================================
 # AUDIT MODEL
@@ -236,7 +355,13 @@ class AuditLog(models.Model):
 # TICKET MODEL
 # ============================================================
 
-class Ticket(models.Model):
+# Sent with event_id whenever an event's ticket counters change (claims,
+# check-ins, cancellations, deletions). The counters are written with
+# queryset UPDATEs, which fire no model signals.
+ticket_counters_changed = Signal()
+
+
+class Ticket(VersionedModel):
     """
     Ticket model to track event ticket claims by students.
     - Each user can claim only one ticket per event.
@@ -247,6 +372,11 @@ class Ticket(models.Model):
         ('used', 'Used'),
         ('cancelled', 'Cancelled'),
     ]
+
+    QR_STATUS_CHOICES = [ # stored QR images are rendered in the background
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+    ]
     
     # foreign keys, refer to other models
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='tickets') # if event is deleted, delete its tickets too
@@ -254,6 +384,7 @@ class Ticket(models.Model):
     
     # QR code for ticket validation
     qr_code = models.ImageField(upload_to='tickets/qr_codes/', blank=True, null=True, help_text="QR code for ticket validation")
+    qr_status = models.CharField(max_length=20, choices=QR_STATUS_CHOICES, default='pending', db_index=True)
     
     # status tracking
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
@@ -261,91 +392,139 @@ class Ticket(models.Model):
     # timestamps
     claimed_at = models.DateTimeField(auto_now_add=True) 
     used_at = models.DateTimeField(null=True, blank=True)
+    # Server time the check-in was written (used_at may be a scanner's
+    # earlier scan time); drives the check-in metric rollups
+    checkin_recorded_at = models.DateTimeField(null=True, blank=True)
     
     # QR code generation and capacity management
     def generate_qr_code_data(self):
-        """Generate rich QR code data with user and event information"""
-        return (
-            f"TICKET INFORMATION:\n"
-            f"Ticket ID: {self.id}\n"
-            f"Student: {self.user.name}\n"
-            f"Email: {self.user.email}\n"
-            f"Event: {self.event.title}\n"
-            f"Date: {self.event.date}\n"
-            f"Time: {self.event.start_time} - {self.event.end_time}\n"
-            f"Location: {self.event.location}\n"
-            f"Organization: {self.event.organization}\n"
-            f"Category: {self.event.category}\n"
-            f"Status: {self.status.upper()}\n"
-            f"Claimed: {self.claimed_at.strftime('%Y-%m-%d at %H:%M')}\n"
-            f"Verification: ticket_{self.id}_user_{self.user.id}_event_{self.event.id}"
-        )
-    
+        """
+        Generate the compact signed code (ticket id, event id, issue time)
+        embedded in the QR image. See api/ticket_codes.py.
+        """
+        return make_ticket_code(self.id, self.event_id, self.claimed_at)
 
     def save(self, *args, **kwargs):
-        """Generate QR code when ticket is created and update event capacity"""
+        """
+        Update event capacity when ticket is created.
+        The QR image is served on demand; a stored copy is only rendered
+        (later, by the QR worker) when settings.QR_STORE_IMAGES is on.
+        """
         is_new = not self.pk  # Check if this is a new ticket
-        
+
         if is_new:
-            # Decrease event capacity for new tickets
-            if self.event.capacity > 0:
-                self.event.capacity -= 1
-                self.event.save()
-            else:
-                raise ValidationError("Event is already at full capacity.")
-        
-        # First save to create the ticket and get ID
-        super().save(*args, **kwargs)
-        
-        # Generate QR code after we have an ID (only for new tickets)
-        if is_new and not self.qr_code:
-            # Generate rich QR code data with user and event info
-            qr_data = self.generate_qr_code_data()
-            
-            # Create QR code
-            qr = qrcode.make(qr_data)
-            
-            # Save to buffer
-            buffer = BytesIO()
-            qr.save(buffer, format='PNG')
-            
-            # Create descriptive file name
-            file_name = f"ticket_{self.id}_{self.user.name.replace(' ', '_')}_{self.event.title.replace(' ', '_')}.png"
-            
-            # Save to ImageField
-            self.qr_code.save(file_name, File(buffer), save=False)
-            
-            # Use update to avoid the double save issue
-            Ticket.objects.filter(id=self.id).update(qr_code=self.qr_code.name)
+            if not settings.QR_STORE_IMAGES:
+                self.qr_status = 'ready'
+
+            # Reserve a seat and insert the ticket in one transaction: the
+            # conditional UPDATE only succeeds while seats remain, and the
+            # unique (event, user) constraint rejects duplicate claims, in
+            # which case the reservation is rolled back with the insert.
+            with transaction.atomic():
+                reserved = Event.objects.filter(pk=self.event_id, capacity__gt=0).update(
+                    capacity=F('capacity') - 1,
+                    tickets_claimed=F('tickets_claimed') + 1,
+                    **Event.version_bump(),
+                )
+                if not reserved:
+                    raise ValidationError("Event is already at full capacity.")
+                super().save(*args, **kwargs)
+            ticket_counters_changed.send(sender=Ticket, event_id=self.event_id)
+        else:
+            super().save(*args, **kwargs)
+
+    # Event counter for each status (active tickets are claimed - used - cancelled)
+    STATUS_COUNTERS = {
+        'used': 'tickets_used',
+        'cancelled': 'tickets_cancelled',
+    }
+
+    def _change_status(self, new_status, from_statuses=None, **fields):
+        """
+        Move the ticket to new_status with a conditional UPDATE and adjust
+        the event's counters in the same transaction (call inside one).
+        If from_statuses is given, only tickets currently in one of those
+        statuses are moved. Returns the previous status, or None if nothing changed.
+        """
+        while self.status != new_status:
+            old_status = self.status
+            if from_statuses is not None and old_status not in from_statuses:
+                return None
+            if Ticket.objects.filter(pk=self.pk, status=old_status).update(
+                status=new_status, **fields, **Ticket.version_bump()
+            ):
+                break
+            # Changed concurrently; retry from the current status
+            self.status = Ticket.objects.values_list('status', flat=True).get(pk=self.pk)
+        else:
+            return None
+
+        event_updates = {}
+        if old_status in self.STATUS_COUNTERS:
+            counter = self.STATUS_COUNTERS[old_status]
+            event_updates[counter] = F(counter) - 1
+        if new_status in self.STATUS_COUNTERS:
+            counter = self.STATUS_COUNTERS[new_status]
+            event_updates[counter] = F(counter) + 1
+        if old_status == 'active' and new_status == 'cancelled':
+            event_updates['capacity'] = F('capacity') + 1  # Free up the spot
+        Event.objects.filter(pk=self.event_id).update(**event_updates, **Event.version_bump())
+        ticket_counters_changed.send(sender=Ticket, event_id=self.event_id)
+
+        self.status = new_status
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return old_status
 
     def delete(self, *args, **kwargs):
         """Increase event capacity when ticket is deleted/cancelled"""
-        # Increase capacity when ticket is deleted (cancellation)
-        if self.status == 'active':
-            self.event.capacity += 1
-            self.event.save()
-        
-        super().delete(*args, **kwargs)
-    
+        with transaction.atomic():
+            event_updates = {'tickets_claimed': F('tickets_claimed') - 1}
+            if self.status in self.STATUS_COUNTERS:
+                counter = self.STATUS_COUNTERS[self.status]
+                event_updates[counter] = F(counter) - 1
+
+            # Increase capacity when ticket is deleted (cancellation)
+            released = self.status == 'active'
+            if released:
+                event_updates['capacity'] = F('capacity') + 1
+            Event.objects.filter(pk=self.event_id).update(**event_updates, **Event.version_bump())
+
+            super().delete(*args, **kwargs)
+            ticket_counters_changed.send(sender=Ticket, event_id=self.event_id)
+
+            # Hand the freed seat to the next student on the waitlist
+            if released:
+                WaitlistEntry.objects.promote_next(self.event_id)
+
     def mark_as_cancelled(self):
         """Mark ticket as cancelled and increase event capacity"""
-        if self.status == 'active':
-            self.event.capacity += 1  # Free up the spot
-            self.event.save()
-        
-        self.status = 'cancelled'
-        self.save()
+        with transaction.atomic():
+            # Only the transition out of 'active' frees up a spot, so a
+            # repeated cancellation cannot return the same seat twice.
+            if self._change_status('cancelled') == 'active':
+                # Hand the freed seat to the next student on the waitlist
+                WaitlistEntry.objects.promote_next(self.event_id)
 
     def __str__(self):
         """Readable representation of a ticket claim."""
         return f"{self.user.name} → {self.event.title}"
     
     def mark_as_used(self):
-        """Mark ticket as used and set used_at timestamp"""
-        self.status = 'used'
-        self.used_at = timezone.now()
-        self.save()
+        """
+        Mark an active ticket as used and set used_at timestamp.
+        Cancelled tickets are never checked in: their seat may already
+        belong to someone else. Returns the previous status, or None.
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            return self._change_status('used', from_statuses=('active',), used_at=now, checkin_recorded_at=now)
     
+    @property
+    def qr_ready(self):
+        """Check if the QR image can be displayed"""
+        return self.qr_status == 'ready'
+
     def is_valid(self):
         """Check if ticket is valid"""
         return self.status == 'active' and self.event.is_approved
@@ -354,6 +533,82 @@ class Ticket(models.Model):
         db_table = 'tickets'
         ordering = ['-claimed_at'] # newest tickets first
         unique_together = ('event', 'user')
+        indexes = [
+            models.Index(fields=['user', 'status'], name='ticket_user_status_idx'),
+            models.Index(fields=['event', 'status'], name='ticket_event_status_idx'),
+            models.Index(fields=['claimed_at'], name='ticket_claimed_idx'),  # metric rollups
+            models.Index(fields=['checkin_recorded_at'], name='ticket_checkin_recorded_idx'),  # metric rollups
+        ]
+
+# ============================================================
+# WAITLIST MODEL
+# ============================================================
+
+class WaitlistManager(models.Manager):
+    """
+    Handles promotion of waitlisted students when a seat is freed.
+    """
+
+    def promote_next(self, event_id):
+        """
+        Give a ticket to the student at the head of the event's waitlist.
+        Must run inside the transaction that freed the seat. Only the head
+        of the queue is read (an index seek on (event, id)), so the cost
+        does not grow with the length of the waitlist.
+
+        Returns the new Ticket, or None if nobody was waiting or the seat
+        was taken by someone else first (the entry then stays queued).
+        """
+        while True:
+            entry = (
+                self.select_for_update(skip_locked=True)
+                .filter(event_id=event_id)
+                .order_by('id')
+                .first()
+            )
+            if entry is None:
+                return None
+
+            entry_id = entry.id
+            try:
+                with transaction.atomic():
+                    entry.delete()
+                    return Ticket.objects.create(event_id=event_id, user_id=entry.user_id)
+            except ValidationError:
+                # Capacity race: the freed seat is gone. The savepoint
+                # restored the entry, so the student keeps their place.
+                return None
+            except IntegrityError:
+                # Already holds a ticket for this event; drop the entry and try the next student
+                self.filter(id=entry_id).delete()
+                continue
+
+
+class WaitlistEntry(models.Model):
+    """
+    A student waiting for a seat at a sold-out event.
+    - Entries are served first come, first served (by id).
+    - Each user can wait only once per event.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = WaitlistManager()
+
+    def position(self):
+        """1-based position of this entry in the event's queue."""
+        return WaitlistEntry.objects.filter(event_id=self.event_id, id__lte=self.id).count()
+
+    def __str__(self):
+        """Readable representation of a waitlist entry."""
+        return f"{self.user.name} waiting for {self.event.title}"
+
+    class Meta:
+        db_table = 'waitlist_entries'
+        unique_together = ('event', 'user')
+        indexes = [models.Index(fields=['event', 'id'], name='waitlist_event_fifo_idx')]
 
 # ============================================================
 # EVENT FEEDBACK MODEL
@@ -371,6 +626,101 @@ class EventFeedback(models.Model):
 
     class Meta:
         unique_together = ("event", "user")  # One feedback per user per event
+        indexes = [models.Index(fields=['event', 'created_at'], name='feedback_event_created_idx')]
+
+    def __str__(self):
+        return f"{self.user.name} - {self.event.title} - {self.rating}/5"
+
+    @staticmethod
+    def update_event_ratings(event_id, added=None, removed=None):
+        """Apply one rating being added and/or removed to the event's aggregates."""
+        updates = {
+            'rating_count': F('rating_count') + ((added is not None) - (removed is not None)),
+            'rating_sum': F('rating_sum') + ((added or 0) - (removed or 0)),
+        }
+        if added is not None:
+            updates[f'rating_{added}'] = F(f'rating_{added}') + 1
+        if removed is not None:
+            updates[f'rating_{removed}'] = F(f'rating_{removed}') - 1
+        Event.objects.filter(pk=event_id).update(**updates, **Event.version_bump())
+
+    def save(self, *args, **kwargs):
+        """Keep the event's rating aggregates in step, in the same transaction."""
+        with transaction.atomic():
+            old_rating = None
+            if self.pk and not self._state.adding:
+                old_rating = EventFeedback.objects.filter(pk=self.pk).values_list('rating', flat=True).first()
+            super().save(*args, **kwargs)
+            if old_rating != self.rating:
+                self.update_event_ratings(self.event_id, added=self.rating, removed=old_rating)
+
+
+# A receiver rather than delete(): feedback is also removed by cascades
+# (user or ticket deletion), which don't call the model's delete()
+@receiver(post_delete, sender=EventFeedback)
+def _remove_feedback_rating(sender, instance, **kwargs):
+    EventFeedback.update_event_ratings(instance.event_id, removed=instance.rating)
+# ============================================================
+# STUDENT RECOMMENDATIONS
+# ============================================================
+class StudentRecommendations(models.Model):
+    """
+    Precomputed "recommended events" for one student (see recommendations.py).
+    - Rebuilt for every student by `manage.py build_recommendations`.
+    - New claims folded in by `manage.py build_recommendations --claims-only`.
+    - One row per student, read by primary key from the dashboard.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='recommendations')
+    category_affinity = models.JSONField(default=dict)  # category -> tickets held in it
+    candidates = models.JSONField(default=list)  # [event id, category, base score], best first
+    computed_at = models.DateTimeField(default=timezone.now)  # claims up to this time are included
+
+    def __str__(self):
+        return f"Recommendations for user {self.user_id}"
+
+    class Meta:
+        db_table = 'student_recommendations'
+
+# ============================================================
+# METRIC ROLLUPS
+# ============================================================
+class MetricRollup(models.Model):
+    """
+    Count of one platform metric (signups, ticket claims, ...) in one hour
+    or day, maintained incrementally by `manage.py rollup_metrics` (see
+    rollups.py). period_start is the start of the hour/day in local time.
+    """
+
+    GRANULARITY_CHOICES = (
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    )
+
+    metric = models.CharField(max_length=50)
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
-        return f"{self.user.name} - {self.event.title} - {self.rating}/5"
\ No newline at end of file
+        return f"{self.metric} {self.granularity} {self.period_start}: {self.count}"
+
+    class Meta:
+        db_table = 'metric_rollups'
+        unique_together = ('metric', 'granularity', 'period_start')  # also serves range reads
+
+
+class RollupWatermark(models.Model):
+    """
+    How far a metric has been rolled up: rows timestamped up to and
+    including processed_through are already counted.
+    """
+
+    metric = models.CharField(max_length=50, primary_key=True)
+    processed_through = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.metric} through {self.processed_through}"
+
+    class Meta:
+        db_table = 'rollup_watermarks'
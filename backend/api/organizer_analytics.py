@@ -0,0 +1,126 @@
+"""
+organizer_analytics.py
+----------------------
+Purpose:
+Per-organizer analytics for GET /api/organizer/analytics/: ticket and
+rating figures for every event an organizer runs, plus their totals.
+
+The figures come from the counters and rating aggregates stored on each
+event row, so building the response is one query over the organizer's
+events however many tickets they hold. The result is cached per
+organizer until a ticket or rating of one of their events changes, or
+the event itself is saved or deleted (the key is deleted once the
+writing transaction commits), and for at most
+ORGANIZER_ANALYTICS_CACHE_TIMEOUT seconds.
+
+Structure:
+- build(): Compute an organizer's analytics.
+- get(): Cached build().
+- invalidate(): Drop the cached analytics of the organizers of some events.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Event, EventFeedback, ticket_counters_changed
+
+EVENT_FIELDS = ('id', 'title', 'date', 'start_time', 'end_time', 'status', 'capacity',
+                *Event.COUNTER_FIELDS, 'rating_count', 'rating_sum')
+TOTAL_FIELDS = ('claimed', 'active', 'used', 'cancelled', 'capacity_left', 'rating_count')
+
+
+def cache_key(organizer_id):
+    return f"organizer_analytics:{organizer_id}"
+
+
+def _rate(part, whole):
+    return round(100 * part / whole, 1) if whole else 0.0
+
+
+def build(organizer_id):
+    """Per-event figures and totals for one organizer's events."""
+    rows = Event.objects.filter(organizer_id=organizer_id).order_by('date', 'start_time', 'id').values(*EVENT_FIELDS)
+
+    events = []
+    totals = dict.fromkeys(TOTAL_FIELDS, 0)
+    rating_sum = 0
+    for row in rows:
+        active = row['tickets_claimed'] - row['tickets_used'] - row['tickets_cancelled']
+        event = {
+            "id": row['id'],
+            "title": row['title'],
+            "date": row['date'],
+            "start_time": row['start_time'],
+            "end_time": row['end_time'],
+            "status": row['status'],
+            "claimed": row['tickets_claimed'],  # every ticket issued, any status
+            "active": active,
+            "used": row['tickets_used'],
+            "cancelled": row['tickets_cancelled'],
+            "capacity_left": row['capacity'],  # capacity is decremented as tickets are claimed
+            "attendance_rate": _rate(row['tickets_used'], row['tickets_used'] + active),
+            "rating_count": row['rating_count'],
+            "average_rating": round(row['rating_sum'] / row['rating_count'], 1) if row['rating_count'] else None,
+        }
+        events.append(event)
+        for field in TOTAL_FIELDS:
+            totals[field] += event[field]
+        rating_sum += row['rating_sum']
+
+    totals["events"] = len(events)
+    totals["attendance_rate"] = _rate(totals['used'], totals['used'] + totals['active'])
+    totals["average_rating"] = round(rating_sum / totals['rating_count'], 1) if totals['rating_count'] else None
+    return {"events": events, "totals": totals}
+
+
+def get(organizer_id):
+    key = cache_key(organizer_id)
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = build(organizer_id)
+        cache.set(key, analytics, settings.ORGANIZER_ANALYTICS_CACHE_TIMEOUT)
+    return analytics
+
+
+def invalidate(event_ids=(), organizer_ids=()):
+    """
+    Drop the cached analytics of the given organizers and of the
+    organizers of the given events, once the current transaction commits
+    (so a request rendering between the write and the commit cannot
+    re-cache the old figures).
+    """
+    event_ids, organizer_ids = set(event_ids), set(organizer_ids)
+
+    def drop():
+        owners = set(organizer_ids)
+        if event_ids:
+            owners.update(Event.objects.filter(id__in=event_ids).values_list('organizer_id', flat=True))
+        cache.delete_many([cache_key(organizer_id) for organizer_id in owners])
+
+    transaction.on_commit(drop)
+
+
+# ------------------------------------
+# INVALIDATION
+# ------------------------------------
+# Ticket counters (claims, check-ins, cancellations, roster issuance,
+# deletions) announce themselves with ticket_counters_changed; ratings
+# and event edits go through the model signals.
+@receiver(ticket_counters_changed)
+def _ticket_counters_changed(sender, event_id, **kwargs):
+    invalidate(event_ids=[event_id])
+
+
+@receiver(post_save, sender=EventFeedback)
+@receiver(post_delete, sender=EventFeedback)
+def _feedback_changed(sender, instance, **kwargs):
+    invalidate(event_ids=[instance.event_id])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def _event_changed(sender, instance, **kwargs):
+    invalidate(organizer_ids=[instance.organizer_id])
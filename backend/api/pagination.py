@@ -0,0 +1,219 @@
+"""
+pagination.py
+---------
+Purpose:
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page continues strictly after the sort key of the
+last row of the previous page, so page N+1 costs the same as page 1 and
+rows inserted meanwhile never shift the pages. Cursors are opaque
+base64 strings holding those sort-key values and the paging direction.
+
+Structure:
+- encode_cursor() / decode_cursor(): Opaque cursor strings.
+- keyset_filter(): Q object selecting the rows after a cursor.
+- paginate_keyset(): Fetch one page of a queryset (model instances or .values() rows).
+- paginate_segments(): The same over several querysets read one after another.
+- KeysetPagination: Opt-in DRF pagination class for list views.
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder truncates datetimes and times to milliseconds, which
+    would make a cursor point before/after the row it came from; keep the
+    full microsecond precision instead.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, backwards=False):
+    """Turn sort-key values (and the paging direction) into an opaque cursor string."""
+    raw = json.dumps({"k": values, "p": int(backwards)}, cls=_CursorEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Turn a cursor string back into (backwards, sort-key values)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["k"]
+        backwards = bool(data["p"])
+    except (ValueError, TypeError, KeyError):
+        raise exceptions.ValidationError({"cursor": "Invalid cursor."})
+    if not isinstance(values, list):
+        raise exceptions.ValidationError({"cursor": "Invalid cursor."})
+    return backwards, values
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE):
+    """Read ?page_size=, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(request.query_params.get('page_size', default))
+    except (TypeError, ValueError):
+        raise exceptions.ValidationError({"page_size": "Must be an integer."})
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the filter for rows that come after `values` in `ordering`.
+    For ordering ('-date', '-id') and values (d, i) this is:
+        date < d OR (date = d AND id < i)
+    """
+    if len(values) != len(ordering):
+        raise exceptions.ValidationError({"cursor": "Invalid cursor."})
+
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f"{name}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def _sort_key(item, ordering):
+    names = [field.lstrip('-') for field in ordering]
+    if isinstance(item, dict):
+        return [item[name] for name in names]
+    return [getattr(item, name) for name in names]
+
+
+def _reverse(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def paginate_keyset(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return (items, next_cursor, previous_cursor) for one page of `queryset`.
+
+    `ordering` must end with a unique field (normally 'id' or '-id') so
+    that the order is total. A cursor is None when there is no page in
+    that direction.
+    """
+    backwards, values = decode_cursor(cursor) if cursor else (False, None)
+
+    # A previous page is read by walking the reversed ordering
+    query_ordering = _reverse(ordering) if backwards else tuple(ordering)
+    queryset = queryset.order_by(*query_ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(query_ordering, values))
+
+    # Fetch one extra row to know whether more rows exist in that direction
+    items = list(queryset[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backwards:
+        items.reverse()
+    if not items:
+        return items, None, None
+
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else values is not None
+    next_cursor = encode_cursor(_sort_key(items[-1], ordering)) if has_next else None
+    previous_cursor = encode_cursor(_sort_key(items[0], ordering), backwards=True) if has_previous else None
+    return items, next_cursor, previous_cursor
+
+
+def paginate_segments(segments, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Like paginate_keyset(), over several querysets listed one after
+    another (e.g. upcoming events, then past ones), so each stays a plain
+    index range in `ordering` instead of sorting on a computed rank.
+    Cursors hold the segment number followed by the sort key.
+    """
+    backwards, values = decode_cursor(cursor) if cursor else (False, None)
+    segment, key = 0, None
+    if values is not None:
+        if (len(values) != len(ordering) + 1 or not isinstance(values[0], int)
+                or not 0 <= values[0] < len(segments)):
+            raise exceptions.ValidationError({"cursor": "Invalid cursor."})
+        segment, key = values[0], values[1:]
+
+    # Read on from the cursor's segment into the next ones (previous ones
+    # when paging backwards) until the page and one extra row are filled
+    query_ordering = _reverse(ordering) if backwards else tuple(ordering)
+    step = -1 if backwards else 1
+    entries = []
+    while 0 <= segment < len(segments) and len(entries) <= page_size:
+        queryset = segments[segment].order_by(*query_ordering)
+        if key is not None:
+            queryset = queryset.filter(keyset_filter(query_ordering, key))
+        entries += [(segment, item) for item in queryset[:page_size + 1 - len(entries)]]
+        segment, key = segment + step, None
+
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+    if backwards:
+        entries.reverse()
+    if not entries:
+        return [], None, None
+
+    def cursor_at(entry, backwards=False):
+        return encode_cursor([entry[0]] + _sort_key(entry[1], ordering), backwards=backwards)
+
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else values is not None
+    next_cursor = cursor_at(entries[-1]) if has_next else None
+    previous_cursor = cursor_at(entries[0], backwards=True) if has_previous else None
+    return [item for _, item in entries], next_cursor, previous_cursor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination for list views.
+
+    Requests without ?page_size= or ?cursor= get the existing bare list,
+    so clients can migrate one at a time. Paginated responses look like:
+        {"next_cursor": ..., "previous_cursor": ..., "results": [...]}
+
+    Views set `cursor_ordering` (or define get_cursor_ordering()); it must
+    end with a unique field. Views listing several segments in turn define
+    get_cursor_segments(queryset), returning the querysets in order.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if 'cursor' not in request.query_params and 'page_size' not in request.query_params:
+            return None
+
+        if hasattr(view, 'get_cursor_ordering'):
+            ordering = view.get_cursor_ordering()
+        else:
+            ordering = getattr(view, 'cursor_ordering', ('-id',))
+
+        cursor, page_size = request.query_params.get('cursor'), get_page_size(request)
+        if hasattr(view, 'get_cursor_segments'):
+            items, self.next_cursor, self.previous_cursor = paginate_segments(
+                view.get_cursor_segments(queryset), ordering, cursor, page_size
+            )
+        else:
+            items, self.next_cursor, self.previous_cursor = paginate_keyset(queryset, ordering, cursor, page_size)
+        return items
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
+            "results": data,
+        })
@@ -0,0 +1,114 @@
+"""
+qr.py
+---------
+Purpose:
+Render ticket QR codes outside of the claim request.
+
+QR images are served on demand by StudentTicketQRView from the ticket's
+verification payload, with a bounded in-process LRU cache in front of
+the encoder. Storing a PNG per ticket is optional (settings.QR_STORE_IMAGES).
+
+When storage is enabled, new tickets are saved with qr_status='pending'
+and the tickets table itself is the work queue: the `qr_worker`
+management command repeatedly takes a batch of pending tickets, renders
+the PNGs in a local process pool and stores them with a single bulk
+UPDATE. No external broker is needed.
+
+Structure:
+- render_png() / render_svg(): Pure functions that encode QR data (render_png runs in worker processes).
+- render_cached(): LRU-cached rendering used by the on-demand endpoint.
+- render_pending_qr_codes(): Render one batch of pending tickets.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .models import Ticket
+
+IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def build_qr(data):
+    """
+    Encode data in the smallest QR version that fits it.
+    Low error correction is enough for codes shown on a phone screen and
+    keeps the version (and therefore the image) as small as possible.
+    """
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=settings.QR_BOX_SIZE,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(data):
+    """Encode the given QR data as a 1-bit PNG."""
+    buffer = BytesIO()
+    build_qr(data).make_image().save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def render_svg(data):
+    """Encode the given QR data as a single-path SVG."""
+    buffer = BytesIO()
+    build_qr(data).make_image(image_factory=SvgPathImage).save(buffer)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=settings.QR_CACHE_SIZE)
+def render_cached(data, fmt):
+    """Render data as 'png' or 'svg', keeping the most recent images in memory."""
+    return render_svg(data) if fmt == 'svg' else render_png(data)
+
+
+def render_pending_qr_codes(batch_size=100, pool=None):
+    """
+    Render QR images for up to `batch_size` pending tickets.
+
+    Args:
+        batch_size: Maximum number of tickets taken from the queue.
+        pool: Optional concurrent.futures executor used to render the PNGs.
+              When omitted, images are rendered in the current process.
+
+    Returns:
+        The number of tickets whose QR code is now ready.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers drain the queue without
+        # rendering the same tickets twice (ignored on SQLite).
+        tickets = list(
+            Ticket.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(qr_status='pending')
+            .select_related('user', 'event')
+            .order_by('id')[:batch_size]
+        )
+        if not tickets:
+            return 0
+
+        payloads = [ticket.generate_qr_code_data() for ticket in tickets]
+        mapper = pool.map if pool is not None else map
+        images = mapper(render_png, payloads)
+
+        bump = Ticket.version_bump()
+        for ticket, png in zip(tickets, images):
+            file_name = f"ticket_{ticket.id}_{ticket.user.name.replace(' ', '_')}_{ticket.event.title.replace(' ', '_')}.png"
+            ticket.qr_code.save(file_name, ContentFile(png), save=False)
+            ticket.qr_status = 'ready'
+            ticket.version, ticket.updated_at = bump['version'], bump['updated_at']
+
+        Ticket.objects.bulk_update(tickets, ['qr_code', 'qr_status', 'version', 'updated_at'])
+
+    return len(tickets)
@@ -0,0 +1,281 @@
+"""
+recommendations.py
+------------------
+Purpose:
+Precomputed "recommended events" for the student dashboard.
+
+A periodic batch job (`manage.py build_recommendations`) reads the
+ticket table once and builds, with NumPy:
+- Student x category affinity: the share of each student's tickets
+  that falls in each category.
+- Event x candidate co-attendance: how many students hold tickets for
+  both events, where the candidates are the upcoming approved events.
+  It is counted from sparse (event, candidate) ticket pairs with
+  np.bincount, and only events that share a student with some candidate
+  get a row, so memory follows recent activity rather than the whole
+  event history.
+
+A student's score for a candidate they hold no ticket for is
+    CATEGORY_WEIGHT * affinity(category)
+  + CO_ATTENDANCE_WEIGHT * co-attendance with their events (0..1 per student)
+  + POPULARITY_WEIGHT * tickets claimed (0..1, breaks ties)
+and the best MAX_CANDIDATES are stored per student in
+StudentRecommendations, so the dashboard reads one row by primary key
+instead of sorting the events table.
+
+Claims are not applied in the claim request. The dashboard read already
+skips events the student holds, and `build_recommendations --claims-only`
+(run every few minutes) folds tickets claimed since a row's computed_at
+into its category affinity, which re-ranks the stored candidates.
+Co-attendance only changes on the next full run. Both runs leave out
+claims from the last RECOMMENDATION_CLAIM_LAG seconds, which may not be
+committed yet, and pick them up next time.
+
+Structure:
+- rebuild(): The full batch job.
+- refresh_claims(): Incremental run for recent claims.
+- rank(): Order stored candidates for a given category affinity.
+- recommended_events(): Read a student's recommendations.
+"""
+
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Event, StudentRecommendations, Ticket
+
+CATEGORY_WEIGHT = 1.0
+CO_ATTENDANCE_WEIGHT = 1.0
+POPULARITY_WEIGHT = 0.1
+MAX_CANDIDATES = 20  # stored per student, so claims and expired events still leave enough to show
+DEFAULT_CHUNK_SIZE = 1000  # students scored per matrix block
+
+
+def _affinity_shares(affinity):
+    total = sum(affinity.values())
+    return {category: count / total for category, count in affinity.items()} if total else {}
+
+
+def rank(affinity, candidates):
+    """
+    Order stored candidates ([event id, category, base score]) best first.
+    The base score holds the co-attendance and popularity terms, which do
+    not depend on the student's category affinity.
+    """
+    shares = _affinity_shares(affinity)
+    return sorted(
+        candidates,
+        key=lambda candidate: (-(CATEGORY_WEIGHT * shares.get(candidate[1], 0.0) + candidate[2]), candidate[0]),
+    )
+
+
+def _claims_through(now=None):
+    """Claims up to this time are settled (committed) and can be counted."""
+    return (now or timezone.now()) - datetime.timedelta(seconds=settings.RECOMMENDATION_CLAIM_LAG)
+
+
+def _ticket_matrix(row_idx, col_idx, n_rows, n_cols):
+    """0/1 matrix with a one at every (row, column) pair of the parallel index arrays."""
+    matrix = np.zeros((n_rows, n_cols), dtype=np.float32)
+    matrix[row_idx, col_idx] = 1.0
+    return matrix
+
+
+def _co_attendance_pairs(student_idx, event_idx, ticket_candidate, n_students, n_candidates):
+    """
+    Counted (event, candidate) pairs of tickets held by the same student,
+    as (keys, counts) with key = event index * n_candidates + candidate
+    index. ticket_candidate is each ticket's candidate index (-1 for
+    other events), and the tickets must be ordered by student.
+    """
+    is_candidate = ticket_candidate >= 0
+    per_student = np.bincount(student_idx[is_candidate], minlength=n_students)
+    first = np.cumsum(per_student) - per_student  # each student's first candidate ticket
+    held = ticket_candidate[is_candidate]
+
+    # Pair every ticket with each of its student's candidate tickets
+    repeats = per_student[student_idx]
+    ticket = np.repeat(np.arange(len(student_idx)), repeats)
+    offset = np.arange(len(ticket)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    keys = event_idx[ticket].astype(np.int64) * n_candidates + held[first[student_idx[ticket]] + offset]
+    return np.unique(keys, return_counts=True)
+
+
+def rebuild(chunk_size=DEFAULT_CHUNK_SIZE, today=None, now=None):
+    """
+    Recompute and store every student's recommendations.
+    Returns (students, candidates) counts.
+    """
+    through = _claims_through(now)
+    today = today or timezone.localdate()
+
+    tickets = list(
+        Ticket.objects.exclude(status='cancelled')
+        .filter(user__role='student', claimed_at__lte=through)
+        .values_list('user_id', 'event_id', 'event__category')
+        .order_by('user_id')
+        .iterator(chunk_size=10000)
+    )
+    candidates = list(
+        Event.objects.filter(status='approved', date__gte=today)
+        .values_list('id', 'category', 'tickets_claimed')
+        .order_by('id')
+    )
+
+    with transaction.atomic():
+        if not tickets or not candidates:
+            StudentRecommendations.objects.all().delete()
+            return 0, len(candidates)
+
+        user_ids, event_ids, categories = (np.array(column) for column in zip(*tickets))
+        students, student_idx = np.unique(user_ids, return_inverse=True)
+        events, event_idx = np.unique(event_ids, return_inverse=True)
+        category_names, category_idx = np.unique(categories.astype(str), return_inverse=True)
+
+        # Student x category ticket counts (blank categories are not an interest)
+        affinity = np.zeros((len(students), len(category_names)), dtype=np.float32)
+        np.add.at(affinity, (student_idx, category_idx), 1.0)
+        affinity[:, category_names == ''] = 0.0
+        totals = affinity.sum(axis=1, keepdims=True)
+        shares = np.divide(affinity, totals, out=np.zeros_like(affinity), where=totals > 0)
+
+        cand_ids = np.array([row[0] for row in candidates])
+        cand_categories = [row[1] for row in candidates]
+        claimed = np.array([row[2] for row in candidates], dtype=np.float32)
+        popularity = claimed / claimed.max() if claimed.max() > 0 else np.zeros_like(claimed)
+
+        # Each ticket's candidate index (-1 when its event is not a candidate)
+        # and each candidate's affinity column (a trailing all-zero column
+        # stands in for categories nobody holds tickets in)
+        position = np.minimum(np.searchsorted(cand_ids, event_ids), len(cand_ids) - 1)
+        ticket_candidate = np.where(cand_ids[position] == event_ids, position, -1)
+        category_col = {name: i for i, name in enumerate(category_names) if name}
+        cand_category_col = np.array([category_col.get(name, len(category_names)) for name in cand_categories])
+        shares = np.hstack([shares, np.zeros((len(students), 1), dtype=np.float32)])
+
+        # Tickets are ordered by student, so each chunk is a contiguous slice
+        starts = list(range(0, len(students), chunk_size))
+        bounds = np.searchsorted(student_idx, starts + [len(students)])
+        chunks = [
+            (first, min(chunk_size, len(students) - first), bounds[i], bounds[i + 1])
+            for i, first in enumerate(starts)
+        ]
+
+        # Co-attendance counts from sparse ticket pairs, merged over student chunks
+        chunk_keys, chunk_counts = zip(*(
+            _co_attendance_pairs(student_idx[lo:hi] - first, event_idx[lo:hi], ticket_candidate[lo:hi],
+                                 n, len(cand_ids))
+            for first, n, lo, hi in chunks
+        ))
+        keys, key_idx = np.unique(np.concatenate(chunk_keys), return_inverse=True)
+        counts = np.bincount(key_idx, weights=np.concatenate(chunk_counts))
+        pair_event, pair_candidate = np.divmod(keys, len(cand_ids))
+
+        # Rows only for events that share a student with some candidate
+        related, related_row = np.unique(pair_event, return_inverse=True)
+        co_attendance = np.zeros((len(related), len(cand_ids)), dtype=np.float32)
+        co_attendance[related_row, pair_candidate] = counts
+        event_row = np.full(len(events), -1)
+        event_row[related] = np.arange(len(related))
+
+        StudentRecommendations.objects.all().delete()
+        for first, n, lo, hi in chunks:
+            chunk_students = student_idx[lo:hi] - first
+            rows_of = event_row[event_idx[lo:hi]]
+            in_related = rows_of >= 0
+            block = _ticket_matrix(chunk_students[in_related], rows_of[in_related], n, len(related))
+            is_candidate = ticket_candidate[lo:hi] >= 0
+            held = _ticket_matrix(
+                chunk_students[is_candidate], ticket_candidate[lo:hi][is_candidate], n, len(cand_ids)
+            ) > 0
+
+            # Co-attendance with the student's events, scaled to 0..1 over the
+            # events they could still claim
+            co = block @ co_attendance
+            co[held] = 0.0
+            co_max = co.max(axis=1, keepdims=True)
+            co = np.divide(co, co_max, out=np.zeros_like(co), where=co_max > 0)
+            category_part = CATEGORY_WEIGHT * shares[first:first + n][:, cand_category_col]
+            base = CO_ATTENDANCE_WEIGHT * co + POPULARITY_WEIGHT * popularity
+            scores = category_part + base
+
+            # Only events related to the student's history, never ones they already hold
+            related_to_student = (category_part > 0) | (co > 0)
+            scores[~related_to_student | held] = -np.inf
+
+            k = min(MAX_CANDIDATES, len(cand_ids))
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            rows = []
+            for offset in range(n):
+                picks = sorted(
+                    (column for column in top[offset] if np.isfinite(scores[offset, column])),
+                    key=lambda column: (-scores[offset, column], cand_ids[column]),
+                )
+                student = first + offset
+                rows.append(StudentRecommendations(
+                    user_id=int(students[student]),
+                    category_affinity={
+                        str(category_names[c]): int(affinity[student, c]) for c in np.flatnonzero(affinity[student])
+                    },
+                    candidates=[
+                        [int(cand_ids[c]), cand_categories[c], round(float(base[offset, c]), 6)] for c in picks
+                    ],
+                    computed_at=through,
+                ))
+            StudentRecommendations.objects.bulk_create(rows)
+
+    return len(students), len(cand_ids)
+
+
+def recommended_events(user, queryset, count=3):
+    """
+    The student's top `count` stored recommendations that are still
+    upcoming, approved and unclaimed, as Event instances from `queryset`.
+    """
+    candidates = (
+        StudentRecommendations.objects.filter(user_id=user.id).values_list('candidates', flat=True).first()
+    )
+    if not candidates:
+        return []
+    order = {candidate[0]: position for position, candidate in enumerate(candidates)}
+    events = (
+        queryset.filter(id__in=list(order), status='approved', date__gte=timezone.localdate())
+        .exclude(tickets__user=user)
+    )
+    return sorted(events, key=lambda event: order[event.id])[:count]
+
+
+def refresh_claims(now=None):
+    """
+    Fold tickets claimed since each student's row was computed into the
+    stored category affinity and re-rank the stored candidates (claimed
+    events are dropped). Returns the number of students updated.
+    """
+    through = _claims_through(now)
+    with transaction.atomic():
+        claims = list(
+            Ticket.objects.exclude(status='cancelled')
+            .filter(claimed_at__gt=F('user__recommendations__computed_at'), claimed_at__lte=through)
+            .values_list('user_id', 'event_id', 'event__category', 'claimed_at')
+        )
+        new_claims = {}
+        for user_id, event_id, category, claimed_at in claims:
+            new_claims.setdefault(user_id, []).append((event_id, category, claimed_at))
+
+        rows = list(StudentRecommendations.objects.select_for_update().filter(user_id__in=new_claims))
+        for row in rows:
+            claimed = set()
+            for event_id, category, claimed_at in new_claims[row.user_id]:
+                if claimed_at <= row.computed_at:
+                    continue  # rebuilt since the claims were read
+                claimed.add(event_id)
+                if category:
+                    row.category_affinity[category] = row.category_affinity.get(category, 0) + 1
+            row.candidates = rank(row.category_affinity, [c for c in row.candidates if c[0] not in claimed])
+            row.computed_at = through
+        StudentRecommendations.objects.bulk_update(rows, ['category_affinity', 'candidates', 'computed_at'])
+    return len(rows)
@@ -0,0 +1,156 @@
+"""
+rollups.py
+----------
+Purpose:
+Hourly and daily rollups of platform metrics, so admin charts read a
+few hundred pre-counted rows instead of scanning the users, events and
+tickets tables.
+
+Metrics (model, timestamp counted, timestamp the watermark reads):
+- signups:          User.created_at
+- events_created:   Event.created_at
+- tickets_claimed:  Ticket.claimed_at
+- checkins:         Ticket.used_at, Ticket.checkin_recorded_at
+
+Each metric has a watermark (RollupWatermark). A run counts only rows
+written after it, grouped by hour in one query, adds those counts to
+the hour and day rows in MetricRollup and moves the watermark forward.
+The watermark must read a server-side write time: a check-in's used_at
+can be a scanner's earlier scan time (batch check-in), which may already
+be behind the watermark when the row is written, so check-ins are found
+by checkin_recorded_at and counted in the hour of their used_at.
+Runs stop METRIC_ROLLUP_LAG seconds before now, so a row written by a
+transaction that commits a little late is still counted by the next run.
+
+Reads (series()) take hour rows for hourly charts and day rows for
+anything coarser (week and month are summed from days), so their cost
+depends on the range, not on how many rows the metric has.
+
+Structure:
+- roll_up(): Advance every metric's watermark (the management command).
+- series(): Zero-filled counts per period for a date range.
+- processed_through(): How current the rollups are.
+"""
+
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .facets import bucket_start, next_bucket
+from .models import Event, MetricRollup, RollupWatermark, Ticket, User
+
+METRICS = {
+    'signups': (User, 'created_at', 'created_at'),
+    'events_created': (Event, 'created_at', 'created_at'),
+    'tickets_claimed': (Ticket, 'claimed_at', 'claimed_at'),
+    'checkins': (Ticket, 'used_at', 'checkin_recorded_at'),
+}
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+
+def _day_start(moment):
+    """Local midnight starting the day `moment` falls in."""
+    return timezone.make_aware(datetime.datetime.combine(timezone.localtime(moment).date(), datetime.time.min))
+
+
+def _roll_up_metric(metric, upper):
+    """Count `metric` rows written in (watermark, upper] into the rollups; returns the row count."""
+    model, field, written = METRICS[metric]
+    with transaction.atomic():
+        # The locked watermark serializes concurrent runs for this metric
+        RollupWatermark.objects.get_or_create(metric=metric)
+        watermark = RollupWatermark.objects.select_for_update().get(metric=metric)
+        if watermark.processed_through is not None and watermark.processed_through >= upper:
+            return 0
+
+        rows = model.objects.filter(**{f'{written}__lte': upper})
+        if watermark.processed_through is not None:
+            rows = rows.filter(**{f'{written}__gt': watermark.processed_through})
+        hours = rows.annotate(period=TruncHour(field)).values('period').annotate(count=Count('id')).order_by()
+
+        deltas = Counter()
+        for row in hours:
+            deltas['hour', row['period']] += row['count']
+            deltas['day', _day_start(row['period'])] += row['count']
+
+        if deltas:
+            lookup = Q()
+            for granularity in ('hour', 'day'):
+                periods = [period for kind, period in deltas if kind == granularity]
+                lookup |= Q(granularity=granularity, period_start__in=periods)
+            existing = {
+                (rollup.granularity, rollup.period_start): rollup
+                for rollup in MetricRollup.objects.filter(lookup, metric=metric)
+            }
+            for key, rollup in existing.items():
+                rollup.count += deltas[key]
+            MetricRollup.objects.bulk_update(existing.values(), ['count'])
+            MetricRollup.objects.bulk_create([
+                MetricRollup(metric=metric, granularity=granularity, period_start=period, count=count)
+                for (granularity, period), count in deltas.items()
+                if (granularity, period) not in existing
+            ])
+
+        watermark.processed_through = upper
+        watermark.save(update_fields=['processed_through'])
+        return sum(count for (kind, _), count in deltas.items() if kind == 'hour')
+
+
+def roll_up(now=None):
+    """Roll every metric up to METRIC_ROLLUP_LAG seconds before `now`; returns {metric: rows counted}."""
+    upper = (now or timezone.now()) - datetime.timedelta(seconds=settings.METRIC_ROLLUP_LAG)
+    return {metric: _roll_up_metric(metric, upper) for metric in METRICS}
+
+
+def _period_starts(start, end, granularity):
+    """Local start of every period from the one containing date `start` through date `end`."""
+    if granularity == 'hour':
+        moment = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+        until = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+        while moment < until:
+            yield moment
+            moment = timezone.localtime(moment + datetime.timedelta(hours=1))
+        return
+    period = bucket_start(start, granularity)
+    while period <= end:
+        yield period
+        period = next_bucket(period, granularity)
+
+
+def series(metrics, start, end, granularity):
+    """
+    Counts of `metrics` per `granularity` period between dates `start`
+    and `end` (inclusive), zero-filled. Hour periods are keyed by their
+    local start time, coarser ones by their first day.
+    """
+    stored = 'hour' if granularity == 'hour' else 'day'
+    first = start if granularity == 'hour' else bucket_start(start, granularity)
+    since = timezone.make_aware(datetime.datetime.combine(first, datetime.time.min))
+    until = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+
+    counts = Counter()
+    rows = MetricRollup.objects.filter(
+        metric__in=metrics, granularity=stored, period_start__gte=since, period_start__lt=until,
+    ).values_list('metric', 'period_start', 'count')
+    for metric, period_start, count in rows:
+        local = timezone.localtime(period_start)
+        key = local if granularity == 'hour' else bucket_start(local.date(), granularity)
+        counts[metric, key] += count
+
+    return [
+        {"period": period.isoformat(), **{metric: counts[metric, period] for metric in metrics}}
+        for period in _period_starts(start, end, granularity)
+    ]
+
+
+def processed_through(metrics):
+    """The oldest watermark among `metrics` (None if any has never run)."""
+    marks = dict(RollupWatermark.objects.filter(metric__in=metrics).values_list('metric', 'processed_through'))
+    if any(marks.get(metric) is None for metric in metrics):
+        return None
+    return min(marks[metric] for metric in metrics)
@@ -0,0 +1,185 @@
+"""
+search.py
+---------
+Purpose:
+Relevance-ranked full-text search over event title, description and location.
+
+- MySQL: uses the FULLTEXT index created in migration 0005 and ranks by
+  MATCH ... AGAINST (natural language mode).
+- Other databases (SQLite test runs): falls back to an in-process
+  inverted index ranked with BM25. The index is built lazily on the first
+  search and kept current through Event save/delete signals. It is per
+  process, so it is meant for development and tests, not for serving
+  several workers.
+
+Structure:
+- tokenize(): Split text into lowercase search terms.
+- InvertedIndex: Postings lists + BM25 scoring.
+- search_events(): Rank a (visibility-filtered) Event queryset for a query.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Event
+
+SEARCH_FIELDS = ('title', 'description', 'location')
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lowercase word tokens of at least two characters."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1]
+
+
+class InvertedIndex:
+    """
+    Term -> {event id: term frequency} postings with BM25 ranking.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}  # event id -> Counter of terms (needed to remove a document)
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def add(self, event_id, text):
+        terms = Counter(tokenize(text))
+        with self.lock:
+            self._remove(event_id)
+            self.doc_terms[event_id] = terms
+            self.doc_lengths[event_id] = sum(terms.values())
+            self.total_length += self.doc_lengths[event_id]
+            for term, frequency in terms.items():
+                self.postings[term][event_id] = frequency
+
+    def remove(self, event_id):
+        with self.lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id):
+        terms = self.doc_terms.pop(event_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(event_id)
+        for term in terms:
+            self.postings[term].pop(event_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query):
+        """Return {event id: BM25 score} for documents matching any query term."""
+        with self.lock:
+            documents = len(self.doc_terms)
+            if not documents:
+                return {}
+            average_length = self.total_length / documents
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                for event_id, frequency in postings.items():
+                    length = self.doc_lengths[event_id]
+                    norm = frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[event_id] += idf * frequency * (self.k1 + 1) / norm
+            return scores
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _document_text(values):
+    return ' '.join(values[field] or '' for field in SEARCH_FIELDS)
+
+
+def get_index():
+    """Build the fallback index on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = InvertedIndex()
+            for row in Event.objects.values('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+                index.add(row['id'], _document_text(row))
+            _index = index
+        return _index
+
+
+def reset_index():
+    """Drop the fallback index; it is rebuilt on the next search."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+@receiver(post_save, sender=Event)
+def _index_event(sender, instance, **kwargs):
+    if _index is not None:
+        _index.add(instance.id, _document_text({field: getattr(instance, field) for field in SEARCH_FIELDS}))
+
+
+@receiver(post_delete, sender=Event)
+def _unindex_event(sender, instance, **kwargs):
+    if _index is not None:
+        _index.remove(instance.id)
+
+
+def search_events(queryset, query, limit=50):
+    """
+    Return up to `limit` events of `queryset` matching `query`, best match
+    first. Each event has a `relevance` attribute.
+    """
+    if connection.vendor == 'mysql':
+        relevance = RawSQL(
+            "MATCH (title, description, location) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+            (query,),
+            output_field=FloatField(),
+        )
+        return list(
+            queryset.annotate(relevance=relevance)
+            .filter(relevance__gt=0)
+            .order_by('-relevance', '-id')[:limit]
+        )
+
+    scores = get_index().search(query)
+    rank_key = lambda event_id: (scores[event_id], event_id)
+
+    # Usually the best few candidates are all visible, so only fall back to
+    # sorting every match when the queryset hides some of them.
+    ranked = heapq.nlargest(limit * 2, scores, key=rank_key)
+    events = _visible_in_order(queryset, ranked, scores, limit)
+    if len(events) < limit and len(ranked) < len(scores):
+        ranked = sorted(scores, key=rank_key, reverse=True)
+        events = _visible_in_order(queryset, ranked, scores, limit)
+    return events
+
+
+def _visible_in_order(queryset, ranked, scores, limit):
+    """Walk ranked ids in chunks, keeping the events the queryset allows."""
+    events = []
+    for start in range(0, len(ranked), 500):
+        chunk = ranked[start:start + 500]
+        visible = queryset.in_bulk(chunk)
+        for event_id in chunk:
+            if event_id in visible:
+                event = visible[event_id]
+                event.relevance = round(scores[event_id], 4)
+                events.append(event)
+        if len(events) >= limit:
+            break
+    return events[:limit]
@@ -13,6 +13,9 @@ from rest_framework import serializers
 from .models import User, Event, Ticket, EventFeedback
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.urls import reverse
 
 # Get the custom User model
 User = get_user_model()
@@ -65,15 +68,81 @@ class EventSerializer(serializers.ModelSerializer):
     """
     Converts Event model instances <-> JSON.
     Includes organizer info and marks certain fields as read-only.
+
+    Sparse fieldsets:
+    - fields="id,title,date" (or ?fields= on a GET request) limits the output
+    - Profile names expand to a field list, e.g. fields=card
+    - optimize_queryset() loads exactly what those fields need
     """
 
     organizer = serializers.StringRelatedField(read_only=True)  # Show organizer name instead of ID
     approved_by = serializers.StringRelatedField(read_only=True)
-    average_rating = serializers.FloatField(read_only=True) # average rating of the event
+    average_rating = serializers.SerializerMethodField() # average rating of the event
+
+    # Compact representations for listings
+    PROFILES = {
+        'card': ('id', 'title', 'date', 'start_time', 'end_time', 'location', 'category',
+                 'organization', 'ticket_type', 'capacity', 'status', 'organizer', 'average_rating'),
+    }
+
+    # Serializer field -> model fields that StringRelatedField (User.__str__) reads
+    RELATED_FIELDS = {
+        'organizer': ('name', 'role', 'status'),
+        'approved_by': ('name', 'role', 'status'),
+    }
+
+    # Method field -> model fields it reads
+    SOURCE_FIELDS = {
+        'average_rating': ('rating_sum', 'rating_count'),
+    }
+
     class Meta:
         model = Event
-        fields = '__all__'
-        read_only_fields = ['organizer', 'created_at', "approved_by", "approved_at", "average_rating"]
+        # Rating sum and histogram are served by GET /api/events/<id>/ratings/
+        exclude = ['rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+        read_only_fields = ['organizer', 'created_at', "approved_by", "approved_at", "average_rating",
+                            "tickets_claimed", "tickets_used", "tickets_cancelled", "rating_count"]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            request = self.context.get('request')
+            if request is not None and request.method == 'GET':
+                fields = request.query_params.get('fields')
+        if fields:
+            keep = self.resolve_fields(fields)
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def resolve_fields(cls, fields):
+        """Expand a "a,b,card" spec (or list) into field names; unknown names are ignored."""
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        names = set()
+        for token in fields:
+            token = token.strip()
+            names.update(cls.PROFILES.get(token, (token,)))
+        return names
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None):
+        """
+        Add select_related()/only() for exactly the fields that will be
+        serialized, so a page of events is one query whatever its size.
+        """
+        names = set(cls(fields=fields).fields)
+        model_fields = {field.name for field in Event._meta.concrete_fields}
+
+        only = {'id', 'version', 'updated_at'} | (names & model_fields)  # version/updated_at: ETag validators
+        related = [name for name in cls.RELATED_FIELDS if name in names]
+        for name in related:
+            only.update(f'{name}__{field}' for field in cls.RELATED_FIELDS[name])
+        for name, sources in cls.SOURCE_FIELDS.items():
+            if name in names:
+                only.update(sources)
+
+        return queryset.select_related(*related).only(*only)
 
     def get_average_rating(self, obj):
         return obj.average_rating()
@@ -85,60 +154,69 @@ class TicketSerializer(serializers.ModelSerializer):
     """
     Converts Ticket model instances <-> JSON.
     - User field is read-only (taken from authenticated user).
+    - expand="event" (or ?expand=event on a GET request) replaces the event
+      id with the event itself (EventSerializer "card" fields); use
+      optimize_queryset() so it comes from the same joined query.
     """
+    EXPANDABLE = {'event'}
     event_title = serializers.CharField(source='event.title', read_only=True)
     user_name = serializers.CharField(source='user.name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
     is_valid = serializers.ReadOnlyField()
+    qr_ready = serializers.ReadOnlyField()  # False while a stored image is waiting for the QR worker
+    qr_image = serializers.SerializerMethodField()  # on-demand PNG endpoint
     
     class Meta:
         model = Ticket
         fields = [
             'id', 'event', 'event_title', 'user', 'user_name', 'user_email',
-            'qr_code', 'status', 'claimed_at', 'used_at', 'is_valid'
+            'qr_code', 'qr_ready', 'qr_image', 'status', 'claimed_at', 'used_at', 'is_valid'
         ]
         read_only_fields = ('user', 'claimed_at', 'used_at', 'qr_code')
-    
-    def validate(self, data):
-        """
-        Validate ticket creation - check capacity and duplicates
-        """
-        # Only run validation during creation (not updates)
-        if self.instance is None:
-            event = data.get('event')
-            user = data.get('user')
-            
-            # Check if event exists and has capacity
-            if event and hasattr(event, 'capacity'):
-                if event.capacity <= 0:
-                    raise serializers.ValidationError({
-                        "error": "This event is at full capacity"
-                    })
-            
-            # Check for duplicate tickets
-            if event and user:
-                if Ticket.objects.filter(event=event, user=user).exists():
-                    raise serializers.ValidationError({
-                        "error": "You already have a ticket for this event"
-                    })
-        
-        return data
+
+    def __init__(self, *args, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if expand is None:
+            request = self.context.get('request')
+            if request is not None and request.method == 'GET':
+                expand = request.query_params.get('expand')
+        if 'event' in self.resolve_expand(expand):
+            self.fields['event'] = EventSerializer(fields='card', read_only=True)
+
+    @classmethod
+    def resolve_expand(cls, expand):
+        """Split an "a,b" spec into the expandable relations it names; others are ignored."""
+        if not expand:
+            return set()
+        return {name.strip() for name in expand.split(',')} & cls.EXPANDABLE
+
+    @classmethod
+    def optimize_queryset(cls, queryset, expand=None):
+        """Join everything the serialized tickets read (and the expanded event's organizer)."""
+        related = ['event', 'user']
+        if 'event' in cls.resolve_expand(expand):
+            related += [f'event__{name}' for name in EventSerializer.RELATED_FIELDS
+                        if name in EventSerializer.resolve_fields('card')]
+        return queryset.select_related(*related)
+
+    def get_qr_image(self, obj):
+        url = reverse('student-ticket-qr-png', kwargs={'id': obj.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
     
     def create(self, validated_data):
         """
-        Create ticket with additional validation
+        Create the ticket.
+        Capacity and duplicate claims are enforced by Ticket.save() with a
+        conditional capacity update and the (event, user) unique constraint,
+        so no pre-check queries are needed here.
         """
-        event = validated_data.get('event')
-        user = validated_data.get('user')
-        
-        # Final capacity check (in case of race conditions)
-        if event.capacity <= 0:
-            raise serializers.ValidationError({
-                "error": "Event is at full capacity"
-            })
-        
-        # Create the ticket - capacity will be decreased in model's save() method
-        return super().create(validated_data)
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError:
+            raise serializers.ValidationError({"detail": "Event capacity reached."})
+        except IntegrityError:
+            raise serializers.ValidationError({"detail": "You have already claimed a ticket for this event."})
 
 # -------------------------------
 # USER SERIALIZER (For Admin Use)
@@ -1,9 +1,30 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
-from api.models import Event, Ticket, User
+from api.models import Event, EventFeedback, Ticket, User, WaitlistEntry
+from api.qr import render_pending_qr_codes
+from api.search import reset_index
+from api import event_cache, recommendations, rollups
+from api.models import MetricRollup, StudentRecommendations
+from api.facets import facet_cache
+from api.views import ExportTicketsCSVView, checkin_events
+from api.checkin_stream import broker as checkin_broker
+from asgiref.sync import async_to_sync, sync_to_async
+from rest_framework_simplejwt.tokens import RefreshToken
+from unittest.mock import patch
+from django.core.management import call_command
+import asyncio
 import datetime
+import gzip
+import io
+import json
+import tempfile
 
 # -----------------------------
 # Helper function to create users
@@ -273,3 +294,1475 @@ class EventAccessTests(TestCase):
             self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
             print("Test succeeded: test_student_cannot_access_organizer_events")
 
+
+
+# ---------------------------------------------------------
+# 11–13. Ticket claiming (capacity + duplicate enforcement)
+# ---------------------------------------------------------
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TicketClaimTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='claimorg@test.com', role='organizer')
+        self.student = create_user(email='claimer@test.com', role='student')
+        self.other_student = create_user(email='claimer2@test.com', role='student')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Claim Event",
+            description="Flash release",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall B",
+            status="approved",
+            capacity=1,
+            organizer=self.organizer
+        )
+        self.client = APIClient()
+
+    def test_claim_decrements_capacity(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 0)
+        print("Test succeeded: test_claim_decrements_capacity")
+
+    def test_claim_rejected_when_sold_out(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        self.client.force_authenticate(user=self.other_student)
+        response = self.client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.filter(event=self.event).count(), 1)
+        print("Test succeeded: test_claim_rejected_when_sold_out")
+
+    def test_duplicate_claim_does_not_consume_capacity(self):
+        self.event.capacity = 5
+        self.event.save()
+        self.client.force_authenticate(user=self.student)
+        self.client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        response = self.client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 4)
+        print("Test succeeded: test_duplicate_claim_does_not_consume_capacity")
+
+
+# ---------------------------------------------------------
+# 14. Background QR rendering
+# ---------------------------------------------------------
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_STORE_IMAGES=True)
+class QRWorkerTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='qrorg@test.com', role='organizer')
+        self.student = create_user(email='qrstudent@test.com', role='student')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="QR Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Room 1",
+            status="approved",
+            capacity=10,
+            organizer=organizer
+        )
+
+    def test_claim_is_pending_until_worker_renders(self):
+        client = APIClient()
+        client.force_authenticate(user=self.student)
+        response = client.post('/api/tickets/claim/', {'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.data['qr_ready'])
+        self.assertIsNone(response.data['qr_code'])
+
+        self.assertEqual(render_pending_qr_codes(), 1)
+        ticket = Ticket.objects.get(id=response.data['id'])
+        self.assertTrue(ticket.qr_ready)
+        self.assertTrue(ticket.qr_code.name.endswith('.png'))
+        self.assertEqual(render_pending_qr_codes(), 0)
+        print("Test succeeded: test_claim_is_pending_until_worker_renders")
+
+
+# ---------------------------------------------------------
+# 15–16. On-demand QR images
+# ---------------------------------------------------------
+class TicketQRImageTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='qrimgorg@test.com', role='organizer')
+        self.student = create_user(email='qrimg@test.com', role='student')
+        now = timezone.now()
+        event = Event.objects.create(
+            title="QR Image Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Room 2",
+            status="approved",
+            capacity=10,
+            organizer=organizer
+        )
+        self.ticket = Ticket.objects.create(event=event, user=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_qr_png_is_cacheable_and_revalidates(self):
+        self.assertTrue(self.ticket.qr_ready)
+        url = f'/api/student/tickets/{self.ticket.id}/qr.png'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(f'/api/student/tickets/{self.ticket.id}/qr.svg')['Content-Type'], 'image/svg+xml')
+        print("Test succeeded: test_qr_png_is_cacheable_and_revalidates")
+
+    def test_qr_image_of_other_student_not_found(self):
+        self.client.force_authenticate(user=create_user(email='qrother@test.com'))
+        response = self.client.get(f'/api/student/tickets/{self.ticket.id}/qr.png')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        print("Test succeeded: test_qr_image_of_other_student_not_found")
+
+
+# ---------------------------------------------------------
+# 17–20. Signed QR codes and check-in
+# ---------------------------------------------------------
+class TicketCheckInCodeTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='gateorg@test.com', role='organizer')
+        self.student = create_user(email='gatestudent@test.com', role='student')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Gate Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Gym",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        self.ticket = Ticket.objects.create(event=self.event, user=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+
+    def test_checkin_with_signed_code(self):
+        code = self.ticket.generate_qr_code_data()
+        self.assertTrue(code.startswith('T1.'))
+        self.assertLess(len(code), 50)
+        response = self.client.post('/api/tickets/checkin/', {'qr_code': code, 'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'used')
+        print("Test succeeded: test_checkin_with_signed_code")
+
+    def test_forged_code_rejected_without_queries(self):
+        code = self.ticket.generate_qr_code_data()
+        forged = code[:-1] + ('A' if code[-1] != 'A' else 'B')
+        with self.assertNumQueries(0):
+            response = self.client.post('/api/tickets/checkin/', {'qr_code': forged}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_forged_code_rejected_without_queries")
+
+    def test_wrong_event_rejected_without_queries(self):
+        code = self.ticket.generate_qr_code_data()
+        with self.assertNumQueries(0):
+            response = self.client.post('/api/tickets/checkin/', {'qr_code': code, 'event': self.event.id + 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_wrong_event_rejected_without_queries")
+
+    def test_legacy_code_only_accepted_inside_migration_window(self):
+        legacy = f"ticket_{self.ticket.id}_user_{self.student.id}_event_{self.event.id}"
+        response = self.client.post('/api/tickets/checkin/', {'qr_code': legacy}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        yesterday = (timezone.localdate() - datetime.timedelta(days=1)).isoformat()
+        with override_settings(QR_ACCEPT_LEGACY_CODES=True, QR_LEGACY_CODES_UNTIL=yesterday):
+            response = self.client.post('/api/tickets/checkin/', {'qr_code': legacy}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(QR_ACCEPT_LEGACY_CODES=True, QR_LEGACY_CODES_UNTIL=timezone.localdate().isoformat()):
+            response = self.client.post('/api/tickets/checkin/', {'qr_code': legacy}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        print("Test succeeded: test_legacy_code_only_accepted_inside_migration_window")
+
+
+# ---------------------------------------------------------
+# 21. Batch check-in
+# ---------------------------------------------------------
+class BatchCheckInTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='batchorg@test.com', role='organizer')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Batch Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Stadium",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        self.tickets = [
+            Ticket.objects.create(event=self.event, user=create_user(email=f'batch{i}@test.com'))
+            for i in range(3)
+        ]
+        self.tickets[2].mark_as_used()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+
+    def test_batch_checkin_results(self):
+        codes = [t.generate_qr_code_data() for t in self.tickets]
+        Ticket.objects.filter(id=self.tickets[0].id).update(claimed_at=timezone.now() - datetime.timedelta(days=2))
+        scanned_at = timezone.now() - datetime.timedelta(hours=3)  # flushed from an offline scanner
+        scans = [
+            {'qr_code': codes[0], 'scanned_at': scanned_at.isoformat()},
+            codes[1],
+            codes[1],
+            codes[2],
+            'garbage',
+        ]
+        # lookup + ticket UPDATE + counter UPDATE (+ SAVEPOINT/RELEASE inside TestCase)
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/tickets/checkin/batch/', {'scans': scans, 'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['result'] for r in response.data['results']],
+            ['checked_in', 'checked_in', 'already_used', 'already_used', 'invalid'],
+        )
+        self.assertEqual(response.data['checked_in'], 2)
+        self.tickets[0].refresh_from_db()
+        self.assertEqual(self.tickets[0].status, 'used')
+        self.assertEqual(self.tickets[0].used_at, scanned_at)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.tickets_used, 3)
+        print("Test succeeded: test_batch_checkin_results")
+
+    def test_scan_times_are_bounded(self):
+        codes = [t.generate_qr_code_data() for t in self.tickets[:2]]
+        Ticket.objects.filter(id=self.tickets[1].id).update(claimed_at=timezone.now() - datetime.timedelta(days=5))
+        before = timezone.now()
+        response = self.client.post('/api/tickets/checkin/batch/', {'scans': [
+            {'qr_code': codes[0], 'scanned_at': '2026-01-01T00:00:00Z'},  # before the claim
+            {'qr_code': codes[1], 'scanned_at': '1970-01-01T00:00:00Z'},  # older than any scanner buffer
+        ]}, format='json')
+        self.assertEqual(response.data['checked_in'], 2)
+        first, second = Ticket.objects.filter(id__in=[t.id for t in self.tickets[:2]]).order_by('id')
+        self.assertEqual(first.used_at, first.claimed_at)
+        max_age = datetime.timedelta(seconds=settings.CHECKIN_MAX_SCAN_AGE)
+        self.assertGreaterEqual(second.used_at, before - max_age)
+        self.assertLess(second.used_at, before - max_age + datetime.timedelta(minutes=1))
+        print("Test succeeded: test_scan_times_are_bounded")
+
+    def test_cancelled_tickets_are_not_checked_in(self):
+        self.tickets[0].mark_as_cancelled()
+        code = self.tickets[0].generate_qr_code_data()
+
+        response = self.client.post('/api/tickets/checkin/batch/', {'scans': [code]}, format='json')
+        self.assertEqual(response.data['results'][0]['result'], 'cancelled')
+        self.assertEqual(response.data['checked_in'], 0)
+
+        response = self.client.post('/api/tickets/checkin/', {'qr_code': code}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.tickets[0].refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.tickets[0].status, 'cancelled')
+        self.assertEqual((self.event.tickets_used, self.event.tickets_cancelled), (1, 1))
+        print("Test succeeded: test_cancelled_tickets_are_not_checked_in")
+
+
+# ---------------------------------------------------------
+# 22–24. Waitlist
+# ---------------------------------------------------------
+class WaitlistTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='waitorg@test.com', role='organizer')
+        self.holder = create_user(email='holder@test.com')
+        self.first = create_user(email='first@test.com')
+        self.second = create_user(email='second@test.com')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Sold Out Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Theatre",
+            status="approved",
+            capacity=1,
+            organizer=organizer
+        )
+        self.ticket = Ticket.objects.create(event=self.event, user=self.holder)
+        self.client = APIClient()
+
+    def join(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f'/api/events/{self.event.id}/waitlist/')
+
+    def test_join_waitlist_in_order(self):
+        self.assertEqual(self.join(self.first).data['position'], 1)
+        self.assertEqual(self.join(self.second).data['position'], 2)
+        self.assertEqual(self.join(self.second).status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_join_waitlist_in_order")
+
+    def test_cancellation_promotes_head_of_waitlist(self):
+        self.join(self.first)
+        self.join(self.second)
+        self.ticket.mark_as_cancelled()
+
+        self.assertTrue(Ticket.objects.filter(event=self.event, user=self.first, status='active').exists())
+        self.assertFalse(Ticket.objects.filter(event=self.event, user=self.second).exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 0)
+        response = self.client.get(f'/api/events/{self.event.id}/waitlist/')
+        self.assertEqual(response.data['position'], 1)
+        print("Test succeeded: test_cancellation_promotes_head_of_waitlist")
+
+    def test_promotion_race_keeps_entry_queued(self):
+        self.join(self.first)
+        # Another claim took the freed seat before the promotion ran
+        with transaction.atomic():
+            self.assertIsNone(WaitlistEntry.objects.promote_next(self.event.id))
+
+        self.assertFalse(Ticket.objects.filter(event=self.event, user=self.first).exists())
+        self.client.force_authenticate(user=self.first)
+        response = self.client.get(f'/api/events/{self.event.id}/waitlist/')
+        self.assertEqual(response.data['position'], 1)
+        print("Test succeeded: test_promotion_race_keeps_entry_queued")
+
+
+# ---------------------------------------------------------
+# 25–26. Bulk ticket issuance from a roster
+# ---------------------------------------------------------
+class BulkIssueTicketsTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='rosterorg@test.com', role='organizer')
+        self.students = [create_user(email=f'roster{i}@test.com') for i in range(4)]
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Course Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="H-110",
+            status="approved",
+            capacity=3,
+            organizer=self.organizer
+        )
+        Ticket.objects.create(event=self.event, user=self.students[0])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+        self.url = f'/api/events/{self.event.id}/tickets/bulk/'
+
+    def test_bulk_issue_json_report(self):
+        emails = [s.email for s in self.students] + ['roster1@test.com', 'nobody@test.com', 'bad']
+        response = self.client.post(self.url, {'emails': emails}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['result'] for r in response.data['report']],
+            ['already_has_ticket', 'issued', 'issued', 'no_capacity', 'duplicate', 'unknown_user', 'invalid'],
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 0)
+        self.assertEqual(Ticket.objects.filter(event=self.event).count(), 3)
+        print("Test succeeded: test_bulk_issue_json_report")
+
+    def test_bulk_issue_csv_upload(self):
+        roster = SimpleUploadedFile('roster.csv', b'name,email\nA,roster1@test.com\nB,roster2@test.com\n', content_type='text/csv')
+        response = self.client.post(self.url, {'file': roster}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['issued'], 2)
+
+        # Raw text/csv body; "emails" appearing in the text is not the JSON key
+        response = self.client.post(self.url, 'email\nemails.office@test.com\nroster3@test.com\n', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['result'] for r in response.data['report']], ['unknown_user', 'no_capacity'])
+        print("Test succeeded: test_bulk_issue_csv_upload")
+
+
+# ---------------------------------------------------------
+# 27. Streaming ticket export
+# ---------------------------------------------------------
+class ExportTicketsTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='exportorg@test.com', role='organizer')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Export Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Lab",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        for i in range(3):
+            Ticket.objects.create(event=self.event, user=create_user(email=f'export{i}@test.com'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+
+    def test_export_streams_csv_and_ndjson(self):
+        with patch.object(ExportTicketsCSVView, 'chunk_size', 2):
+            response = self.client.get(f'/api/tickets/export/{self.event.id}/')
+            lines = b''.join(response.streaming_content).decode().splitlines()
+            self.assertEqual(len(lines), 4)  # header + 3 tickets
+            self.assertTrue(lines[0].startswith('Student,Event'))
+
+            response = self.client.get(f'/api/tickets/export/{self.event.id}/?file_format=ndjson&gzip=1')
+            self.assertEqual(response['Content-Type'], 'application/gzip')
+            rows = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(json.loads(rows[0])['event'], 'Export Event')
+        print("Test succeeded: test_export_streams_csv_and_ndjson")
+
+
+# ---------------------------------------------------------
+# 28–29. Event ticket counters
+# ---------------------------------------------------------
+class EventTicketCounterTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='countorg@test.com', role='organizer')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Counted Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Atrium",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        self.tickets = [
+            Ticket.objects.create(event=self.event, user=create_user(email=f'count{i}@test.com'))
+            for i in range(4)
+        ]
+
+    def test_counters_follow_ticket_changes(self):
+        self.tickets[0].mark_as_used()
+        self.tickets[1].mark_as_cancelled()
+        self.tickets[1].mark_as_cancelled()  # repeated cancel is a no-op
+        self.tickets[2].delete()
+        stale = Event.objects.get(id=self.event.id)
+        stale.title = "Renamed"
+        stale.save()  # must not overwrite counters
+
+        self.event.refresh_from_db()
+        self.assertEqual(
+            (self.event.tickets_claimed, self.event.tickets_used, self.event.tickets_cancelled, self.event.capacity),
+            (3, 1, 1, 8),
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=self.organizer)
+        with self.assertNumQueries(1):
+            response = client.get(f'/api/events/{self.event.id}/analytics/')
+        self.assertEqual(response.data['total_tickets'], 3)
+        self.assertEqual(response.data['checked_in_attendees'], 1)
+        print("Test succeeded: test_counters_follow_ticket_changes")
+
+    def test_reconcile_command_repairs_drift(self):
+        Event.objects.filter(id=self.event.id).update(tickets_claimed=99, tickets_used=7)
+        out = io.StringIO()
+        call_command('reconcile_ticket_counters', stdout=out)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.tickets_claimed, self.event.tickets_used), (4, 0))
+        self.assertIn('1 drifted', out.getvalue())
+        print("Test succeeded: test_reconcile_command_repairs_drift")
+
+
+# ---------------------------------------------------------
+# 30–31. Event tickets data (summary + paginated rows)
+# ---------------------------------------------------------
+class EventTicketsDataTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='dataorg@test.com', role='organizer')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Data Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Library",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+        self.url = f'/api/tickets/data/{self.event.id}/'
+
+    def test_event_without_tickets(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tickets'], [])
+        self.assertEqual(response.data['event_title'], "Data Event")
+        print("Test succeeded: test_event_without_tickets")
+
+    def test_cursor_pages_and_status_filter(self):
+        tickets = [Ticket.objects.create(event=self.event, user=create_user(email=f'data{i}@test.com')) for i in range(5)]
+        tickets[0].mark_as_used()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'page_size': 2})
+        seen = [row['student_email'] for row in response.data['tickets']]
+        while response.data['next_cursor']:
+            response = self.client.get(self.url, {'page_size': 2, 'cursor': response.data['next_cursor']})
+            seen += [row['student_email'] for row in response.data['tickets']]
+        self.assertEqual(seen, [f'data{i}@test.com' for i in range(5)])
+
+        response = self.client.get(self.url, {'status': 'used'})
+        self.assertEqual(len(response.data['tickets']), 1)
+        self.assertEqual(response.data['summary']['used_tickets'], 1)
+        print("Test succeeded: test_cursor_pages_and_status_filter")
+
+
+# ---------------------------------------------------------
+# 32. Ranked event search
+# ---------------------------------------------------------
+class EventSearchTests(TestCase):
+    def setUp(self):
+        reset_index()
+        organizer = create_user(email='searchorg@test.com', role='organizer')
+        now = timezone.now()
+
+        def make(title, description, status_value='approved'):
+            return Event.objects.create(
+                title=title, description=description, date=now.date(),
+                start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+                location="EV Building", status=status_value, capacity=10, organizer=organizer,
+            )
+
+        self.best = make("Robotics Workshop", "Build robotics kits: robotics for beginners")
+        self.other = make("Career Fair", "Meet robotics and software companies")
+        self.hidden = make("Robotics Secret", "Robotics robotics robotics", status_value='pending')
+        make("Jazz Night", "Live music")
+
+    def test_search_is_ranked_and_respects_visibility(self):
+        response = APIClient().get('/api/events/search/', {'q': 'robotics'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data], [self.best.id, self.other.id])
+        self.assertGreater(response.data[0]['relevance'], response.data[1]['relevance'])
+
+        Event.objects.filter(id=self.other.id).delete()
+        self.best.title = "Drone Workshop"
+        self.best.save()
+        response = APIClient().get('/api/events/search/', {'q': 'drone'})
+        self.assertEqual([e['id'] for e in response.data], [self.best.id])
+        print("Test succeeded: test_search_is_ranked_and_respects_visibility")
+
+
+# ---------------------------------------------------------
+# 33–34. Cursor pagination on list endpoints
+# ---------------------------------------------------------
+class ListCursorPaginationTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='pageorg@test.com', role='organizer')
+        now = timezone.now()
+        self.events = [
+            Event.objects.create(
+                title=f"Paged {i}", description="Paged event", date=now.date() + datetime.timedelta(days=i % 3),
+                start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+                location="Hall", status='approved', capacity=10, organizer=organizer,
+            )
+            for i in range(7)
+        ]
+        self.client = APIClient()
+
+    def test_unpaginated_shape_is_unchanged(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 7)
+        print("Test succeeded: test_unpaginated_shape_is_unchanged")
+
+    def test_next_and_previous_cursors_walk_all_rows(self):
+        expected = [e.id for e in sorted(self.events, key=lambda e: (e.date, e.id))]
+
+        response = self.client.get('/api/events/', {'page_size': 3})
+        pages = [[e['id'] for e in response.json()['results']]]
+        self.assertIsNone(response.json()['previous_cursor'])
+        while response.json()['next_cursor']:
+            response = self.client.get('/api/events/', {'page_size': 3, 'cursor': response.json()['next_cursor']})
+            pages.append([e['id'] for e in response.json()['results']])
+        self.assertEqual(sum(pages, []), expected)
+
+        # Walk back from the last page
+        response = self.client.get('/api/events/', {'page_size': 3, 'cursor': response.json()['previous_cursor']})
+        self.assertEqual([e['id'] for e in response.json()['results']], pages[-2])
+
+        response = self.client.get('/api/events/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_next_and_previous_cursors_walk_all_rows")
+
+    def test_cursors_keep_sub_millisecond_timestamps(self):
+        student = create_user(email='pagestudent@test.com')
+        base = timezone.now()
+        for i, event in enumerate(self.events[:6]):
+            ticket = Ticket.objects.create(event=event, user=student)
+            # All six claims fall within the same millisecond
+            Ticket.objects.filter(id=ticket.id).update(claimed_at=base + datetime.timedelta(microseconds=i * 100))
+        expected = list(Ticket.objects.filter(user=student).order_by('-claimed_at', '-id').values_list('id', flat=True))
+
+        client = APIClient()
+        client.force_authenticate(user=student)
+        seen, cursor = [], None
+        for _ in range(len(expected)):  # bounded, so a stuck cursor fails instead of hanging
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            page = client.get('/api/student/tickets/', params).data
+            seen += [ticket['id'] for ticket in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+        print("Test succeeded: test_cursors_keep_sub_millisecond_timestamps")
+
+
+# ---------------------------------------------------------
+# 35–36. Cached public event listing
+# ---------------------------------------------------------
+class EventListCacheTests(TestCase):
+    def setUp(self):
+        event_cache.reset_stats()
+        self.organizer = create_user(email='cacheorg@test.com', role='organizer')
+        self.admin = create_user(email='cacheadmin@test.com', role='admin')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Cached Event", description="Cached", date=now.date(),
+            start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall", status='pending', capacity=10, organizer=self.organizer,
+        )
+        self.client = APIClient()
+
+    def test_hits_and_conditional_get(self):
+        first = self.client.get('/api/events/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(first.json(), [])
+
+        # Students share the anonymous (public) entry
+        student = APIClient()
+        student.force_authenticate(user=create_user(email='cachestudent@test.com'))
+        with self.assertNumQueries(0):
+            second = student.get('/api/events/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+
+        not_modified = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Different filters are cached separately
+        self.assertEqual(self.client.get('/api/events/', {'category': 'music'})['X-Cache'], 'MISS')
+
+        admin = APIClient()
+        admin.force_authenticate(user=self.admin)
+        stats = admin.get('/api/admin/cache/events/').data
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+        print("Test succeeded: test_hits_and_conditional_get")
+
+    def test_approval_and_edit_invalidate(self):
+        etag = self.client.get('/api/events/')['ETag']
+
+        admin = APIClient()
+        admin.force_authenticate(user=self.admin)
+        admin.patch(f'/api/events/manage/{self.event.id}/', {'status': 'approved'}, format='json')
+
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['title'] for e in response.json()], ["Cached Event"])
+
+        organizer = APIClient()
+        organizer.force_authenticate(user=self.organizer)
+        organizer.patch(f'/api/events/organizer/{self.event.id}/', {'title': "Renamed Event"}, format='json')
+        self.assertEqual([e['title'] for e in self.client.get('/api/events/').json()], ["Renamed Event"])
+        print("Test succeeded: test_approval_and_edit_invalidate")
+
+    def test_listing_cached_before_commit_is_dropped(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.event.title = "Edited In Transaction"
+            self.event.save()
+            # Rendered while the edit is still uncommitted (another request would see old rows)
+            self.assertEqual(self.client.get('/api/events/')['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get('/api/events/')['X-Cache'], 'HIT')
+
+        self.assertTrue(callbacks)
+        for callback in callbacks:  # the commit
+            callback()
+        self.assertEqual(self.client.get('/api/events/')['X-Cache'], 'MISS')
+        print("Test succeeded: test_listing_cached_before_commit_is_dropped")
+
+
+# ---------------------------------------------------------
+# 37–38. Versioned resources and conditional GET
+# ---------------------------------------------------------
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='versionorg@test.com', role='organizer')
+        self.student = create_user(email='versionstudent@test.com')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Versioned Event", description="Versioned", date=now.date(),
+            start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall", status='approved', is_approved=True, capacity=10, organizer=organizer,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_event_detail_revalidates_on_version(self):
+        url = f'/api/events/{self.event.id}/'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Claiming a ticket changes the event's counters, so its version moves
+        Ticket.objects.create(event=self.event, user=create_user(email='versionother@test.com'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['capacity'], 9)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        print("Test succeeded: test_event_detail_revalidates_on_version")
+
+    def test_ticket_wallet_revalidates_on_version(self):
+        ticket = Ticket.objects.create(event=self.event, user=self.student)
+        wallet = self.client.get('/api/student/tickets/')
+        detail = self.client.get(f'/api/student/tickets/{ticket.id}/')
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/student/tickets/', HTTP_IF_NONE_MATCH=wallet['ETag']).status_code, 304)
+            self.assertEqual(self.client.get(f'/api/student/tickets/{ticket.id}/', HTTP_IF_NONE_MATCH=detail['ETag']).status_code, 304)
+
+        ticket.mark_as_used()
+        response = self.client.get('/api/student/tickets/', HTTP_IF_NONE_MATCH=wallet['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['status'], 'used')
+        response = self.client.get(f'/api/student/tickets/{ticket.id}/', HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        print("Test succeeded: test_ticket_wallet_revalidates_on_version")
+
+
+# ---------------------------------------------------------
+# 39–40. Sparse fieldsets and constant query counts
+# ---------------------------------------------------------
+class EventSparseFieldsTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='sparseorg@test.com', role='organizer')
+        self.client = APIClient()
+
+    def make_events(self, count):
+        now = timezone.now()
+        for i in range(count):
+            event = Event.objects.create(
+                title=f"Sparse {i}", description="A long description " * 20, date=now.date(),
+                start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+                location="Hall", status='approved', capacity=10, organizer=self.organizer,
+            )
+            student = create_user(email=f'sparse{event.id}@test.com')
+            EventFeedback.objects.create(event=event, user=student, rating=4)
+
+    def test_list_query_count_is_constant(self):
+        for count in (2, 6):
+            self.make_events(count)
+            for params in ({}, {'fields': 'card'}, {'page_size': 5}):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get('/api/events/', params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(len(queries), 2)  # at most one per schedule segment (upcoming, past)
+
+        events = self.client.get('/api/events/', {'fields': 'card'}).json()
+        self.assertEqual(len(events), 8)
+        self.assertNotIn('description', events[0])
+        self.assertEqual(events[0]['average_rating'], 4.0)
+        self.assertTrue(events[0]['organizer'].startswith('sparseorg'))
+        print("Test succeeded: test_list_query_count_is_constant")
+
+    def test_detail_honors_fields(self):
+        self.make_events(1)
+        event = Event.objects.get()
+        response = self.client.get(f'/api/events/{event.id}/', {'fields': 'id,title'})
+        self.assertEqual(response.data, {'id': event.id, 'title': "Sparse 0"})
+
+        full = self.client.get(f'/api/events/{event.id}/')
+        self.assertIn('description', full.data)
+        self.assertNotEqual(full['ETag'], response['ETag'])
+        print("Test succeeded: test_detail_honors_fields")
+
+
+# ---------------------------------------------------------
+# 41–42. Materialized rating aggregates
+# ---------------------------------------------------------
+class EventRatingAggregateTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='ratingorg@test.com', role='organizer')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Rated Event", description="Rated", date=now.date(),
+            start_time=now.time(), end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall", status='approved', capacity=10, organizer=organizer,
+        )
+        self.students = [create_user(email=f'rater{i}@test.com') for i in range(3)]
+        self.feedbacks = [
+            EventFeedback.objects.create(event=self.event, user=student, rating=rating)
+            for student, rating in zip(self.students, (5, 4, 4))
+        ]
+
+    def test_ratings_endpoint_reads_aggregates(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get(f'/api/events/{self.event.id}/ratings/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['average'], 4.3)
+        self.assertEqual(response.data['histogram'], {1: 0, 2: 0, 3: 0, 4: 2, 5: 1})
+
+        detail = APIClient().get(f'/api/events/{self.event.id}/')
+        self.assertEqual((detail.data['average_rating'], detail.data['rating_count']), (4.3, 3))
+        print("Test succeeded: test_ratings_endpoint_reads_aggregates")
+
+    def test_aggregates_follow_changes_and_deletes(self):
+        feedback = self.feedbacks[0]
+        feedback.rating = 1
+        feedback.save()
+        self.feedbacks[1].delete()
+        self.students[2].delete()  # cascades to the feedback
+
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.rating_count, self.event.rating_sum), (1, 1))
+        self.assertEqual(self.event.rating_histogram(), {1: 1, 2: 0, 3: 0, 4: 0, 5: 0})
+        print("Test succeeded: test_aggregates_follow_changes_and_deletes")
+
+
+# ---------------------------------------------------------
+# 43–45. Event facets
+# ---------------------------------------------------------
+class EventFacetsTests(TestCase):
+    def setUp(self):
+        facet_cache.reset()
+        self.addCleanup(facet_cache.reset)
+        self.organizer = create_user(email='facetorg@test.com', role='organizer')
+        self.day = datetime.date(2026, 3, 14)
+        self.make("Music", "Concordia", 'free')
+        self.make("Music", "McGill", 'paid')
+        self.make("Tech", "Concordia", 'free', day=datetime.date(2026, 4, 2))
+        self.pending = self.make("Tech", "Concordia", 'free', status_value='pending')
+
+    def make(self, category, organization, ticket_type, day=None, status_value='approved'):
+        return Event.objects.create(
+            title=f"{category} event", description="Facets", date=day or self.day,
+            start_time=datetime.time(18, 0), end_time=datetime.time(20, 0), location="Hall",
+            category=category, organization=organization, ticket_type=ticket_type,
+            status=status_value, capacity=10, organizer=self.organizer,
+        )
+
+    def test_counts_per_facet(self):
+        with self.assertNumQueries(4):
+            response = APIClient().get('/api/events/facets/')
+        self.assertEqual(response.data['total'], 3)
+        facets = response.data['facets']
+        self.assertEqual(facets['category'], [{"value": "Music", "count": 2}, {"value": "Tech", "count": 1}])
+        self.assertEqual(facets['ticket_type'], [{"value": "free", "count": 2}, {"value": "paid", "count": 1}])
+        self.assertEqual(facets['date'], [{"value": "2026-03-01", "count": 2}, {"value": "2026-04-01", "count": 1}])
+
+        filtered = APIClient().get('/api/events/facets/', {'organization': 'concordia', 'date_bucket': 'day'})
+        self.assertEqual(filtered.data['facets']['organization'], [{"value": "Concordia", "count": 2}])
+        self.assertEqual(filtered.data['facets']['date'][0], {"value": "2026-03-14", "count": 1})
+        print("Test succeeded: test_counts_per_facet")
+
+    def test_approval_updates_cached_counts_incrementally(self):
+        APIClient().get('/api/events/facets/')
+
+        admin = APIClient()
+        admin.force_authenticate(user=create_user(email='facetadmin@test.com', role='admin'))
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.patch(f'/api/events/manage/{self.pending.id}/', {'status': 'approved'}, format='json')
+
+        with self.assertNumQueries(0):
+            response = APIClient().get('/api/events/facets/')
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['facets']['category'], [{"value": "Music", "count": 2}, {"value": "Tech", "count": 2}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.get(id=self.pending.id).delete()
+        response = APIClient().get('/api/events/facets/')
+        self.assertEqual(response.data['facets']['organization'][0], {"value": "Concordia", "count": 2})
+        print("Test succeeded: test_approval_updates_cached_counts_incrementally")
+
+    def test_rolled_back_approval_leaves_counts_alone(self):
+        APIClient().get('/api/events/facets/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.pending.status = 'approved'
+                    self.pending.save()
+                    raise RuntimeError("rolled back")
+            except RuntimeError:
+                pass
+
+        response = APIClient().get('/api/events/facets/')
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['facets']['category'], [{"value": "Music", "count": 2}, {"value": "Tech", "count": 1}])
+        print("Test succeeded: test_rolled_back_approval_leaves_counts_alone")
+
+
+# ---------------------------------------------------------
+# 46–47. Date-range, live and upcoming event queries
+# ---------------------------------------------------------
+class EventScheduleFilterTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='scheduleorg@test.com', role='organizer')
+        self.today = datetime.date(2026, 3, 14)
+        self.make("Past", self.today - datetime.timedelta(days=2), 10, 12)
+        self.make("Morning run", self.today, 7, 8)
+        self.make("Lunch talk", self.today, 11, 13)
+        self.make("Later", self.today + datetime.timedelta(days=3), 9, 10)
+        self.make("Next week", self.today + datetime.timedelta(days=8), 9, 10)
+        self.client = APIClient()
+
+    def make(self, title, day, start_hour, end_hour):
+        return Event.objects.create(
+            title=title, description="Schedule", date=day,
+            start_time=datetime.time(start_hour), end_time=datetime.time(end_hour),
+            location="Hall", status='approved', capacity=10, organizer=self.organizer,
+        )
+
+    def titles(self, params, at):
+        # Freeze the clock the filters read ("now" in local time)
+        now = timezone.make_aware(at)
+        with patch('api.views.timezone.localtime', return_value=now):
+            event_cache.invalidate()
+            response = self.client.get('/api/events/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        return [event['title'] for event in (data['results'] if 'results' in data else data)]
+
+    def test_date_range_and_upcoming_first_ordering(self):
+        noon = datetime.datetime(2026, 3, 14, 12, 0)
+        self.assertEqual(self.titles({}, noon), ["Lunch talk", "Later", "Next week", "Past", "Morning run"])
+        self.assertEqual(self.titles({'upcoming': 'true'}, noon), ["Lunch talk", "Later", "Next week"])
+        week = {'date_from': '2026-03-14', 'date_to': '2026-03-21'}
+        self.assertEqual(self.titles(week, noon), ["Lunch talk", "Later", "Morning run"])
+
+        # Cursor pages follow the same upcoming-first order
+        titles, params = [], {'page_size': 2}
+        while True:
+            with patch('api.views.timezone.localtime', return_value=timezone.make_aware(noon)):
+                page = self.client.get('/api/events/', params).json()
+            titles += [event['title'] for event in page['results']]
+            if not page['next_cursor']:
+                break
+            params = {'page_size': 2, 'cursor': page['next_cursor']}
+        self.assertEqual(titles, ["Lunch talk", "Later", "Next week", "Past", "Morning run"])
+
+        # ... backwards too, across the upcoming/past boundary
+        with patch('api.views.timezone.localtime', return_value=timezone.make_aware(noon)):
+            page = self.client.get('/api/events/', {'page_size': 2, 'cursor': page['previous_cursor']}).json()
+        self.assertEqual([event['title'] for event in page['results']], ["Next week", "Past"])
+
+        response = self.client.get('/api/events/', {'date_from': 'next tuesday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_date_range_and_upcoming_first_ordering")
+
+    def test_live_mode(self):
+        self.assertEqual(self.titles({'live': 'true'}, datetime.datetime(2026, 3, 14, 12, 0)), ["Lunch talk"])
+
+        # A party from 22:00 to 02:00 is live on both sides of midnight, then over
+        party = self.make("Night party", self.today, 22, 2)
+        self.assertEqual(self.titles({'live': 'true'}, datetime.datetime(2026, 3, 14, 23, 0)), ["Night party"])
+        self.assertEqual(self.titles({'live': 'true'}, datetime.datetime(2026, 3, 15, 1, 30)), ["Night party"])
+        self.assertEqual(self.titles({'live': 'true'}, datetime.datetime(2026, 3, 15, 3, 0)), [])
+        self.assertEqual(self.titles({'upcoming': 'true'}, datetime.datetime(2026, 3, 15, 1, 30))[0], party.title)
+        print("Test succeeded: test_live_mode")
+
+
+# ---------------------------------------------------------
+# 48–49. Embedded ticket events and batch event lookup
+# ---------------------------------------------------------
+class EventEmbeddingTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='embedorg@test.com', role='organizer')
+        self.student = create_user(email='embedstudent@test.com')
+        now = timezone.now()
+        self.events = [
+            Event.objects.create(
+                title=f"Embedded {i}", description="Embed", date=now.date(), start_time=now.time(),
+                end_time=now.time(), location=f"Room {i}", status='approved', capacity=10, organizer=organizer,
+            )
+            for i in range(5)
+        ]
+        for event in self.events:
+            Ticket.objects.create(event=event, user=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_expand_event_embeds_events_in_one_query(self):
+        with self.assertNumQueries(2):  # wallet ETag aggregate + tickets joined with events
+            response = self.client.get('/api/student/tickets/', {'expand': 'event'})
+        self.assertEqual(len(response.data), 5)
+        embedded = {ticket['event']['title']: ticket['event'] for ticket in response.data}
+        self.assertEqual(embedded["Embedded 3"]['location'], "Room 3")
+        self.assertEqual(embedded["Embedded 3"]['organizer'], str(self.events[3].organizer))
+
+        plain = self.client.get('/api/student/tickets/')
+        self.assertIsInstance(plain.data[0]['event'], int)
+        ticket_id = response.data[0]['id']
+        detail = self.client.get(f'/api/student/tickets/{ticket_id}/', {'expand': 'event'})
+        self.assertEqual(detail.data['event']['id'], response.data[0]['event']['id'])
+        self.assertNotEqual(detail['ETag'], self.client.get(f'/api/student/tickets/{ticket_id}/')['ETag'])
+        print("Test succeeded: test_expand_event_embeds_events_in_one_query")
+
+    def test_batch_lookup_by_ids(self):
+        hidden = self.events[4]
+        Event.objects.filter(id=hidden.id).update(status='pending')
+        event_cache.invalidate()
+        ids = ','.join(str(event.id) for event in (self.events[0], self.events[2], hidden))
+
+        response = self.client.get('/api/events/', {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({event['id'] for event in response.json()}, {self.events[0].id, self.events[2].id})
+
+        self.assertEqual(self.client.get('/api/events/', {'ids': '1,two'}).status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_batch_lookup_by_ids")
+
+
+# ---------------------------------------------------------
+# 50–51. Precomputed event recommendations
+# ---------------------------------------------------------
+@override_settings(RECOMMENDATION_CLAIM_LAG=0)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        organizer = create_user(email='recorg@test.com', role='organizer')
+        self.alice = create_user(email='alice@test.com')
+        self.bob = create_user(email='bob@test.com')
+        today = timezone.localdate()
+
+        def make(title, category, days):
+            return Event.objects.create(
+                title=title, description="Recommendations", date=today + datetime.timedelta(days=days),
+                start_time=datetime.time(18), end_time=datetime.time(20), location="Hall",
+                category=category, status='approved', capacity=10, organizer=organizer,
+            )
+
+        past_music = make("Past concert", "Music", -10)
+        past_tech = make("Past hackathon", "Tech", -10)
+        self.music = make("Concert", "Music", 5)
+        self.tech = make("Workshop", "Tech", 5)
+        self.bobs_tech = make("Meetup", "Tech", 6)
+        make("Gallery", "Art", 5)
+
+        # Alice likes music; Bob went to the same concert and to tech events
+        for event, user in ((past_music, self.alice), (past_music, self.bob),
+                            (past_tech, self.bob), (self.bobs_tech, self.bob)):
+            Ticket.objects.create(event=event, user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.alice)
+
+    def recommended(self):
+        response = self.client.get('/api/dashboard/student/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['title'] for event in response.data['recommended_events']]
+
+    def test_batch_job_ranks_by_category_and_co_attendance(self):
+        self.assertEqual(self.recommended(), [])  # nothing computed yet
+        call_command('build_recommendations', stdout=io.StringIO())
+
+        # Meetup: co-attended by Bob (plus popularity); Concert: Alice's category.
+        # Workshop and Gallery share neither a category nor attendees with Alice.
+        self.assertEqual(self.recommended(), ["Meetup", "Concert"])
+        with self.assertNumQueries(2):  # stored row + the events it names
+            recommendations.recommended_events(self.alice, Event.objects.all())
+        print("Test succeeded: test_batch_job_ranks_by_category_and_co_attendance")
+
+    def test_claims_are_folded_in_by_the_incremental_run(self):
+        call_command('build_recommendations', stdout=io.StringIO())
+        before = StudentRecommendations.objects.get(user=self.alice)
+
+        # The claim itself leaves the stored row alone; the read skips held events
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tickets/claim/', {'event': self.music.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(StudentRecommendations.objects.get(user=self.alice).candidates, before.candidates)
+        self.assertEqual(self.recommended(), ["Meetup"])
+
+        call_command('build_recommendations', '--claims-only', stdout=io.StringIO())
+        stored = StudentRecommendations.objects.get(user=self.alice)
+        self.assertEqual(stored.category_affinity, {"Music": 2})
+        self.assertEqual([candidate[0] for candidate in stored.candidates], [self.bobs_tech.id])
+        self.assertEqual(recommendations.refresh_claims(), 0)  # nothing counted twice
+        self.assertEqual(StudentRecommendations.objects.get(user=self.alice).category_affinity, {"Music": 2})
+        print("Test succeeded: test_claims_are_folded_in_by_the_incremental_run")
+
+
+# ---------------------------------------------------------
+# 52–53. Global analytics (fixed query count, dated series)
+# ---------------------------------------------------------
+class GlobalAnalyticsTests(TestCase):
+    def setUp(self):
+        self.admin = create_user(email='analyticsadmin@test.com', role='admin')
+        organizer = create_user(email='analyticsorg@test.com', role='organizer')
+        students = [create_user(email=f'analytics{i}@test.com') for i in range(3)]
+        event = Event.objects.create(
+            title="Analytics Event", date=datetime.date(2026, 3, 20), start_time=datetime.time(18),
+            end_time=datetime.time(20), location="Hall", status='approved', capacity=10, organizer=organizer,
+        )
+        tickets = [Ticket.objects.create(event=event, user=student) for student in students]
+        tickets[0].mark_as_used()
+
+        # March 2025 and March 2026 must stay separate periods
+        march_2025 = timezone.make_aware(datetime.datetime(2025, 3, 10, 12))
+        march_2026 = timezone.make_aware(datetime.datetime(2026, 3, 10, 12))
+        User.objects.filter(id__in=[students[0].id]).update(created_at=march_2025)
+        User.objects.exclude(id=students[0].id).update(created_at=march_2026)
+        Event.objects.update(created_at=march_2026)
+        Ticket.objects.filter(id=tickets[0].id).update(claimed_at=march_2025)
+        Ticket.objects.exclude(id=tickets[0].id).update(claimed_at=march_2026)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_fixed_query_count_and_year_month_series(self):
+        params = {'from': '2025-01-15', 'to': '2026-04-30', 'granularity': 'month'}
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/analytics/global/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data['users']['total'], 5)
+        self.assertEqual(response.data['users']['by_role'], {"students": 3, "organizers": 1, "admins": 1})
+        self.assertEqual(response.data['tickets'], {"total": 3, "active": 2, "used": 1, "cancelled": 0})
+
+        points = {point['period']: point for point in response.data['time_series']['points']}
+        self.assertEqual(len(points), 16)  # Jan 2025 .. Apr 2026, empty months included
+        self.assertEqual(points['2025-03-01'], {"period": "2025-03-01", "users": 1, "events": 0, "tickets": 1})
+        self.assertEqual(points['2026-03-01'], {"period": "2026-03-01", "users": 4, "events": 1, "tickets": 2})
+        self.assertEqual(points['2025-04-01']['users'], 0)
+        print("Test succeeded: test_fixed_query_count_and_year_month_series")
+
+    def test_granularity_and_range_validation(self):
+        response = self.client.get('/api/analytics/global/', {'from': '2026-03-09', 'to': '2026-03-22', 'granularity': 'week'})
+        series = response.data['time_series']
+        self.assertEqual([point['period'] for point in series['points']], ['2026-03-09', '2026-03-16'])
+        self.assertEqual(series['points'][0]['tickets'], 2)
+
+        response = self.client.get('/api/analytics/global/', {'granularity': 'day'})
+        self.assertEqual(len(response.data['time_series']['points']), 30)
+
+        for params in ({'granularity': 'year'}, {'from': '2026-04-01', 'to': '2026-03-01'}, {'from': 'yesterday'}):
+            self.assertEqual(self.client.get('/api/analytics/global/', params).status_code, status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_granularity_and_range_validation")
+
+
+# ---------------------------------------------------------
+# 54–55. Incremental metric rollups
+# ---------------------------------------------------------
+@override_settings(METRIC_ROLLUP_LAG=0)
+class MetricRollupTests(TestCase):
+    def setUp(self):
+        self.admin = create_user(email='rollupadmin@test.com', role='admin')
+        students = [create_user(email=f'rollup{i}@test.com') for i in range(3)]
+        for student, moment in zip(students, ((9, 15), (9, 40), (14, 5))):
+            User.objects.filter(id=student.id).update(
+                created_at=timezone.make_aware(datetime.datetime(2026, 3, 10, *moment))
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def rollup(self, granularity, period):
+        return MetricRollup.objects.get(
+            metric='signups', granularity=granularity, period_start=timezone.make_aware(period)
+        ).count
+
+    def test_runs_only_count_rows_past_the_watermark(self):
+        counted = rollups.roll_up()
+        self.assertEqual(counted['signups'], 4)  # three backdated students + the admin
+        self.assertEqual(self.rollup('hour', datetime.datetime(2026, 3, 10, 9)), 2)
+        self.assertEqual(self.rollup('hour', datetime.datetime(2026, 3, 10, 14)), 1)
+        self.assertEqual(self.rollup('day', datetime.datetime(2026, 3, 10)), 3)
+
+        create_user(email='rollup-late@test.com')
+        create_user(email='rollup-later@test.com')
+        self.assertEqual(rollups.roll_up()['signups'], 2)
+        self.assertEqual(self.rollup('day', datetime.datetime(2026, 3, 10)), 3)  # nothing counted twice
+        today = datetime.datetime.combine(timezone.localdate(), datetime.time.min)
+        self.assertEqual(self.rollup('day', today), 3)
+        self.assertEqual(set(rollups.roll_up().values()), {0})
+        print("Test succeeded: test_runs_only_count_rows_past_the_watermark")
+
+    def test_series_api_reads_rollups_at_any_coarser_granularity(self):
+        call_command('rollup_metrics', stdout=io.StringIO())
+
+        params = {'metric': 'signups', 'from': '2026-03-01', 'to': '2026-03-31', 'granularity': 'week'}
+        with self.assertNumQueries(2):  # watermarks + rollup rows
+            response = self.client.get('/api/analytics/metrics/', params)
+        weeks = {point['period']: point['signups'] for point in response.data['points']}
+        self.assertEqual(weeks['2026-03-09'], 3)
+        self.assertEqual(sum(weeks.values()), 3)
+        self.assertIsNotNone(response.data['processed_through'])
+
+        hours = self.client.get('/api/analytics/metrics/', {
+            'metric': 'signups', 'from': '2026-03-10', 'to': '2026-03-10', 'granularity': 'hour',
+        }).data['points']
+        self.assertEqual(len(hours), 24)
+        self.assertEqual(hours[9], {"period": "2026-03-10T09:00:00+00:00", "signups": 2})
+
+        self.assertEqual(self.client.get('/api/analytics/metrics/', {'metric': 'pageviews'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        print("Test succeeded: test_series_api_reads_rollups_at_any_coarser_granularity")
+
+    def test_backdated_checkins_are_counted(self):
+        organizer = create_user(email='rolluporg@test.com', role='organizer')
+        event = Event.objects.create(
+            title="Rollup Event", date=timezone.localdate(), start_time=datetime.time(8, 0),
+            end_time=datetime.time(23, 0), location="Hall", status="approved", capacity=5, organizer=organizer,
+        )
+        ticket = Ticket.objects.create(event=event, user=create_user(email='rollup-guest@test.com'))
+        Ticket.objects.filter(id=ticket.id).update(claimed_at=timezone.now() - datetime.timedelta(days=1))
+        rollups.roll_up()  # the watermark passes the scan time before the scanner syncs
+
+        scanned_at = timezone.now() - datetime.timedelta(hours=3)
+        client = APIClient()
+        client.force_authenticate(user=organizer)
+        client.post('/api/tickets/checkin/batch/', {'scans': [
+            {'qr_code': ticket.generate_qr_code_data(), 'scanned_at': scanned_at.isoformat()},
+        ]}, format='json')
+
+        self.assertEqual(rollups.roll_up()['checkins'], 1)
+        hour = timezone.localtime(scanned_at).replace(minute=0, second=0, microsecond=0)
+        self.assertEqual(MetricRollup.objects.get(metric='checkins', granularity='hour', period_start=hour).count, 1)
+        print("Test succeeded: test_backdated_checkins_are_counted")
+
+
+# ---------------------------------------------------------
+# 56–57. Live check-in stream
+# ---------------------------------------------------------
+class CheckInStreamTests(TestCase):
+    def setUp(self):
+        self.organizer = create_user(email='streamorg@test.com', role='organizer')
+        self.student = create_user(email='streamstudent@test.com')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Stream Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall",
+            status="approved",
+            capacity=10,
+            organizer=self.organizer
+        )
+        self.ticket = Ticket.objects.create(event=self.event, user=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+
+    def check_in(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/tickets/checkin/', {'qr_code': self.ticket.generate_qr_code_data()}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_checkin_is_published_to_subscribers(self):
+        async def watch():
+            subscription = checkin_broker.subscribe(self.event.id)
+            try:
+                await sync_to_async(self.check_in)()
+                return await asyncio.wait_for(subscription.get(), 1)
+            finally:
+                checkin_broker.unsubscribe(subscription)
+
+        message = async_to_sync(watch)()
+        self.assertEqual(message['event_id'], self.event.id)
+        self.assertEqual(message['delta'], 1)
+        self.assertEqual(message['checked_in'], 1)
+        self.assertEqual(message['arrivals'][0]['ticket_id'], self.ticket.id)
+        self.assertEqual(message['arrivals'][0]['user'], 'streamstudent')
+        self.assertEqual(checkin_broker.subscriber_count(), 0)
+        print("Test succeeded: test_checkin_is_published_to_subscribers")
+
+    def test_stream_access_and_events(self):
+        url = f'/api/events/{self.event.id}/checkins/stream'
+        # Under WSGI the endless stream would be buffered, never sent
+        wsgi = APIClient()
+        wsgi.force_authenticate(user=self.organizer)
+        self.assertEqual(wsgi.get(url).status_code, 501)
+
+        self.check_in()
+        other = create_user(email='streamother@test.com', role='organizer')
+        other_token = str(RefreshToken.for_user(other).access_token)
+        token = str(RefreshToken.for_user(self.organizer).access_token)
+
+        async def open_streams():
+            client = AsyncClient()
+            codes = [
+                (await client.get(url)).status_code,
+                (await client.get(url, {'token': other_token})).status_code,
+                (await client.get(f'/api/events/{self.event.id + 100}/checkins/stream', {'token': token})).status_code,
+            ]
+            response = await client.get(url, {'token': token})  # EventSource can't set headers
+            stream = response.streaming_content
+            try:
+                snapshot = await stream.__anext__()
+                checkin_broker.deliver(self.event.id, {"event_id": self.event.id, "delta": 1, "checked_in": 2})
+                update = await stream.__anext__()
+            finally:
+                await stream.aclose()
+            return codes, response, snapshot.decode(), update.decode()
+
+        codes, response, snapshot, update = async_to_sync(open_streams)()
+        self.assertEqual(codes, [401, 403, 404])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(snapshot.startswith('event: snapshot\n'))
+        data = json.loads(snapshot.split('data: ', 1)[1])
+        self.assertEqual((data['checked_in'], data['claimed']), (1, 1))
+        self.assertEqual(data['arrivals'][0]['user'], 'streamstudent')
+        self.assertTrue(update.startswith('event: checkin\n'))
+        self.assertEqual(checkin_broker.subscriber_count(), 0)
+
+        async def idle():
+            stream = checkin_events(self.event.id, heartbeat=0.01)
+            try:
+                await stream.__anext__()  # snapshot
+                return await stream.__anext__()
+            finally:
+                await stream.aclose()
+
+        self.assertEqual(async_to_sync(idle)(), ': keep-alive\n\n')
+        print("Test succeeded: test_stream_access_and_events")
+
+
+# ---------------------------------------------------------
+# 58–59. Organizer-wide analytics
+# ---------------------------------------------------------
+class OrganizerAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = create_user(email='statsorg@test.com', role='organizer')
+        self.students = [create_user(email=f'statsstudent{i}@test.com') for i in range(3)]
+        today = timezone.localdate()
+        self.events = [
+            Event.objects.create(
+                title=f"Stats Event {i}",
+                date=today + datetime.timedelta(days=i),
+                start_time=datetime.time(10, 0),
+                end_time=datetime.time(12, 0),
+                location="Hall",
+                status="approved",
+                capacity=10,
+                organizer=self.organizer
+            )
+            for i in range(2)
+        ]
+        tickets = [Ticket.objects.create(event=self.events[0], user=student) for student in self.students]
+        tickets[0].mark_as_used()
+        tickets[1].mark_as_cancelled()
+        EventFeedback.objects.create(event=self.events[0], user=self.students[0], rating=4)
+        EventFeedback.objects.create(event=self.events[0], user=self.students[2], rating=5)
+        Ticket.objects.create(event=self.events[1], user=self.students[0])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organizer)
+
+    def test_figures_for_all_events_from_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/organizer/analytics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data['events']
+        self.assertEqual(
+            (first['claimed'], first['active'], first['used'], first['cancelled'], first['capacity_left']),
+            (3, 1, 1, 1, 8),
+        )
+        self.assertEqual((first['rating_count'], first['average_rating'], first['attendance_rate']), (2, 4.5, 50.0))
+        self.assertIsNone(second['average_rating'])
+        totals = response.data['totals']
+        self.assertEqual((totals['events'], totals['claimed'], totals['active'], totals['capacity_left']), (2, 4, 2, 17))
+        self.assertEqual(totals['average_rating'], 4.5)
+
+        with self.assertNumQueries(0):  # served from the cache
+            self.assertEqual(self.client.get('/api/organizer/analytics/').data, response.data)
+
+        student = APIClient()
+        student.force_authenticate(user=self.students[0])
+        self.assertEqual(student.get('/api/organizer/analytics/').status_code, status.HTTP_403_FORBIDDEN)
+        print("Test succeeded: test_figures_for_all_events_from_one_query")
+
+    def test_ticket_and_rating_changes_invalidate_the_cache(self):
+        def totals():
+            return self.client.get('/api/organizer/analytics/').data['totals']
+
+        self.assertEqual(totals()['used'], 1)
+        ticket = Ticket.objects.get(event=self.events[1], user=self.students[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.mark_as_used()
+        self.assertEqual(totals()['used'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(event=self.events[1], user=self.students[1])
+        self.assertEqual(totals()['claimed'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EventFeedback.objects.create(event=self.events[1], user=self.students[0], rating=3)
+        self.assertEqual(totals()['average_rating'], 4.0)
+
+        # Another organizer's events leave this cache alone
+        other = create_user(email='statsother@test.com', role='organizer')
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Other", date=timezone.localdate(), start_time=datetime.time(9, 0),
+                                 end_time=datetime.time(10, 0), location="Lab", capacity=5, organizer=other)
+        with self.assertNumQueries(0):
+            self.assertEqual(totals()['events'], 2)
+        print("Test succeeded: test_ticket_and_rating_changes_invalidate_the_cache")
+
+
+# ---------------------------------------------------------
+# 60–61. Stale event saves keep claimed seats
+# ---------------------------------------------------------
+class EventCapacityWriteTests(TestCase):
+    def setUp(self):
+        self.admin = create_user(email='seatadmin@test.com', role='admin')
+        self.organizer = create_user(email='seatorg@test.com', role='organizer')
+        self.student = create_user(email='seatstudent@test.com')
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Seat Event",
+            date=now.date(),
+            start_time=now.time(),
+            end_time=(now + datetime.timedelta(hours=1)).time(),
+            location="Hall",
+            status="pending",
+            capacity=2,
+            organizer=self.organizer
+        )
+
+    def test_stale_instance_does_not_restore_claimed_seats(self):
+        stale = Event.objects.get(id=self.event.id)  # e.g. loaded by the approval view
+        Ticket.objects.create(event=self.event, user=self.student)
+        stale.status = 'approved'
+        stale.save()
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.status, self.event.capacity), ('approved', 1))
+        print("Test succeeded: test_stale_instance_does_not_restore_claimed_seats")
+
+    def test_capacity_edit_is_applied_as_a_delta(self):
+        stale = Event.objects.get(id=self.event.id)
+        Ticket.objects.create(event=self.event, user=self.student)
+        stale.capacity = 5  # organizer adds three seats to the two they saw
+        stale.save()
+        self.assertEqual(stale.capacity, 4)  # one of the original seats was claimed meanwhile
+
+        other = create_user(email='seatstudent2@test.com')
+        Ticket.objects.create(event=self.event, user=other)
+        stale.capacity = 0  # closing sales: 4 -> 0, with only 3 seats left now
+        stale.save()
+        self.assertEqual(stale.capacity, 0)  # never below zero
+
+        client = APIClient()
+        client.force_authenticate(user=self.organizer)
+        response = client.patch(f'/api/events/organizer/{self.event.id}/', {'capacity': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 3)
+        self.assertEqual(self.event.tickets_claimed, 2)
+        print("Test succeeded: test_capacity_edit_is_applied_as_a_delta")
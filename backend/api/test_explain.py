@@ -0,0 +1,201 @@
+"""
+test_explain.py
+---------------
+Purpose:
+Query-plan regression tests. Runs EXPLAIN for the main query behind each
+list/analytics view against a seeded dataset and fails if the database
+falls back to a full table scan, so a dropped index or a rewritten filter
+is caught before it reaches production. The queries are built by the views
+themselves (get_queryset() or their query methods, on a RequestFactory
+request), so a change to a view's query is what gets explained.
+
+Seeded events span about a year and a half, mostly in the past, so the
+upcoming and date-range predicates are as selective as they are in
+production.
+
+Paged listings must also be read in index order, without sorting every
+matching row first.
+
+Works on both backends:
+- SQLite: EXPLAIN QUERY PLAN lines of the form "SCAN <table>" are full
+  scans, "USE TEMP B-TREE FOR ORDER BY" is a sort.
+- MySQL:  EXPLAIN FORMAT=JSON nodes with "access_type": "ALL" are full
+  scans, "using_filesort": true is a sort.
+"""
+
+import datetime
+import json
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Event, EventFeedback, Ticket, User
+from api.pagination import DEFAULT_PAGE_SIZE, keyset_filter
+from api.views import (
+    EventListCreateView, EventTicketsDataView, ExportTicketsCSVView, MyFeedbackListView,
+    OrganizerFeedbackListView, OrganizerUpdateEventView, StudentTicketListView, UserListView,
+)
+
+
+def view_for(view_class, user=None, params=None, **kwargs):
+    """An instance of `view_class` set up for a GET by `user` (anonymous if None) with query `params`."""
+    request = APIRequestFactory().get('/', params or {})
+    if user is not None:
+        force_authenticate(request, user=user)
+    view = view_class()
+    view.setup(request, **kwargs)
+    view.request = view.initialize_request(request)
+    view.format_kwarg = None
+    return view
+
+
+def page(view, queryset, cursor=None):
+    """The query KeysetPagination runs for one page of `queryset` (see pagination.py)."""
+    if hasattr(view, 'get_cursor_ordering'):
+        ordering = view.get_cursor_ordering()
+    else:
+        ordering = view.cursor_ordering
+    queryset = queryset.order_by(*ordering)
+    if cursor is not None:
+        queryset = queryset.filter(keyset_filter(ordering, cursor))
+    return queryset[:DEFAULT_PAGE_SIZE + 1]
+
+
+def _mysql_nodes(queryset):
+    """Every object node of the MySQL JSON plan."""
+    nodes = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            nodes.append(node)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(queryset.explain(format='json')))
+    return nodes
+
+
+def full_scans(queryset):
+    """Return the tables the database would read with a full table scan."""
+    if connection.vendor == 'mysql':
+        return [node.get('table_name') for node in _mysql_nodes(queryset) if node.get('access_type') == 'ALL']
+
+    # SQLite: "SCAN t" (no index at all) vs "SEARCH t USING INDEX ..."
+    return re.findall(r'\bSCAN (\w+)$', queryset.explain(), re.MULTILINE)
+
+
+def sorts(queryset):
+    """True if the database would sort the matching rows instead of reading them in index order."""
+    if connection.vendor == 'mysql':
+        return any(node.get('using_filesort') for node in _mysql_nodes(queryset))
+    return 'USE TEMP B-TREE FOR ORDER BY' in queryset.explain()
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.organizers = User.objects.bulk_create([
+            User(email=f'planorg{i}@test.com', name=f'planorg{i}', role='organizer', status='active')
+            for i in range(10)
+        ])
+        cls.admin = User.objects.create(email='planadmin@test.com', name='planadmin', role='admin', status='active')
+        cls.students = User.objects.bulk_create([
+            User(email=f'planstudent{i}@test.com', name=f'planstudent{i}', role='student',
+                 status='pending' if i % 7 == 0 else 'active')
+            for i in range(100)
+        ])
+        cls.events = Event.objects.bulk_create([
+            Event(
+                title=f"Plan Event {i}", description="Seeded", date=now.date() + datetime.timedelta(days=2 * i - 570),
+                start_time=now.time(), end_time=now.time(), location="Hall", capacity=100,
+                status=('approved', 'pending', 'rejected')[i % 3], organizer=cls.organizers[i % 10],
+            )
+            for i in range(300)
+        ])
+        # bulk_create skips Ticket.save(), so no capacity bookkeeping or QR work here
+        cls.tickets = Ticket.objects.bulk_create([
+            Ticket(event=cls.events[(s * 7 + k) % 300], user=student,
+                   status=('active', 'used', 'cancelled')[k % 3], qr_status='ready')
+            for s, student in enumerate(cls.students)
+            for k in range(10)
+        ])
+        EventFeedback.objects.bulk_create([
+            EventFeedback(event=ticket.event, user=ticket.user, ticket=ticket, rating=1 + ticket.id % 5)
+            for ticket in cls.tickets if ticket.status == 'used'
+        ])
+
+        if connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                for model in (User, Event, Ticket, EventFeedback):
+                    cursor.execute(f'ANALYZE TABLE {model._meta.db_table}')
+
+    def listing(self, user=None, params=None):
+        """The page query of each segment of the event listing, upcoming first."""
+        view = view_for(EventListCreateView, user, params)
+        segments = view.get_cursor_segments(view.filter_queryset(view.get_queryset()))
+        return [page(view, segment) for segment in segments]
+
+    def main_queries(self):
+        """The driving query of each view, taken from the view itself."""
+        event = self.events[1]  # has used tickets and feedback
+        organizer = event.organizer
+        student = self.students[1]
+        today = timezone.localdate()
+
+        upcoming, ended = self.listing()
+        range_upcoming, range_ended = self.listing(params={
+            'date_from': str(today - datetime.timedelta(days=30)),
+            'date_to': str(today - datetime.timedelta(days=24)),
+        })
+        live, = self.listing(params={'live': 'true'})
+        admin_upcoming, = self.listing(self.admin, {'upcoming': 'true'})
+        organizer_upcoming, organizer_ended = self.listing(organizer)
+
+        users = view_for(UserListView, self.admin)
+        tickets_data = view_for(EventTicketsDataView, organizer, event_id=event.id)
+        student_tickets = view_for(StudentTicketListView, student)
+        my_feedback = view_for(MyFeedbackListView, student)
+        organizer_feedback = view_for(OrganizerFeedbackListView, organizer)
+        event_feedback = view_for(OrganizerFeedbackListView, organizer, {'event': event.id})
+        return {
+            'EventListCreateView (public, upcoming page)': upcoming,
+            'EventListCreateView (public, past page)': ended,
+            'EventListCreateView (date range, upcoming)': range_upcoming,
+            'EventListCreateView (date range, past)': range_ended,
+            'EventListCreateView (live)': live,
+            'EventListCreateView (admin, upcoming)': admin_upcoming,
+            'EventListCreateView (organizer, upcoming)': organizer_upcoming,
+            'EventListCreateView (organizer, past)': organizer_ended,
+            'OrganizerUpdateEventView': (
+                view_for(OrganizerUpdateEventView, organizer, pk=event.id).get_queryset().filter(pk=event.id)
+            ),
+            'UserListView (cursor page)': page(users, users.get_queryset(), [self.students[10].id]),
+            'StudentTicketListView': page(student_tickets, student_tickets.get_queryset()),
+            'EventTicketsDataView': tickets_data.get_tickets(event.id).order_by('id'),
+            'EventTicketsDataView (?status=)': tickets_data.get_tickets(event.id, 'used').order_by('id'),
+            'ExportTicketsCSVView': ExportTicketsCSVView().get_chunk(event.id, 0),
+            'MyFeedbackListView': page(my_feedback, my_feedback.get_queryset()),
+            'OrganizerFeedbackListView': page(organizer_feedback, organizer_feedback.get_queryset()),
+            'OrganizerFeedbackListView (?event=)': page(event_feedback, event_feedback.get_queryset()),
+        }
+
+    def test_main_queries_use_indexes(self):
+        for name, queryset in self.main_queries().items():
+            with self.subTest(view=name):
+                self.assertEqual(full_scans(queryset), [], f"{name} does a full table scan")
+        print("Test succeeded: test_main_queries_use_indexes")
+
+    def test_listing_pages_are_read_in_index_order(self):
+        queries = self.main_queries()
+        for name in ('EventListCreateView (public, upcoming page)', 'EventListCreateView (public, past page)',
+                     'EventListCreateView (admin, upcoming)'):
+            with self.subTest(view=name):
+                self.assertFalse(sorts(queries[name]), f"{name} sorts every matching row")
+        print("Test succeeded: test_listing_pages_are_read_in_index_order")
@@ -0,0 +1,102 @@
+"""
+ticket_codes.py
+---------
+Purpose:
+Compact, signed ticket codes embedded in QR images.
+
+Format:
+    T1.<ticket id>.<event id>.<issued at>.<signature>
+
+- Ids and the issue time (Unix seconds) are base-36 encoded.
+- The signature is a truncated HMAC-SHA256 of the other fields keyed by
+  SECRET_KEY, so codes can be verified without touching the database.
+
+Legacy codes ("ticket_<id>_user_<id>_event_<id>") are not signed, so
+they are only accepted while settings.QR_ACCEPT_LEGACY_CODES is on (off
+by default) and, if settings.QR_LEGACY_CODES_UNTIL is set, not after
+that date.
+"""
+
+import base64
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.dateparse import parse_date
+
+VERSION = 'T1'
+SIGNATURE_BYTES = 12
+KEY_SALT = 'api.ticket_codes'
+
+LEGACY_PATTERN = re.compile(r'ticket_(\d+)_user_\d+_event_(\d+)')
+
+TicketCode = namedtuple('TicketCode', ['ticket_id', 'event_id', 'issued_at', 'legacy'])
+
+
+class InvalidTicketCode(Exception):
+    """Raised when a QR string is malformed or its signature does not match."""
+
+
+def _to_base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    encoded = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+        if not number:
+            return encoded
+
+
+def _sign(body):
+    digest = salted_hmac(KEY_SALT, body, algorithm='sha256').digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+def make_ticket_code(ticket_id, event_id, issued_at):
+    """Return the signed code for a ticket (issued_at is a datetime)."""
+    body = '.'.join([
+        VERSION,
+        _to_base36(ticket_id),
+        _to_base36(event_id),
+        _to_base36(int(issued_at.timestamp())),
+    ])
+    return f"{body}.{_sign(body)}"
+
+
+def legacy_codes_accepted():
+    """Whether unsigned legacy codes are still inside their migration window."""
+    if not settings.QR_ACCEPT_LEGACY_CODES:
+        return False
+    until = settings.QR_LEGACY_CODES_UNTIL
+    if until is None:
+        return True
+    if isinstance(until, str):
+        until = parse_date(until)
+    return timezone.localdate() <= until
+
+
+def parse_ticket_code(code):
+    """
+    Verify a scanned QR string and return its TicketCode.
+    Raises InvalidTicketCode for malformed, forged or (outside the
+    migration window) legacy codes.
+    """
+    code = code.strip()
+
+    if code.startswith(VERSION + '.'):
+        body, _, signature = code.rpartition('.')
+        if not constant_time_compare(signature, _sign(body)):
+            raise InvalidTicketCode("Invalid QR code signature.")
+        try:
+            _, ticket_id, event_id, issued_at = body.split('.')
+            return TicketCode(int(ticket_id, 36), int(event_id, 36), int(issued_at, 36), False)
+        except ValueError:
+            raise InvalidTicketCode("Invalid QR code format.")
+
+    match = LEGACY_PATTERN.search(code)
+    if match and legacy_codes_accepted():
+        return TicketCode(int(match.group(1)), int(match.group(2)), None, True)
+
+    raise InvalidTicketCode("Invalid QR code format.")
@@ -24,20 +24,28 @@ from .views import (
     LoginUserView,
     EventListCreateView,
     EventDetailView,
+    EventSearchView,
+    EventFacetsView,
+    EventListCacheStatsView,
     UserListView,
     ClaimTicketView,
+    EventWaitlistView,
+    BulkIssueTicketsView,
     MyTokenObtainPairView,
     ManageUserStatusView,
     ManageEventStatusView,
     OrganizerUpdateEventView,
     EventAnalyticsView,
     CheckInTicketView,
+    BatchCheckInTicketView,
     ExportTicketsCSVView,
     student_dashboard,
     StudentTicketDetailView,
     StudentTicketListView,
+    StudentTicketQRView,
     EventTicketsDataView,
     EventFeedbackView,
+    EventRatingsView,
     CanProvideFeedbackView,
     MyFeedbackListView,
     EventsForFeedbackView,
@@ -80,8 +88,22 @@ urlpatterns = [
     # -------------------------------
     path("events/",EventListCreateView.as_view(),name="event-list-create"),
     # Endpoint:
-    # - GET /api/events/ → List all events (with filters)
+    # - GET /api/events/ → List all events (with filters, cached with ETag support)
+    # - GET /api/events/?ids=1,2,3 → Batch lookup of several events in one request
     # - POST /api/events/ → Create a new event (organizers only)
+
+    path("admin/cache/events/", EventListCacheStatsView.as_view(), name="event-list-cache-stats"),
+    # Endpoint: GET /api/admin/cache/events/
+    # → Admin-only hit/miss counters of the event listing cache.
+
+    path("events/search/", EventSearchView.as_view(), name="event-search"),
+    # Endpoint: GET /api/events/search/?q=<terms>
+    # → Relevance-ranked full-text search (title, description, location),
+    #   respecting the same visibility rules as the event list.
+    
+    path("events/facets/", EventFacetsView.as_view(), name="event-facets"),
+    # Endpoint: GET /api/events/facets/?category=&organization=&date=&date_bucket=day|week|month
+    # → Approved-event counts per category, organization, ticket_type and date bucket.
     
     path("events/<int:pk>/",EventDetailView.as_view(),name="event-detail"),
     # Endpoint:
@@ -112,6 +134,14 @@ urlpatterns = [
     # Endpoint: POST /api/events/<event_id>/feedback/
     # → Allows attendees to submit feedback for an event.
 
+    path('events/<int:event_id>/ratings/', EventRatingsView.as_view(), name='event-ratings'),
+    # Endpoint: GET /api/events/<event_id>/ratings/
+    # → Rating count, average and 1-5 star histogram (stored aggregates).
+
+    path('events/<int:event_id>/checkins/stream', views.event_checkin_stream, name='event-checkin-stream'),
+    # Endpoint: GET /api/events/<event_id>/checkins/stream (Server-Sent Events, organizer/admin)
+    # → A snapshot of check-in totals, then count deltas and arrivals as tickets are checked in.
+
     # -------------------------------
     # JWT AUTHENTICATION (LOGIN & TOKEN REFRESH)
     # -------------------------------
@@ -130,10 +160,31 @@ urlpatterns = [
     # Endpoint: POST /api/tickets/claim/
     # → Allows students to claim tickets for an event.
 
+    path("events/<int:event_id>/waitlist/", EventWaitlistView.as_view(), name="event-waitlist"),
+    # Endpoint:
+    # - POST /api/events/<event_id>/waitlist/ → Join the waitlist of a sold-out event
+    # - GET /api/events/<event_id>/waitlist/ → Current waitlist position
+    # - DELETE /api/events/<event_id>/waitlist/ → Leave the waitlist
+    # → The next student is issued a ticket automatically when one is cancelled.
+
+    path("events/<int:event_id>/tickets/bulk/", BulkIssueTicketsView.as_view(), name="bulk-issue-tickets"),
+    # Endpoint: POST /api/events/<event_id>/tickets/bulk/
+    # → Organizer pre-issues tickets from a roster (JSON {"emails": [...]} or a CSV file).
+    # → Returns a per-row report.
+
     path("tickets/checkin/", CheckInTicketView.as_view(), name="checkin-ticket"),
     # Endpoint: POST /api/tickets/checkin/
     # → Allows an organizer or admin to check in an attendee using the QR code.
 
+    path("tickets/checkin/batch/", BatchCheckInTicketView.as_view(), name="checkin-ticket-batch"),
+    # Endpoint: POST /api/tickets/checkin/batch/
+    # → Checks in a buffer of QR scans at once (one lookup query, one UPDATE).
+    # Example:
+    # {
+    #   "event": 12,
+    #   "scans": [{"qr_code": "T1....", "scanned_at": "2025-11-25T18:02:11Z"}, "T1...."]
+    # }
+
     path("tickets/export/<int:event_id>/", ExportTicketsCSVView.as_view(), name="export-tickets"),
     # Endpoint: GET /api/tickets/export/<event_id>/
     # → Exports all tickets for a specific event as a CSV file.
@@ -141,10 +192,16 @@ urlpatterns = [
     path('student/tickets/', StudentTicketListView.as_view(), name='student-tickets-list'),
     # Endpoint: GET /api/student/tickets/
     # → Returns all tickets for the authenticated student user with event information and status.
+    # → ?expand=event embeds the full event card in each ticket.
 
     path('student/tickets/<int:id>/', StudentTicketDetailView.as_view(), name='student-ticket-detail'),
     # Endpoint: GET /api/student/tickets/<id>/
-    # → Returns individual ticket details for the authenticated student user.
+    # → Returns individual ticket details for the authenticated student user (?expand=event supported).
+
+    path('student/tickets/<int:id>/qr.png', StudentTicketQRView.as_view(), {'fmt': 'png'}, name='student-ticket-qr-png'),
+    path('student/tickets/<int:id>/qr.svg', StudentTicketQRView.as_view(), {'fmt': 'svg'}, name='student-ticket-qr-svg'),
+    # Endpoint: GET /api/student/tickets/<id>/qr.png (or qr.svg)
+    # → Renders the ticket's QR code on demand (cached, ETag + immutable cache headers).
 
     # -------------------------------
     # DASHBOARD
@@ -155,9 +212,18 @@ urlpatterns = [
     # -------------------------------
     # GLOBAL ANALYTICS
     # -------------------------------
-    # Endpoint: GET /api/analytics/global/
+    # Endpoint: GET /api/analytics/global/?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month
+    # → Platform totals plus a signups / events / tickets time series (admins only)
     path("analytics/global/", views.GlobalAnalyticsView.as_view(), name="global-analytics"),
 
+    # Endpoint: GET /api/analytics/metrics/?metric=signups,checkins&from=&to=&granularity=hour|day|week|month
+    # → Metric counts per period from the rollup tables (admins only; see `manage.py rollup_metrics`)
+    path("analytics/metrics/", views.MetricSeriesView.as_view(), name="metric-series"),
+
+    # Endpoint: GET /api/organizer/analytics/
+    # → Claimed / used / cancelled / capacity / rating figures for every event of the organizer, plus totals
+    path("organizer/analytics/", views.OrganizerAnalyticsView.as_view(), name="organizer-analytics"),
+
     # -------------------------------
     # EVENT TICKETS DATA
     # -------------------------------
@@ -14,7 +14,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
 from django.utils import timezone
 from rest_framework import generics, permissions, status, exceptions, authentication
-from django.db.models.functions import TruncMonth, Coalesce
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
@@ -22,22 +22,51 @@ from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import User, Event, Ticket, AuditLog, EventFeedback
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from .models import User, Event, Ticket, AuditLog, EventFeedback, WaitlistEntry, ticket_counters_changed
 from .serializers import (RegisterSerializer, UserSerializer, EventSerializer, TicketSerializer, MyTokenObtainPairSerializer, EventFeedbackSerializer)
 from .permissions import (IsAdmin,IsOrganizer, IsStudent, IsStudentOrOrganizerOrAdmin)
 from django.db.models import Count, Q
 from .models import User, Event, Ticket, AuditLog
 from .serializers import (RegisterSerializer, UserSerializer, EventSerializer, TicketSerializer, MyTokenObtainPairSerializer)
-from django.db.models import Sum, Count, Q, Value, F, FloatField
+from django.db.models import Sum, Count, Q, Value, F, DateField, FloatField, IntegerField, Case, When
 from .permissions import (IsAdmin,IsOrganizer, IsStudent, IsStudentOrOrganizerOrAdmin, IsOrganizerOrAdmin)
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
 from django.core.exceptions import PermissionDenied
+import asyncio
 import csv
+import datetime
+from collections import Counter, defaultdict
+import io
+import json
+import zlib
+from django.conf import settings
 import numpy as np
 import re
-from rest_framework.parsers import MultiPartParser, JSONParser
+from rest_framework.parsers import MultiPartParser, JSONParser, BaseParser
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.utils.cache import get_conditional_response
+from django.db.models import Max
+from django.utils.dateparse import parse_date, parse_datetime
+import hashlib
+from django.db import IntegrityError, transaction
+from .qr import IMAGE_CONTENT_TYPES, render_cached
+from .ticket_codes import InvalidTicketCode, parse_ticket_code
+from .pagination import KeysetPagination, get_page_size, paginate_keyset
+from .search import search_events
+from . import event_cache
+from . import recommendations
+from . import rollups
+from . import organizer_analytics
+from .checkin_stream import broker as checkin_broker, publish_checkins
+from .facets import DATE_BUCKETS, DEFAULT_BUCKET, bucket_start, facet_cache, next_bucket
+from rest_framework.renderers import JSONRenderer
 
 
 # Get custom user model
@@ -131,6 +160,113 @@ class LoginUserView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+# ------------------------------------
+# EVENT FILTERS (SHARED BY LIST, SEARCH AND FACETS)
+# ------------------------------------
+EVENT_FILTER_PARAMS = ('date', 'date_from', 'date_to', 'category', 'organization')
+
+
+def _date_param(params, name):
+    """Parse an optional YYYY-MM-DD query param (400 if malformed)."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise exceptions.ValidationError({name: "Use the YYYY-MM-DD format."})
+    return parsed
+
+
+MAX_EVENT_IDS = 100
+
+
+def _ids_param(params, name='ids'):
+    """Parse an optional "1,2,3" query param (400 if malformed or too long)."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        ids = {int(part) for part in value.split(',') if part.strip()}
+    except ValueError:
+        raise exceptions.ValidationError({name: "Use a comma-separated list of ids."})
+    if len(ids) > MAX_EVENT_IDS:
+        raise exceptions.ValidationError({name: f"At most {MAX_EVENT_IDS} ids per request."})
+    return ids
+
+
+def _live_q(now):
+    """Events in progress at `now` (local time), including ones running past midnight."""
+    today, current = now.date(), now.time()
+    overnight = Q(end_time__lt=F('start_time'))
+    return (
+        Q(date=today, start_time__lte=current) & (Q(end_time__gte=current) | overnight)
+    ) | (Q(date=today - datetime.timedelta(days=1), end_time__gte=current) & overnight)
+
+
+def _upcoming_q(now):
+    """Events that have not ended yet at `now` (local time): later ones plus live ones."""
+    today, current = now.date(), now.time()
+    yesterday = today - datetime.timedelta(days=1)
+    overnight = Q(end_time__lt=F('start_time'))
+    # The explicit lower bound lets the date index serve this as a range
+    return Q(date__gte=yesterday) & (
+        Q(date__gt=today)
+        | (Q(date=today) & (Q(end_time__gte=current) | overnight))
+        | (Q(date=yesterday, end_time__gte=current) & overnight)
+    )
+
+
+def _ended_q(now):
+    """Events that are over at `now` (local time): the complement of _upcoming_q, bounded by date."""
+    return Q(date__lte=now.date()) & ~_upcoming_q(now)
+
+
+def _schedule_segments(queryset, now, params):
+    """
+    Upcoming-first listing as separate querysets, read in turn: events
+    that have not ended yet, then past ones. Each is a range on the
+    (status, date, start_time) index in date order, so no page sorts the
+    whole event history. ?upcoming= and ?live= listings have one segment.
+    """
+    if params.get('upcoming') == 'true' or params.get('live') == 'true':
+        return [queryset]
+    return [queryset.filter(_upcoming_q(now)), queryset.filter(_ended_q(now))]
+
+
+def _filter_events(queryset, params):
+    """
+    Apply the list filters:
+    - ?date=, ?category=, ?organization=
+    - ?date_from= / ?date_to= (inclusive range)
+    - ?live=true (happening now), ?upcoming=true (not ended yet)
+    """
+    date = params.get('date')
+    date_from = _date_param(params, 'date_from')
+    date_to = _date_param(params, 'date_to')
+    category = params.get('category')
+    organization = params.get('organization')
+
+    if date:
+        queryset = queryset.filter(date=date)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if category:
+        queryset = queryset.filter(category__icontains=category)
+    if organization:
+        queryset = queryset.filter(organization__icontains=organization)
+
+    now = timezone.localtime()
+    if params.get('live') == 'true':
+        queryset = queryset.filter(_live_q(now))
+    if params.get('upcoming') == 'true':
+        queryset = queryset.filter(_upcoming_q(now))
+    return queryset
+
 # ------------------------------------
 # EVENT MANAGEMENT (LIST + CREATE)
 # ------------------------------------
@@ -145,9 +281,25 @@ class EventListCreateView(generics.ListCreateAPIView):
     Access:
     - GET: Public (no login required) — shows only approved events
     - POST: Organizers only
+
+    Filters: ?date=, ?date_from=, ?date_to=, ?category=, ?organization=,
+    ?live=true (happening now), ?upcoming=true (not ended yet).
+    Batch lookup: ?ids=1,2,3 (up to MAX_EVENT_IDS) returns those events in
+    one query; ids the user cannot see are left out.
+    Ordering is upcoming-first: events that have not ended yet, soonest
+    first, then past events in date order (read as two index ranges, see
+    _schedule_segments()).
+
+    Pagination (opt-in): ?page_size=<n>&cursor=<cursor>
+
+    Caching:
+    - GET responses are cached per visibility class and filters (see event_cache.py)
+    - Responses carry an ETag; If-None-Match gets a 304
     """
 
     serializer_class = EventSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('date', 'start_time', 'id')
 
     def get_permissions(self):
         """Allow public access for GET; restrict POST to organizers."""
@@ -180,19 +332,153 @@ class EventListCreateView(generics.ListCreateAPIView):
         elif user.role == 'admin':
             queryset = queryset.all()
 
+        # Batch lookup, so clients holding several ids make one request
+        ids = _ids_param(self.request.query_params)
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+
         # Filter options for convenience
-        date = self.request.query_params.get('date')
-        category = self.request.query_params.get('category')
-        organization = self.request.query_params.get('organization')
+        queryset = _filter_events(queryset, self.request.query_params)
+        queryset = queryset.order_by(*self.cursor_ordering)
+
+        # Sparse fieldsets: load only what ?fields= asks for
+        return EventSerializer.optimize_queryset(queryset, self.request.query_params.get('fields'))
+
+    def get_cursor_segments(self, queryset):
+        return _schedule_segments(queryset, timezone.localtime(), self.request.query_params)
+
+    def render_listing(self):
+        """The listing's response data: one cursor page, or every segment in turn."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+        events = [event for segment in self.get_cursor_segments(queryset) for event in segment]
+        return self.get_serializer(events, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        """Serve the listing from the response cache, rendering it on a miss."""
+        key = event_cache.cache_key(request)
+        entry = event_cache.get(key)
+        hit = entry is not None
+        if not hit:
+            entry = event_cache.store(key, JSONRenderer().render(self.render_listing()))
+
+        if entry["etag"] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(entry["body"], content_type='application/json')
+
+        response['ETag'] = entry["etag"]
+        response['Cache-Control'] = 'no-cache' if event_cache.visibility_class(request.user) == 'public' else 'private, no-cache'
+        response['Vary'] = 'Authorization, Cookie'
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+# ------------------------------------
+# EVENT FACETS (DISCOVERY COUNTS)
+# ------------------------------------
+class EventFacetsView(APIView):
+    """
+    GET /api/events/facets/
+    Counts of approved events per category, organization, ticket_type and
+    date bucket, for the same ?date=/?category=/?organization= filters as
+    the event list. ?date_bucket=day|week|month (default month).
+
+    One grouped query per facet; results are cached and kept current
+    incrementally as events are approved, edited or removed (see facets.py).
+
+    Access:
+    - Public
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = {name: request.query_params[name] for name in EVENT_FILTER_PARAMS if request.query_params.get(name)}
+        date_bucket = request.query_params.get('date_bucket')
+        if date_bucket:
+            if date_bucket not in DATE_BUCKETS:
+                return Response({"error": "date_bucket must be one of: day, week, month."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if date_bucket != DEFAULT_BUCKET:
+                params['date_bucket'] = date_bucket
+
+        queryset = _filter_events(Event.objects.filter(status='approved'), params)
+        return Response(facet_cache.get(params, queryset), status=status.HTTP_200_OK)
+
+# ------------------------------------
+# EVENT LIST CACHE STATS (ADMIN)
+# ------------------------------------
+class EventListCacheStatsView(APIView):
+    """
+    GET /api/admin/cache/events/
+    Hit/miss counters of the event listing cache (this worker process),
+    used to size EVENT_LIST_CACHE_TIMEOUT and the cache backend.
+
+    Access:
+    - Admins only.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(event_cache.stats(), status=status.HTTP_200_OK)
+
+# ------------------------------------
+# EVENT SEARCH (RANKED FULL-TEXT)
+# ------------------------------------
+class EventSearchView(EventListCreateView):
+    """
+    Relevance-ranked search over event title, description and location.
+
+    Behavior:
+    - GET /api/events/search/?q=<terms>[&limit=<n>]
+    - Same role visibility and filters as the event list
+    - Results are ordered by relevance (included as 'relevance')
 
-        if date:
-            queryset = queryset.filter(date=date)
-        if category:
-            queryset = queryset.filter(category__icontains=category)
-        if organization:
-            queryset = queryset.filter(organization__icontains=organization)
+    Access:
+    - Public
+    """
+    http_method_names = ['get', 'head', 'options']
+    max_limit = 100
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "The 'q' parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), self.max_limit))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return queryset
+        events = search_events(self.get_queryset(), query, limit)
+        results = self.get_serializer(events, many=True).data
+        for event, data in zip(events, results):
+            data["relevance"] = event.relevance
+        return Response(results)
+
+# ------------------------------------
+# CONDITIONAL GET HELPERS
+# ------------------------------------
+def _version_etag(*parts):
+    """Weak ETag built from ids and version numbers (see VersionedModel)."""
+    return 'W/' + quote_etag('-'.join(str(part) for part in parts))
+
+
+def _not_modified(request, etag, updated_at):
+    """Return a 304 response if If-None-Match / If-Modified-Since still match, else None."""
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        _set_validators(response, etag, updated_at)
+    return response
+
+
+def _set_validators(response, etag, updated_at, cache_control='private, no-cache'):
+    response['ETag'] = etag
+    if updated_at:
+        response['Last-Modified'] = http_date(updated_at.timestamp())
+    response['Cache-Control'] = cache_control
+    return response
 
 # ------------------------------------
 # EVENT DETAIL (RETRIEVE + UPDATE + DELETE)
@@ -208,6 +494,8 @@ class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
     Access:
     - GET: Public
     - PUT/PATCH/DELETE: Organizers only
+
+    GET supports ?fields= (see EventSerializer) and conditional requests.
     """
 
     serializer_class = EventSerializer
@@ -220,8 +508,30 @@ class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """Retrieve events."""
+        if self.request.method == 'GET':
+            return EventSerializer.optimize_queryset(Event.objects.all(), self.request.query_params.get('fields'))
         return Event.objects.all()
 
+    def _etag(self, version):
+        fields = self.request.query_params.get('fields')
+        variant = hashlib.sha256(fields.encode()).hexdigest()[:8] if fields else 'all'
+        return _version_etag('event', self.kwargs['pk'], version, variant)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Conditional GET: revalidation only reads (version, updated_at)
+        and answers 304 without loading or serializing the event.
+        """
+        row = Event.objects.filter(pk=kwargs['pk']).values_list('version', 'updated_at').first()
+        if row is not None:
+            response = _not_modified(request, self._etag(row[0]), row[1])
+            if response is not None:
+                return response
+
+        event = self.get_object()
+        response = Response(self.get_serializer(event).data)
+        return _set_validators(response, self._etag(event.version), event.updated_at, 'no-cache')
+
 # ------------------------------------
 # TICKET CLAIM (STUDENTS ONLY)
 # ------------------------------------
@@ -242,27 +552,207 @@ class ClaimTicketView(generics.CreateAPIView):
     permission_classes = [IsStudent]
 
     def perform_create(self, serializer):
-        """Validate ticket claim and enforce event capacity."""
-        event_id = self.request.data.get('event')
+        """
+        Save the ticket for the current user.
+        Capacity and duplicate claims are enforced atomically when the
+        ticket is inserted (see Ticket.save), not by pre-check queries.
+        """
+        # Save ticket with the current user
+        serializer.save(user=self.request.user)
+
+# ------------------------------------
+# EVENT WAITLIST (STUDENTS ONLY)
+# ------------------------------------
+class EventWaitlistView(APIView):
+    """
+    Lets students queue for a sold-out event.
+
+    Behavior:
+    - POST: Join the waitlist (only when the event has no seats left)
+    - GET: Current position in the waitlist
+    - DELETE: Leave the waitlist
+
+    When a ticket is cancelled or deleted, the student at the head of
+    the waitlist is issued the freed ticket automatically.
+
+    Access:
+    - Students only.
+    """
+    permission_classes = [IsStudent]
 
-        if not event_id:
-            raise exceptions.ValidationError({"event": "This field is required."})
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id)
 
+        if event.capacity > 0:
+            return Response({"detail": "Seats are still available. Claim a ticket instead."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if Ticket.objects.filter(event=event, user=request.user).exists():
+            return Response({"detail": "You have already claimed a ticket for this event."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        promoted = None
         try:
-            event = Event.objects.get(id=event_id)
-        except Event.DoesNotExist:
-            raise exceptions.NotFound("Event not found.")
+            with transaction.atomic():
+                entry = WaitlistEntry.objects.create(event=event, user=request.user)
+                # A seat may have been freed after the capacity check above
+                if Event.objects.filter(id=event.id, capacity__gt=0).exists():
+                    promoted = WaitlistEntry.objects.promote_next(event.id)
+        except IntegrityError:
+            return Response({"detail": "You are already on the waitlist for this event."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        # Ensure event capacity not exceeded
-        if Ticket.objects.filter(event=event).count() >= event.capacity:
-            raise exceptions.ValidationError({"detail": "Event capacity reached."})
+        if promoted is not None and promoted.user_id == request.user.id:
+            return Response({"detail": "A seat opened up. Your ticket has been issued."},
+                            status=status.HTTP_201_CREATED)
 
-        # Prevent duplicate claims
-        if Ticket.objects.filter(event=event, user=self.request.user).exists():
-            raise exceptions.ValidationError({"detail": "You have already claimed a ticket for this event."})
+        return Response({
+            "event": event.id,
+            "position": entry.position(),
+            "message": "You have joined the waitlist."
+        }, status=status.HTTP_201_CREATED)
 
-        # Save ticket with the current user
-        serializer.save(user=self.request.user, event=event)
+    def get(self, request, event_id):
+        entry = get_object_or_404(WaitlistEntry, event_id=event_id, user=request.user)
+        return Response({"event": event_id, "position": entry.position()})
+
+    def delete(self, request, event_id):
+        deleted, _ = WaitlistEntry.objects.filter(event_id=event_id, user=request.user).delete()
+        if not deleted:
+            return Response({"detail": "You are not on the waitlist for this event."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+# ------------------------------------
+# BULK TICKET ISSUANCE (ROSTER UPLOAD)
+# ------------------------------------
+def _read_roster(request):
+    """
+    Return the list of emails in a roster upload.
+    Accepts JSON {"emails": [...]}, a multipart 'file' or a raw text/csv body.
+    CSV rosters use the 'email' column when there is a header row,
+    otherwise the first column.
+    """
+    # A raw text/csv body parses to a str, where `in` would be a substring test
+    if not isinstance(request.data, str) and 'emails' in request.data:
+        emails = request.data.get('emails')
+        if not isinstance(emails, list):
+            raise exceptions.ValidationError({"emails": "Must be a list of email addresses."})
+        return [str(email) for email in emails]
+
+    upload = request.FILES.get('file')
+    if upload is not None:
+        text = upload.read().decode('utf-8-sig')
+    elif isinstance(request.data, str):
+        text = request.data
+    else:
+        raise exceptions.ValidationError({"detail": "Provide 'emails' or a CSV 'file'."})
+
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if 'email' in header:
+        column = header.index('email')
+        rows = rows[1:]
+    else:
+        column = 0
+    return [row[column] if column < len(row) else '' for row in rows]
+
+
+class PlainTextParser(BaseParser):
+    """Parses raw text/csv request bodies into a string."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read().decode('utf-8-sig')
+
+
+class BulkIssueTicketsView(APIView):
+    """
+    Lets an organizer pre-issue tickets to a roster of students.
+
+    Behavior:
+    - Resolves all emails with one query
+    - Creates tickets with bulk_create in chunks
+    - Decrements capacity once for the whole roster
+    - Stored QR images (if enabled) are rendered by the qr_worker process pool
+    - Returns a per-row report: issued, already_has_ticket, unknown_user,
+      duplicate, invalid or no_capacity
+
+    Access:
+    - The event's organizer, or admins.
+    """
+    permission_classes = [IsOrganizerOrAdmin]
+    parser_classes = [JSONParser, MultiPartParser, PlainTextParser]
+    batch_size = 1000
+
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id)
+        if not (request.user.role == "admin" or request.user.id == event.organizer_id):
+            return Response({"error": "You are not authorized to issue tickets for this event."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        emails = [email.strip() for email in _read_roster(request)]
+        report = [{"row": row, "email": email, "result": None} for row, email in enumerate(emails, start=1)]
+
+        # Resolve every student in one query
+        users = dict(
+            User.objects.filter(email__in=set(emails), role='student').values_list('email', 'id')
+        )
+
+        candidates = []  # (report row, user id)
+        seen = set()
+        for row in report:
+            email = row["email"]
+            if not email or '@' not in email:
+                row["result"] = "invalid"
+            elif email in seen:
+                row["result"] = "duplicate"
+            elif email not in users:
+                row["result"] = "unknown_user"
+            else:
+                candidates.append((row, users[email]))
+            seen.add(email)
+
+        with transaction.atomic():
+            # Lock the event row so concurrent claims wait for the roster
+            capacity = Event.objects.select_for_update().values_list('capacity', flat=True).get(id=event.id)
+            holders = set(
+                Ticket.objects.filter(event=event, user_id__in=[user_id for _, user_id in candidates])
+                .values_list('user_id', flat=True)
+            )
+
+            to_issue = []
+            for row, user_id in candidates:
+                if user_id in holders:
+                    row["result"] = "already_has_ticket"
+                elif len(to_issue) >= capacity:
+                    row["result"] = "no_capacity"
+                else:
+                    row["result"] = "issued"
+                    to_issue.append(user_id)
+
+            qr_status = 'pending' if settings.QR_STORE_IMAGES else 'ready'
+            Ticket.objects.bulk_create(
+                [Ticket(event=event, user_id=user_id, qr_status=qr_status) for user_id in to_issue],
+                batch_size=self.batch_size,
+            )
+            if to_issue:
+                Event.objects.filter(id=event.id).update(
+                    capacity=F('capacity') - len(to_issue),
+                    tickets_claimed=F('tickets_claimed') + len(to_issue),
+                    **Event.version_bump(),
+                )
+                ticket_counters_changed.send(sender=Ticket, event_id=event.id)
+                WaitlistEntry.objects.filter(event=event, user_id__in=to_issue).delete()
+
+        return Response({
+            "event": event.id,
+            "issued": len(to_issue),
+            "rows": len(report),
+            "report": report,
+        }, status=status.HTTP_200_OK)
 
 # ------------------------------------
 # ADMIN USER MANAGEMENT (LIST USERS)
@@ -278,6 +768,8 @@ class UserListView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
     queryset = User.objects.all()
+    pagination_class = KeysetPagination
+    cursor_ordering = ('id',)
 
 # ------------------------------------
 # USERS MANAGEMENT (APPROVE / SUSPEND / RESET)
@@ -433,7 +925,7 @@ class OrganizerUpdateEventView(generics.UpdateAPIView):
         return Response({
             "id": event.id,
             "title": event.title,
-            "organizer": event.organizer,
+            "organizer": event.organizer_id,
             "submitted": event.created_at,
             "updated_fields": list(data.keys()),
             "message": "Event updated successfully (status unchanged)."
@@ -467,30 +959,20 @@ class EventAnalyticsView(APIView):
         event = get_object_or_404(Event, id=event_id)
 
         # Organizer can view
-        if not (request.user == event.organizer or request.user.role == "admin"):
+        if not (request.user.id == event.organizer_id or request.user.role == "admin"):
             return Response(
                 {"error": "You are not authorized to view this event's analytics."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        analytics = (
-            Event.objects.filter(id=event_id)
-            .annotate(
-                total_tickets=Count("tickets"),
-                checked_in_attendees=Count("tickets", filter=Q(tickets__status="used")),
-            )
-            .values("id", "title", "capacity", "total_tickets", "checked_in_attendees")
-            .first()
-        )
-
-        if not analytics:
-            analytics = {
-                "id": event.id,
-                "title": event.title,
-                "capacity": event.capacity,
-                "total_tickets": 0,
-                "checked_in_attendees": 0,
-            }
+        # Counters are maintained on the event row; no ticket scan needed
+        analytics = {
+            "id": event.id,
+            "title": event.title,
+            "capacity": event.capacity,
+            "total_tickets": event.tickets_claimed,
+            "checked_in_attendees": event.tickets_used,
+        }
 
         return Response(analytics, status=status.HTTP_200_OK)
 
@@ -501,6 +983,11 @@ class CheckInTicketView(APIView):
     """
     Allows an organizer or admin to check in an attendee using the QR code string.
     Marks the ticket as 'used' and records the check-in time.
+
+    Body:
+      - qr_code: the scanned code (required)
+      - event: the event being checked in (optional). Codes for any other
+        event are rejected without a database lookup.
     """
     permission_classes = [IsAuthenticated, IsOrganizer | IsAdmin]
     parser_classes = [JSONParser]  
@@ -510,20 +997,27 @@ class CheckInTicketView(APIView):
         if not qr_code:
             return Response({"error": "QR code is required."}, status=400)
 
-        # Extract ticket ID from QR code string
-        match = re.search(r'ticket_(\d+)_user_\d+_event_\d+', qr_code)
-        if not match:
-            return Response({"error": "Invalid QR code format."}, status=400)
-
-        ticket_id = int(match.group(1))
-
+        # Verify the signature before touching the database
         try:
-            ticket = Ticket.objects.get(id=ticket_id)
-        except Ticket.DoesNotExist:
+            code = parse_ticket_code(qr_code)
+        except InvalidTicketCode as e:
+            return Response({"error": str(e)}, status=400)
+
+        expected_event = request.data.get("event")
+        if expected_event and str(code.event_id) != str(expected_event):
+            return Response({"error": "This ticket is for a different event."}, status=400)
+
+        # Single query: ticket, its event (for the organizer check) and attendee
+        ticket = (
+            Ticket.objects.select_related('event', 'user')
+            .filter(id=code.ticket_id, event_id=code.event_id)
+            .first()
+        )
+        if not ticket:
             return Response({"error": "Ticket not found."}, status=404)
 
         # Only organizer or admin can check in
-        if request.user != ticket.event.organizer and not request.user.role == "admin":
+        if request.user.id != ticket.event.organizer_id and not request.user.role == "admin":
             return Response(
                 {"error": "You are not authorized to check in attendees for this event."},
                 status=403,
@@ -532,9 +1026,16 @@ class CheckInTicketView(APIView):
         if ticket.status == "used":
             return Response({"message": "This ticket has already been used."}, status=200)
 
-        ticket.status = "used"
-        ticket.used_at = timezone.now()
-        ticket.save()
+        if ticket.mark_as_used() is None:
+            # Cancelled (possibly just now, by a concurrent request)
+            if ticket.status == "used":
+                return Response({"message": "This ticket has already been used."}, status=200)
+            return Response({"error": "This ticket has been cancelled."}, status=400)
+
+        # Live dashboards (GET /api/events/<id>/checkins/stream)
+        publish_checkins(ticket.event_id, [
+            {"ticket_id": ticket.id, "user": ticket.user.name, "checked_in_at": ticket.used_at},
+        ])
 
         return Response({
             "message": "Ticket successfully checked in.",
@@ -544,27 +1045,315 @@ class CheckInTicketView(APIView):
         }, status=200)
 
 
+# ------------------------------------
+# Batch Check in View (gate scanners)
+# ------------------------------------
+class BatchCheckInTicketView(APIView):
+    """
+    Allows gate scanners to flush a buffer of QR scans in one request.
+
+    Body:
+      - scans: list of QR strings, or of {"qr_code": ..., "scanned_at": <ISO datetime>}
+        (scan times in the future count as now; ones older than
+        CHECKIN_MAX_SCAN_AGE seconds, or before the ticket was claimed,
+        are moved up to that bound)
+      - event: the event being checked in (optional)
+
+    All tickets are resolved with one query and the valid ones are marked
+    'used' with one UPDATE (plus one counter UPDATE per event). Returns one result per scan, in order:
+    checked_in, already_used, cancelled, invalid, wrong_event or not_authorized.
+    Only active tickets are checked in; a cancelled ticket's seat may have
+    been released or given to a waitlisted student.
+    """
+    permission_classes = [IsAuthenticated, IsOrganizer | IsAdmin]
+    parser_classes = [JSONParser]
+    max_batch_size = 500
+
+    def post(self, request):
+        scans = request.data.get("scans")
+        if not isinstance(scans, list) or not scans:
+            return Response({"error": "scans must be a non-empty list."}, status=400)
+        if len(scans) > self.max_batch_size:
+            return Response({"error": f"At most {self.max_batch_size} scans per batch."}, status=400)
+
+        now = timezone.now()
+        oldest_scan = now - datetime.timedelta(seconds=settings.CHECKIN_MAX_SCAN_AGE)
+        expected_event = request.data.get("event")
+        results = []
+        pending = {}  # ticket id -> (result, code, scanned_at)
+
+        # 1. Verify every code without touching the database
+        for scan in scans:
+            qr_code, scanned_at = (scan.get("qr_code"), scan.get("scanned_at")) if isinstance(scan, dict) else (scan, None)
+            result = {"qr_code": qr_code, "result": "invalid"}
+            results.append(result)
+            try:
+                code = parse_ticket_code(qr_code if isinstance(qr_code, str) else "")
+            except InvalidTicketCode:
+                continue
+            if expected_event and str(code.event_id) != str(expected_event):
+                result["result"] = "wrong_event"
+                continue
+            if code.ticket_id in pending:
+                result["result"] = "already_used"  # scanned twice in the same batch
+                continue
+            scanned_at = parse_datetime(scanned_at) if isinstance(scanned_at, str) else None
+            if scanned_at is not None and timezone.is_naive(scanned_at):
+                scanned_at = timezone.make_aware(scanned_at)
+            if scanned_at is None or scanned_at > now:
+                scanned_at = now
+            scanned_at = max(scanned_at, oldest_scan)  # a scanner's buffer is only so old
+            pending[code.ticket_id] = (result, code, scanned_at)
+
+        to_check_in = {}
+        with transaction.atomic():
+            # 2. Resolve all tickets with a single query; the rows stay locked
+            # until the UPDATE so the statuses read here can't change meanwhile
+            tickets = Ticket.objects.select_for_update(of=("self",)).filter(id__in=pending).order_by().values(
+                "id", "event_id", "status", "claimed_at", "user__name", "event__organizer_id"
+            )
+            used_per_event = Counter()  # event id -> tickets checked in
+            for ticket in tickets:
+                result, code, scanned_at = pending[ticket["id"]]
+                if ticket["event_id"] != code.event_id:
+                    continue
+                result["ticket_id"] = ticket["id"]
+                result["user"] = ticket["user__name"]
+                if request.user.role != "admin" and ticket["event__organizer_id"] != request.user.id:
+                    result["result"] = "not_authorized"
+                elif ticket["status"] == "used":
+                    result["result"] = "already_used"
+                elif ticket["status"] != "active":
+                    result["result"] = "cancelled"
+                else:
+                    to_check_in[ticket["id"]] = max(scanned_at, ticket["claimed_at"])  # never before the claim
+                    used_per_event[ticket["event_id"]] += 1
+
+            # 3. Mark every valid ticket as used with one UPDATE
+            if to_check_in:
+                Ticket.objects.filter(id__in=to_check_in, status="active").update(
+                    status="used",
+                    used_at=Case(*[When(id=ticket_id, then=Value(at)) for ticket_id, at in to_check_in.items()]),
+                    checkin_recorded_at=now,
+                    **Ticket.version_bump(),
+                )
+                # Keep the event counters in step (one UPDATE per event, normally one)
+                for event_id, used in used_per_event.items():
+                    Event.objects.filter(id=event_id).update(
+                        tickets_used=F("tickets_used") + used,
+                        **Event.version_bump(),
+                    )
+                    ticket_counters_changed.send(sender=Ticket, event_id=event_id)
+
+        if to_check_in:
+            arrivals = defaultdict(list)  # event id -> check-ins for the live stream
+            for ticket_id, at in to_check_in.items():
+                result, code, _ = pending[ticket_id]
+                result["result"] = "checked_in"
+                result["checked_in_at"] = at
+                arrivals[code.event_id].append({"ticket_id": ticket_id, "user": result["user"], "checked_in_at": at})
+            for event_id, event_arrivals in arrivals.items():
+                publish_checkins(event_id, event_arrivals)
+
+        return Response({
+            "checked_in": len(to_check_in),
+            "results": results,
+        }, status=200)
+
+
+# ------------------------------------
+# LIVE CHECK-IN STREAM (SERVER-SENT EVENTS)
+# ------------------------------------
+CHECKIN_STREAM_ARRIVALS = 10  # latest arrivals sent when a stream opens
+
+
+def _checkin_stream_access(request, event_id):
+    """
+    Authenticate a stream request and check it may watch the event.
+    Returns an error JsonResponse, or None when allowed.
+
+    EventSource cannot set headers, so the JWT may also come as ?token=.
+    """
+    user = None
+    authenticator = JWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+        if result is None and request.GET.get("token"):
+            token = authenticator.get_validated_token(request.GET["token"])
+            result = (authenticator.get_user(token), token)
+        if result is not None:
+            user = result[0]
+    except (InvalidToken, exceptions.AuthenticationFailed):
+        pass
+    if user is None and request.user.is_authenticated:
+        user = request.user  # session login
+    if user is None or not user.is_active:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    organizer_id = Event.objects.filter(id=event_id).values_list("organizer_id", flat=True).first()
+    if organizer_id is None:
+        return JsonResponse({"error": "Event not found."}, status=404)
+    if user.role != "admin" and user.id != organizer_id:
+        return JsonResponse({"error": "You are not authorized to watch check-ins for this event."}, status=403)
+    return None
+
+
+def _checkin_snapshot(event_id):
+    """Current totals and the latest arrivals, sent first on every stream."""
+    totals = Event.objects.filter(id=event_id).values("tickets_claimed", "tickets_used", "tickets_cancelled").first()
+    arrivals = (
+        Ticket.objects.filter(event_id=event_id, status="used")
+        .order_by("-used_at")
+        .values("id", "user__name", "used_at")[:CHECKIN_STREAM_ARRIVALS]
+    )
+    return {
+        "event_id": event_id,
+        "checked_in": totals["tickets_used"],
+        "claimed": totals["tickets_claimed"],
+        "cancelled": totals["tickets_cancelled"],
+        "arrivals": [
+            {"ticket_id": row["id"], "user": row["user__name"], "checked_in_at": row["used_at"]} for row in arrivals
+        ],
+    }
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def checkin_events(event_id, heartbeat=None):
+    """
+    The stream body: a "snapshot" event, then a "checkin" event per
+    published batch of check-ins, with keep-alive comments in between.
+    Subscribing before reading the snapshot means no check-in is missed.
+    """
+    heartbeat = heartbeat or settings.CHECKIN_STREAM_HEARTBEAT
+    subscription = checkin_broker.subscribe(event_id)
+    try:
+        yield _sse("snapshot", await sync_to_async(_checkin_snapshot)(event_id))
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse("checkin", message)
+    finally:
+        checkin_broker.unsubscribe(subscription)
+
+
+async def event_checkin_stream(request, event_id):
+    """
+    GET /api/events/<event_id>/checkins/stream
+    Server-Sent Events feed of an event's check-ins for its organizer (or
+    an admin), replacing repeated polling of the analytics endpoints.
+
+    Events:
+      - snapshot: {"event_id", "checked_in", "claimed", "cancelled", "arrivals": [...]}
+      - checkin:  {"event_id", "delta", "checked_in", "arrivals": [...]}
+
+    Needs an ASGI server (backend/asgi.py): there an open stream holds no
+    worker thread while it waits. Under WSGI (e.g. `manage.py runserver`)
+    Django would collect the endless stream into a list, tying up a
+    thread and never sending a byte, so those requests get a 501.
+    See checkin_stream.py for delivery.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "The check-in stream needs an ASGI server (see README); poll /api/events/<id>/analytics/ instead."},
+            status=501,
+        )
+
+    denied = await sync_to_async(_checkin_stream_access)(request, event_id)
+    if denied is not None:
+        return denied
+
+    response = StreamingHttpResponse(checkin_events(event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # let nginx pass events through unbuffered
+    return response
+
+
 # ------------------------------------
 # Export Tickets as CSV
 # ------------------------------------
+class _Echo:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+
+def _gzip_stream(chunks):
+    """Compress a stream of text chunks into gzip bytes on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 class ExportTicketsCSVView(APIView):
+    """
+    Streams all tickets of an event as a download.
+
+    Rows are read with keyset-chunked .values_list() queries and written
+    as they are produced, so memory use does not grow with the number of
+    tickets.
+
+    Query params (optional):
+      - file_format=csv | ndjson   (default csv)
+      - gzip=1                     (compress the stream)
+    """
     permission_classes = [IsOrganizerOrAdmin]  # only admin or organizer
+    chunk_size = 2000
+    columns = ('user__name', 'event__title', 'status', 'claimed_at', 'used_at')
+
+    def get_chunk(self, event_id, last_id):
+        """The query for the chunk of ticket rows after id `last_id`."""
+        return (
+            Ticket.objects.filter(event_id=event_id, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', *self.columns)[:self.chunk_size]
+        )
+
+    def iter_rows(self, event_id):
+        """Yield ticket rows chunk by chunk, ordered by id (keyset pagination)."""
+        last_id = 0
+        while True:
+            chunk = list(self.get_chunk(event_id, last_id))
+            for row in chunk:
+                yield row[1:]
+            if len(chunk) < self.chunk_size:
+                return
+            last_id = chunk[-1][0]
+
+    def iter_csv(self, event_id):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(['Student', 'Event', 'Status', 'Claimed At', 'Used At'])
+        for name, title, ticket_status, claimed_at, used_at in self.iter_rows(event_id):
+            yield writer.writerow([name, title, ticket_status, claimed_at, used_at or ''])
+
+    def iter_ndjson(self, event_id):
+        keys = ('student', 'event', 'status', 'claimed_at', 'used_at')
+        for row in self.iter_rows(event_id):
+            yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + '\n'
 
     def get(self, request, event_id):
-        tickets = Ticket.objects.filter(event_id=event_id).select_related('user', 'event')
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="event_{event_id}_tickets.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Student', 'Event', 'Status', 'Claimed At', 'Used At'])
-        for t in tickets:
-            writer.writerow([
-                t.user.name,
-                t.event.title,
-                t.status,
-                t.claimed_at,
-                t.used_at or ''
-            ])
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format == 'ndjson':
+            content, content_type, extension = self.iter_ndjson(event_id), 'application/x-ndjson', 'ndjson'
+        else:
+            content, content_type, extension = self.iter_csv(event_id), 'text/csv', 'csv'
+
+        filename = f"event_{event_id}_tickets.{extension}"
+        if request.query_params.get('gzip') in ('1', 'true'):
+            content, content_type, filename = _gzip_stream(content), 'application/gzip', filename + '.gz'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
 # ------------------------------------
@@ -583,21 +1372,22 @@ def student_dashboard(request):
     
     user = request.user
     today = timezone.now().date()
+    fields = request.query_params.get('fields')  # sparse fieldsets for the event payloads (e.g. ?fields=card)
     
     try:
         # get upcoming events (events in future that user has tickets for)
-        upcoming_events = Event.objects.filter(
+        upcoming_events = EventSerializer.optimize_queryset(Event.objects.filter(
             tickets__user=user,
             tickets__status='active',
             date__gte=today
-        ).distinct().order_by('date', 'time')[:5]
+        ), fields).distinct().order_by('date', 'start_time')[:5]
 
         # today's events
-        todays_events = Event.objects.filter(
+        todays_events = EventSerializer.optimize_queryset(Event.objects.filter(
             tickets__user=user,
             tickets__status='active',
             date=today
-        ).distinct().order_by('time')
+        ), fields).distinct().order_by('start_time')
 
         # ticket counts by status
         ticket_counts = Ticket.objects.filter(user=user).aggregate(
@@ -610,18 +1400,10 @@ def student_dashboard(request):
         # recent activity (recently claimed tickets)
         recent_tickets = Ticket.objects.filter(user=user).select_related('event').order_by('-claimed_at')[:5]
 
-        # tecommended events (events similar to ones user has tickets for)
-        user_event_categories = Event.objects.filter(
-            tickets__user=user
-        ).values_list('category', flat=True).distinct()
-
-        recommended_events = Event.objects.filter(
-            category__in=user_event_categories,
-            date__gte=today,
-            is_active=True
-        ).exclude(
-            tickets__user=user  # exclude events user already has tickets for
-        ).order_by('?')[:3] if user_event_categories else Event.objects.none()
+        # recommended events (precomputed per student, see recommendations.py)
+        recommended_events = recommendations.recommended_events(
+            user, EventSerializer.optimize_queryset(Event.objects.all(), fields), count=3
+        )
 
         # build dashboard response
         dashboard_data = {
@@ -641,10 +1423,10 @@ def student_dashboard(request):
                 "active": ticket_counts['active_tickets'],
                 "used": ticket_counts['used_tickets'],
             },
-            "todays_events": EventSerializer(todays_events, many=True).data,
-            "upcoming_events": EventSerializer(upcoming_events, many=True).data,
+            "todays_events": EventSerializer(todays_events, many=True, fields=fields).data,
+            "upcoming_events": EventSerializer(upcoming_events, many=True, fields=fields).data,
             "recent_activity": TicketSerializer(recent_tickets, many=True).data,
-            "recommended_events": EventSerializer(recommended_events, many=True).data
+            "recommended_events": EventSerializer(recommended_events, many=True, fields=fields).data
         }
         
         return Response(dashboard_data)
@@ -664,26 +1446,56 @@ class StudentTicketListView(generics.ListAPIView):
     GET /api/student/tickets
     Returns all tickets for the authenticated student user
     Includes event information and ticket status
+    Pagination (opt-in): ?page_size=<n>&cursor=<cursor>
+    ?expand=event embeds each ticket's event (card fields) from the same joined query
     """
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-claimed_at', '-id')
 
     def get_queryset(self):
         # return only tickets belonging to the current student user
-        return Ticket.objects.filter(user=self.request.user).select_related('event')
+        queryset = Ticket.objects.filter(user=self.request.user)
+        return TicketSerializer.optimize_queryset(queryset, self.request.query_params.get('expand'))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Conditional GET: one aggregate over the student's tickets (and their
+        events) stands in for the whole wallet. The query string is part of
+        the ETag because pages differ.
+        """
+        state = Ticket.objects.filter(user=request.user).order_by().aggregate(
+            count=Count('id'),
+            versions=Sum('version'),
+            event_versions=Sum('event__version'),
+            updated_at=Max('updated_at'),
+            event_updated_at=Max('event__updated_at'),
+        )
+        updated_at = max(filter(None, (state['updated_at'], state['event_updated_at'])), default=None)
+        digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()[:16]
+        etag = _version_etag('tickets', request.user.id, state['count'], state['versions'], state['event_versions'], digest)
+
+        response = _not_modified(request, etag, updated_at)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            _set_validators(response, etag, updated_at)
+        return response
 
 class StudentTicketDetailView(generics.RetrieveAPIView):
     """
     GET /api/student/tickets/{id}
     Returns individual ticket details for the authenticated student
     Includes full event information and ticket status
+    ?expand=event embeds the event (card fields)
     """
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         # students can only access their own tickets
-        return Ticket.objects.filter(user=self.request.user).select_related('event')
+        queryset = Ticket.objects.filter(user=self.request.user)
+        return TicketSerializer.optimize_queryset(queryset, self.request.query_params.get('expand'))
 
     def get_object(self):
         # get the ticket ID from URL
@@ -691,12 +1503,61 @@ class StudentTicketDetailView(generics.RetrieveAPIView):
         
         # error handling
         ticket = get_object_or_404(
-            Ticket, 
+            self.get_queryset(),
             id=ticket_id, 
-            user=self.request.user  # ensure user owns the ticket
         )
         return ticket
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Conditional GET: revalidation only reads the ticket's and its
+        event's versions (the ticket shows the event title).
+        """
+        row = (
+            self.get_queryset().filter(id=kwargs['id'])
+            .values_list('version', 'updated_at', 'event__version', 'event__updated_at').first()
+        )
+        if row is None:
+            raise Http404
+        ticket_version, ticket_updated_at, event_version, event_updated_at = row
+        expand = ','.join(sorted(TicketSerializer.resolve_expand(request.query_params.get('expand'))))
+        etag = _version_etag('ticket', kwargs['id'], ticket_version, event_version, expand)
+        updated_at = max(ticket_updated_at, event_updated_at)
+
+        response = _not_modified(request, etag, updated_at)
+        if response is None:
+            response = Response(self.get_serializer(self.get_object()).data)
+            _set_validators(response, etag, updated_at)
+        return response
+
+class StudentTicketQRView(APIView):
+    """
+    GET /api/student/tickets/{id}/qr.png
+    GET /api/student/tickets/{id}/qr.svg
+    Renders the QR code for one of the authenticated student's tickets on demand.
+    The image only depends on the ticket's verification payload, so it is
+    cached in memory, tagged with a strong ETag and marked immutable.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id, fmt):
+        ticket = get_object_or_404(
+            Ticket.objects.select_related('user', 'event'),
+            id=id,
+            user=request.user  # ensure user owns the ticket
+        )
+        payload = ticket.generate_qr_code_data()
+        etag = quote_etag(hashlib.sha256(f"{fmt}:{payload}".encode()).hexdigest())
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(render_cached(payload, fmt), content_type=IMAGE_CONTENT_TYPES[fmt])
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
 # ------------------------------------
 # GLOBAL ANALYTICS (ADMIN DASHBOARD)
 # ------------------------------------
@@ -710,46 +1571,113 @@ class GlobalAnalyticsView(APIView):
       - Event counts by approval status
       - Ticket statistics
       - Top events and organizer performance
+      - A time series of signups, event creations and ticket claims
+
+    Time series: ?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month
+    (default: the last SERIES_DEFAULT_PERIODS periods of the granularity,
+    monthly). Every period in the range is listed, empty ones with zeros.
+
+    Queries are fixed whatever the data size: one conditional aggregate per
+    table for the headline counts (ticket totals come from the events'
+    counters), one grouped query per table for the series, plus the two
+    top-5 lists.
     """
 
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    SERIES_DEFAULT_PERIODS = {'day': 30, 'week': 12, 'month': 12}
+    SERIES_MAX_PERIODS = 1000
+
+    def get_series_range(self, params):
+        """Return (granularity, first period start, last day) or raise ValidationError."""
+        granularity = params.get('granularity') or DEFAULT_BUCKET
+        if granularity not in DATE_BUCKETS:
+            raise exceptions.ValidationError({"granularity": "Must be one of: day, week, month."})
+
+        end = _date_param(params, 'to') or timezone.localdate()
+        start = _date_param(params, 'from')
+        if start is None:
+            start = bucket_start(end, granularity)
+            for _ in range(self.SERIES_DEFAULT_PERIODS[granularity] - 1):
+                start = bucket_start(start - datetime.timedelta(days=1), granularity)
+        if start > end:
+            raise exceptions.ValidationError({"from": "Must not be after 'to'."})
+        start = bucket_start(start, granularity)
+
+        # Rough upper bound (a month has at least 28 days) keeps the series bounded
+        days_per_period = {'day': 1, 'week': 7, 'month': 28}[granularity]
+        if (end - start).days // days_per_period + 1 > self.SERIES_MAX_PERIODS:
+            raise exceptions.ValidationError({"from": f"At most {self.SERIES_MAX_PERIODS} periods per request."})
+        return granularity, start, end
+
+    def time_series(self, granularity, start, end):
+        """Counts per period for users, events and tickets in [start, end]."""
+        since = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+        until = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+        trunc = DATE_BUCKETS[granularity]
+
+        def counts(queryset, field):
+            rows = (
+                queryset.filter(**{f'{field}__gte': since, f'{field}__lt': until})
+                .annotate(period=trunc(field, output_field=DateField()))
+                .values('period').annotate(count=Count('id')).order_by()
+            )
+            return {row['period']: row['count'] for row in rows}
+
+        users = counts(User.objects.all(), 'created_at')
+        events = counts(Event.objects.all(), 'created_at')
+        tickets = counts(Ticket.objects.all(), 'claimed_at')
+
+        points = []
+        period = start
+        while period <= end:
+            points.append({
+                "period": period.isoformat(),
+                "users": users.get(period, 0),
+                "events": events.get(period, 0),
+                "tickets": tickets.get(period, 0),
+            })
+            period = next_bucket(period, granularity)
+        return {"granularity": granularity, "from": start.isoformat(), "to": end.isoformat(), "points": points}
+
     def get(self, request):
-        # --- USERS ---
-        total_users = User.objects.count()
-        active_users = User.objects.filter(status='active').count()
-        pending_users = User.objects.filter(status='pending').count()
-        suspended_users = User.objects.filter(status='suspended').count()
-
-        students = User.objects.filter(role='student').count()
-        organizers = User.objects.filter(role='organizer').count()
-        admins = User.objects.filter(role='admin').count()
-
-        # --- EVENTS ---
-        total_events = Event.objects.count()
-        approved_events = Event.objects.filter(status='approved').count()
-        pending_events = Event.objects.filter(status='pending').count()
-        rejected_events = Event.objects.filter(status='rejected').count()
+        granularity, start, end = self.get_series_range(request.query_params)
+
+        # --- USERS (one query) ---
+        users = User.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            pending=Count('id', filter=Q(status='pending')),
+            suspended=Count('id', filter=Q(status='suspended')),
+            students=Count('id', filter=Q(role='student')),
+            organizers=Count('id', filter=Q(role='organizer')),
+            admins=Count('id', filter=Q(role='admin')),
+        )
+
+        # --- EVENTS AND TICKET TOTALS (one query, tickets from the counters) ---
+        events = Event.objects.aggregate(
+            total=Count('id'),
+            approved=Count('id', filter=Q(status='approved')),
+            pending=Count('id', filter=Q(status='pending')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            tickets=Coalesce(Sum('tickets_claimed'), 0),
+            used=Coalesce(Sum('tickets_used'), 0),
+            cancelled=Coalesce(Sum('tickets_cancelled'), 0),
+        )
 
         top_events = (
-            Event.objects.annotate(ticket_count=Count('tickets'))
+            Event.objects.annotate(ticket_count=F('tickets_claimed'))
             .order_by('-ticket_count')[:5]
             .values('id', 'title', 'ticket_count', 'category', 'organization')
         )
 
-        # --- TICKETS ---
-        total_tickets = Ticket.objects.count()
-        active_tickets = Ticket.objects.filter(status='active').count()
-        used_tickets = Ticket.objects.filter(status='used').count()
-        cancelled_tickets = Ticket.objects.filter(status='cancelled').count()
-
         # --- ORGANIZER PERFORMANCE ---
         organizer_performance = (
             User.objects.filter(role='organizer')
             .annotate(
                 total_events=Count('events'),
                 approved_event_count=Count('events', filter=Q(events__status='approved')),  # ✅ fixed
-                total_tickets=Count('events__tickets'),
+                total_tickets=Coalesce(Sum('events__tickets_claimed'), 0),
             )
             .values('id', 'name', 'email', 'total_events', 'approved_event_count', 'total_tickets')
             .order_by('-approved_event_count')[:5]
@@ -757,117 +1685,182 @@ class GlobalAnalyticsView(APIView):
 
         data = {
             "users": {
-                "total": total_users,
-                "active": active_users,
-                "pending": pending_users,
-                "suspended": suspended_users,
+                "total": users['total'],
+                "active": users['active'],
+                "pending": users['pending'],
+                "suspended": users['suspended'],
                 "by_role": {
-                    "students": students,
-                    "organizers": organizers,
-                    "admins": admins,
+                    "students": users['students'],
+                    "organizers": users['organizers'],
+                    "admins": users['admins'],
                 },
             },
             "events": {
-                "total": total_events,
-                "approved": approved_events,
-                "pending": pending_events,
-                "rejected": rejected_events,
+                "total": events['total'],
+                "approved": events['approved'],
+                "pending": events['pending'],
+                "rejected": events['rejected'],
                 "top_events": list(top_events),
             },
             "tickets": {
-                "total": total_tickets,
-                "active": active_tickets,
-                "used": used_tickets,
-                "cancelled": cancelled_tickets,
+                "total": events['tickets'],
+                "active": events['tickets'] - events['used'] - events['cancelled'],
+                "used": events['used'],
+                "cancelled": events['cancelled'],
             },
             "organizer_performance": list(organizer_performance),
+            "time_series": self.time_series(granularity, start, end),
             "generated_at": timezone.now(),
         }
 
-        # ------------------------------------
-        # MONTHLY GRAPH DATA (USERS / EVENTS / TICKETS)
-        # ------------------------------------
-        # Users created per month
-        users_by_month = (
-            User.objects.annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
+        return Response(data, status=status.HTTP_200_OK)
 
-        # Events created per month
-        events_by_month = (
-            Event.objects.annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
 
-        # Tickets claimed per month
-        tickets_by_month = (
-            Ticket.objects.annotate(month=TruncMonth('claimed_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
+# ------------------------------------
+# METRIC ROLLUPS (ADMIN CHARTS)
+# ------------------------------------
+class MetricSeriesView(APIView):
+    """
+    GET /api/analytics/metrics/?metric=signups,checkins&from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=hour|day|week|month
+    Platform metric counts per period, read from the hourly/daily rollup
+    tables (see rollups.py) instead of the raw tables.
 
-        # Collect all months present in any dataset (formatted as 'May', 'Jun', etc.)
-        all_months = sorted(list({
-            *(u['month'].strftime("%b") for u in users_by_month),
-            *(e['month'].strftime("%b") for e in events_by_month),
-            *(t['month'].strftime("%b") for t in tickets_by_month),
-        }))
-
-        monthly_graph = []
-        for m in all_months:
-            monthly_graph.append({
-                "month": m,
-                "users": next((u['count'] for u in users_by_month if u['month'].strftime("%b") == m), 0),
-                "events": next((e['count'] for e in events_by_month if e['month'].strftime("%b") == m), 0),
-                "tickets": next((t['count'] for t in tickets_by_month if t['month'].strftime("%b") == m), 0),
-            })
+    - metric: any of signups, events_created, tickets_claimed, checkins (default all)
+    - granularity: default day; the range defaults to the last 30 days
+    - processed_through: rows after this time are not counted yet
 
-        # Attach graph data to existing payload
-        data["monthly_graph"] = monthly_graph
+    Access: Admin users only.
+    """
 
-        return Response(data, status=status.HTTP_200_OK)
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    MAX_PERIODS = 1000
+
+    def get(self, request):
+        params = request.query_params
+        metrics = [name.strip() for name in params.get('metric', '').split(',') if name.strip()]
+        metrics = metrics or list(rollups.METRICS)
+        unknown = [name for name in metrics if name not in rollups.METRICS]
+        if unknown:
+            raise exceptions.ValidationError({"metric": f"Unknown metric(s): {', '.join(unknown)}."})
+
+        granularity = params.get('granularity') or 'day'
+        if granularity not in rollups.GRANULARITIES:
+            raise exceptions.ValidationError({"granularity": "Must be one of: hour, day, week, month."})
+
+        end = _date_param(params, 'to') or timezone.localdate()
+        start = _date_param(params, 'from') or end - datetime.timedelta(days=29)
+        if start > end:
+            raise exceptions.ValidationError({"from": "Must not be after 'to'."})
+        days = (end - start).days + 1
+        periods = days * 24 if granularity == 'hour' else days // {'day': 1, 'week': 7, 'month': 28}[granularity]
+        if periods > self.MAX_PERIODS:
+            raise exceptions.ValidationError({"from": f"At most {self.MAX_PERIODS} periods per request."})
+
+        return Response({
+            "metrics": metrics,
+            "granularity": granularity,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "processed_through": rollups.processed_through(metrics),
+            "points": rollups.series(metrics, start, end, granularity),
+        })
+
+# ------------------------------------
+# ORGANIZER ANALYTICS (ALL MY EVENTS)
+# ------------------------------------
+class OrganizerAnalyticsView(APIView):
+    """
+    GET /api/organizer/analytics/
+    Ticket and rating figures for every event of the requesting
+    organizer, plus totals, in one request.
 
+    Returns:
+      - events: [{id, title, date, start_time, end_time, status, claimed,
+        active, used, cancelled, capacity_left, attendance_rate,
+        rating_count, average_rating}]
+      - totals: the same counts summed, with the number of events and the
+        overall attendance rate and average rating
+
+    Built from the counters stored on the event rows (one query) and
+    cached per organizer until a ticket or rating changes (see
+    organizer_analytics.py). Attendee lists stay in /api/tickets/data/<id>/.
+    """
+    permission_classes = [IsOrganizer]
+
+    def get(self, request):
+        return Response(organizer_analytics.get(request.user.id), status=status.HTTP_200_OK)
 
 # ------------------------------------
 # EVENT TICKETS DATA VIEW
 # ------------------------------------
 class EventTicketsDataView(APIView):
+    """
+    Returns the attendee list and ticket summary of one event.
+
+    Query params (optional):
+      - status=active | used | cancelled   (filter the attendee rows)
+      - page_size=<n>, cursor=<next_cursor> (cursor pagination; without
+        them all rows are returned)
+
+    The summary is read from the event's ticket counters, and the rows
+    are a single .values() projection, so the view costs two queries
+    whatever the number of attendees.
+    """
 
     permission_classes = [IsOrganizerOrAdmin]  # only organizer or admin
 
+    def get_tickets(self, event_id, ticket_status=None):
+        """The attendee rows of an event, optionally of one ticket status."""
+        tickets = Ticket.objects.filter(event_id=event_id).values(
+            'id', 'status', 'claimed_at', 'used_at',
+            student_name=F('user__name'),
+            student_email=F('user__email'),
+        )
+        if ticket_status:
+            tickets = tickets.filter(status=ticket_status)
+        return tickets
+
     def get(self, request, event_id):
-        tickets = Ticket.objects.filter(event_id=event_id).select_related('user', 'event')
-
-        # Build JSON data
-        ticket_data = []
-        for t in tickets:
-            ticket_data.append({
-                "student_name": t.user.name,
-                "student_email": t.user.email,
-                "event_title": t.event.title,
-                "status": t.status,
-                "claimed_at": t.claimed_at,
-                "used_at": t.used_at or None,
-            })
+        event = get_object_or_404(
+            Event.objects.only('id', 'title', 'capacity', 'organizer_id', *Event.COUNTER_FIELDS),
+            id=event_id,
+        )
+        if not (request.user.role == "admin" or request.user.id == event.organizer_id):
+            return Response({"error": "You are not authorized to view this event's tickets."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        ticket_status = request.query_params.get('status')
+        if ticket_status and ticket_status not in dict(Ticket.STATUS_CHOICES):
+            return Response({"error": "Invalid status. Use active/used/cancelled."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        tickets = self.get_tickets(event_id, ticket_status)
 
+        next_cursor = previous_cursor = None
+        if 'cursor' in request.query_params or 'page_size' in request.query_params:
+            rows, next_cursor, previous_cursor = paginate_keyset(
+                tickets, ('id',), request.query_params.get('cursor'), get_page_size(request)
+            )
+        else:
+            rows = list(tickets.order_by('id'))
+
+        for row in rows:
+            row["event_title"] = event.title
 
         summary = {
-            "total_tickets": tickets.count(),
-            "claimed_tickets": tickets.filter(status__in=['active', 'used']).count(),
-            "used_tickets": tickets.filter(status='used').count(),
-            "capacity_left": t.event.capacity - tickets.count() if t.event.capacity else 0,
+            "total_tickets": event.tickets_claimed,
+            "claimed_tickets": event.tickets_claimed - event.tickets_cancelled,
+            "used_tickets": event.tickets_used,
+            "capacity_left": event.capacity,  # capacity is decremented as tickets are claimed
         }
 
         return Response({
             "event_id": event_id,
-            "event_title": tickets.first().event.title if tickets.exists() else None,
+            "event_title": event.title,
             "summary": summary,
-            "tickets": ticket_data
+            "tickets": rows,
+            "next_cursor": next_cursor,
+            "previous_cursor": previous_cursor,
         }, status=200)
 
 # ------------------------------------
@@ -962,15 +1955,41 @@ class EventFeedbackView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+# ------------------------------------
+# EVENT RATINGS (MATERIALIZED AGGREGATES)
+# ------------------------------------
+class EventRatingsView(APIView):
+    """
+    GET /api/events/<event_id>/ratings/
+    Rating summary of an event: count, average and 1-5 star histogram.
+    Reads the aggregates stored on the event (one row, no feedback scan).
+
+    Access:
+    - Public
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, event_id):
+        event = get_object_or_404(Event.objects.only('id', *Event.RATING_FIELDS), id=event_id)
+        return Response({
+            "event": event.id,
+            "count": event.rating_count,
+            "average": event.average_rating(),
+            "histogram": event.rating_histogram(),
+        }, status=status.HTTP_200_OK)
+
 # ------------------------------------
 # MY FEEDBACK LIST API
 # ------------------------------------
 class MyFeedbackListView(generics.ListAPIView):
     """
     Get all feedback submitted by the current user
+    Pagination (opt-in): ?page_size=<n>&cursor=<cursor>
     """
     serializer_class = EventFeedbackSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         return EventFeedback.objects.filter(user=self.request.user).select_related('event')
@@ -1014,9 +2033,16 @@ class OrganizerFeedbackListView(generics.ListAPIView):
     Query params supported (optional):
       - order=newest | oldest    (default newest)
       - event=<event_id>         (filter by a specific event)
+      - page_size, cursor        (opt-in cursor pagination)
     """
     serializer_class = EventFeedbackSerializer
     permission_classes = [IsAuthenticated]  # or [IsOrganizer] if you want to restrict to organizers only
+    pagination_class = KeysetPagination
+
+    def get_cursor_ordering(self):
+        if self.request.query_params.get('order') == 'oldest':
+            return ('created_at', 'id')
+        return ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
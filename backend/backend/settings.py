@@ -173,6 +173,54 @@ CORS_ALLOW_CREDENTIALS = True  # Allow sending cookies/credentials across origin
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# -----------------------------------------------
+# TICKET QR CODES
+# -----------------------------------------------
+QR_STORE_IMAGES = False  # Also persist a PNG per ticket (rendered by `manage.py qr_worker`)
+QR_CACHE_SIZE = 1024  # Rendered QR images kept in memory per process
+QR_BOX_SIZE = 8  # Pixels per QR module
+# Pre-signing "ticket_<id>_user_<id>_event_<id>" codes are unsigned and forgeable.
+# Only turn this on for a migration window, ideally with a cutoff date ("YYYY-MM-DD").
+QR_ACCEPT_LEGACY_CODES = False
+QR_LEGACY_CODES_UNTIL = None  # Last day legacy codes are accepted when enabled
+
+# -----------------------------------------------
+# BATCH CHECK-IN
+# -----------------------------------------------
+CHECKIN_MAX_SCAN_AGE = 24 * 60 * 60  # Seconds; older client scan times are clamped to this age
+
+# -----------------------------------------------
+# EVENT LISTING CACHE
+# -----------------------------------------------
+# Uses the default cache (per-process LocMemCache unless CACHES is set).
+# With several workers, configure a shared backend (Redis/Memcached) so an
+# invalidation in one worker reaches the others.
+EVENT_LIST_CACHE_TIMEOUT = 60  # Seconds; bounds staleness of ticket counters in the listing
+EVENT_FACETS_TIMEOUT = 300  # Seconds before the per-process facet counts are recomputed
+ORGANIZER_ANALYTICS_CACHE_TIMEOUT = 300  # Seconds; entries are also dropped when tickets or ratings change
+
+# -----------------------------------------------
+# METRIC ROLLUPS
+# -----------------------------------------------
+# `manage.py rollup_metrics` counts rows up to this many seconds before now,
+# leaving slow transactions time to commit before their rows are passed.
+METRIC_ROLLUP_LAG = 120
+
+# -----------------------------------------------
+# EVENT RECOMMENDATIONS
+# -----------------------------------------------
+# `manage.py build_recommendations` (full, nightly) and `--claims-only`
+# (every few minutes) count claims up to this many seconds before now.
+RECOMMENDATION_CLAIM_LAG = 120
+
+# -----------------------------------------------
+# LIVE CHECK-IN STREAM
+# -----------------------------------------------
+# In-process delivery only; with several workers, use a fan-out class whose
+# publish() goes through a shared channel (see api/checkin_stream.py).
+CHECKIN_STREAM_FANOUT = 'api.checkin_stream.LocalFanout'
+CHECKIN_STREAM_HEARTBEAT = 15  # Seconds between keep-alive comments on an idle stream
+
 # Local overrides (last)
 try:
     from .local_settings import *
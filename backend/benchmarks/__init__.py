@@ -0,0 +1,13 @@
+"""
+benchmarks
+---------
+Purpose:
+Stand-alone load scripts for the hot API paths.
+
+Each script boots Django, creates a throwaway test database (the same
+way `python manage.py test` does), seeds it, runs its workload and
+prints the measurements. The development database is never touched.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_claims --students 500 --capacity 200
+"""
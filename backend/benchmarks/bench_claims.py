@@ -0,0 +1,91 @@
+"""
+bench_claims.py
+---------
+Purpose:
+Concurrent ticket-claim benchmark for POST /api/tickets/claim/.
+
+Simulates a flash release: many students claim the same event at once
+from a pool of worker threads. Reports claims/sec and verifies that no
+ticket was issued beyond the event's capacity.
+
+Usage (from backend/):
+    python -m benchmarks.bench_claims --students 500 --capacity 200 --workers 32
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .harness import setup_django, test_database, timed
+
+
+def run(students, capacity, workers):
+    from django.db import connections
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from api.models import Event, Ticket, User
+
+    organizer = User.objects.create_user(
+        email='bench-org@test.com', password='password123', name='bench-org',
+        role='organizer', status='active',
+    )
+    event = Event.objects.create(
+        title='Flash Release', date=timezone.now().date(),
+        start_time=timezone.now().time(), end_time=timezone.now().time(),
+        location='Main Hall', capacity=capacity, status='approved',
+        is_approved=True, organizer=organizer,
+    )
+    User.objects.bulk_create([
+        User(email=f'bench-{i}@test.com', name=f'bench-{i}', role='student', status='active', is_active=True)
+        for i in range(students)
+    ])
+    student_ids = list(User.objects.filter(role='student').values_list('id', flat=True))
+
+    def claim(user_id):
+        try:
+            client = APIClient()
+            client.force_authenticate(user=User(id=user_id, role='student', status='active'))
+            return client.post('/api/tickets/claim/', {'event': event.id}, format='json').status_code
+        finally:
+            connections.close_all()
+
+    results = {}
+    with timed(results, 'elapsed'):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            codes = list(pool.map(claim, student_ids))
+
+    issued = Ticket.objects.filter(event=event).count()
+    event.refresh_from_db()
+    accepted = codes.count(201)
+    rejected = codes.count(400)
+
+    print(f"students={students} capacity={capacity} workers={workers}")
+    print(f"elapsed:         {results['elapsed']:.3f}s")
+    print(f"attempts/sec:    {len(codes) / results['elapsed']:.1f}")
+    print(f"claims/sec:      {accepted / results['elapsed']:.1f}")
+    print(f"accepted:        {accepted}")
+    print(f"rejected:        {rejected}")
+    print(f"other responses: {len(codes) - accepted - rejected}")
+    print(f"tickets issued:  {issued}")
+    print(f"remaining seats: {event.capacity}")
+
+    oversold = max(issued - capacity, 0)
+    print(f"oversold:        {oversold}")
+    return oversold == 0 and issued == accepted and event.capacity == capacity - issued
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--capacity', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        ok = run(args.students, args.capacity, args.workers)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+bench_export.py
+---------
+Purpose:
+Memory benchmark for GET /api/tickets/export/<event_id>/.
+
+Seeds one event with a growing number of tickets (up to 1M by default)
+and, at each size, consumes the streaming export while tracking the
+peak Python heap with tracemalloc. For comparison it also measures the
+previous approach (whole CSV built in an HttpResponse from model
+instances) unless --skip-buffered is given.
+
+A flat "streaming peak" column across sizes shows memory does not grow
+with the ticket count.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export --sizes 10000 100000 1000000
+"""
+
+import argparse
+import csv
+import tracemalloc
+
+from .harness import setup_django, test_database, timed
+
+
+def seed(event, start, stop, batch=10000):
+    """Add students start..stop-1 and one ticket each (bypassing Ticket.save)."""
+    from api.models import Ticket, User
+
+    for offset in range(start, stop, batch):
+        end = min(offset + batch, stop)
+        User.objects.bulk_create([
+            User(email=f'bench-{i}@test.com', name=f'bench-{i}', role='student', status='active', is_active=True)
+            for i in range(offset, end)
+        ])
+        user_ids = User.objects.filter(email__in=[f'bench-{i}@test.com' for i in range(offset, end)]).values_list('id', flat=True)
+        Ticket.objects.bulk_create([Ticket(event=event, user_id=user_id, qr_status='ready') for user_id in user_ids])
+
+
+def measure(func):
+    """Return (peak bytes, seconds, result) for func()."""
+    results = {}
+    tracemalloc.start()
+    with timed(results, 'elapsed'):
+        value = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, results['elapsed'], value
+
+
+def streaming_export(client, event_id, query=''):
+    def run():
+        response = client.get(f'/api/tickets/export/{event_id}/{query}')
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return run
+
+
+def buffered_export(event_id):
+    """The pre-streaming implementation, kept here as a baseline."""
+    from django.http import HttpResponse
+    from api.models import Ticket
+
+    def run():
+        tickets = Ticket.objects.filter(event_id=event_id).select_related('user', 'event')
+        response = HttpResponse(content_type='text/csv')
+        writer = csv.writer(response)
+        writer.writerow(['Student', 'Event', 'Status', 'Claimed At', 'Used At'])
+        for t in tickets:
+            writer.writerow([t.user.name, t.event.title, t.status, t.claimed_at, t.used_at or ''])
+        return len(response.content)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--skip-buffered', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from api.models import Event, User
+
+        organizer = User.objects.create_user(
+            email='bench-org@test.com', password='password123', name='bench-org',
+            role='organizer', status='active',
+        )
+        event = Event.objects.create(
+            title='Export Bench', date=timezone.now().date(),
+            start_time=timezone.now().time(), end_time=timezone.now().time(),
+            location='Main Hall', capacity=0, status='approved', organizer=organizer,
+        )
+        client = APIClient()
+        client.force_authenticate(user=organizer)
+
+        print(f"{'tickets':>10} {'streaming peak':>15} {'gzip ndjson peak':>17} {'buffered peak':>14} {'stream time':>12}")
+        seeded = 0
+        for size in sorted(args.sizes):
+            if not seeded:
+                # Warm up imports and caches so they don't count as export memory
+                seed(event, 0, 1)
+                streaming_export(client, event.id)()
+                seeded = 1
+            seed(event, seeded, size)
+            seeded = size
+
+            stream_peak, stream_time, _ = measure(streaming_export(client, event.id))
+            gzip_peak, _, _ = measure(streaming_export(client, event.id, '?file_format=ndjson&gzip=1'))
+            if args.skip_buffered:
+                buffered = '-'
+            else:
+                buffered_peak, _, _ = measure(buffered_export(event.id))
+                buffered = f"{buffered_peak / 2**20:.1f} MiB"
+
+            print(f"{size:>10} {stream_peak / 2**20:>11.1f} MiB {gzip_peak / 2**20:>13.1f} MiB {buffered:>14} {stream_time:>11.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+bench_qr_render.py
+---------
+Purpose:
+Throughput benchmark for background QR rendering (api/qr.py).
+
+Seeds pending tickets, then drains the queue with render_pending_qr_codes()
+once in-process and once per requested process-pool size. Reports
+tickets/sec for each run.
+
+Usage (from backend/):
+    python -m benchmarks.bench_qr_render --tickets 2000 --batch-size 200 --workers 1 2 4
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from .harness import setup_django, test_database, timed
+
+
+def seed(tickets):
+    from django.utils import timezone
+    from api.models import Event, Ticket, User
+
+    organizer = User.objects.create_user(
+        email='bench-org@test.com', password='password123', name='bench-org',
+        role='organizer', status='active',
+    )
+    event = Event.objects.create(
+        title='QR Bench', date=timezone.now().date(),
+        start_time=timezone.now().time(), end_time=timezone.now().time(),
+        location='Main Hall', capacity=0, status='approved',
+        is_approved=True, organizer=organizer,
+    )
+    User.objects.bulk_create([
+        User(email=f'bench-{i}@test.com', name=f'bench-{i}', role='student', status='active', is_active=True)
+        for i in range(tickets)
+    ])
+    students = User.objects.filter(role='student')
+    # bulk_create bypasses Ticket.save(), so no capacity is consumed here
+    Ticket.objects.bulk_create([Ticket(event=event, user=student) for student in students])
+
+
+def drain(batch_size, pool):
+    from api.models import Ticket
+    from api.qr import render_pending_qr_codes
+
+    Ticket.objects.update(qr_status='pending', qr_code=None)
+    results = {}
+    rendered = 0
+    with timed(results, 'elapsed'):
+        while True:
+            batch = render_pending_qr_codes(batch_size, pool=pool)
+            if not batch:
+                break
+            rendered += batch
+    return rendered, results['elapsed']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        seed(args.tickets)
+        print(f"tickets={args.tickets} batch_size={args.batch_size}")
+
+        rendered, elapsed = drain(args.batch_size, pool=None)
+        print(f"in-process:     {rendered / elapsed:8.1f} tickets/sec ({elapsed:.2f}s)")
+
+        for workers in args.workers:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered, elapsed = drain(args.batch_size, pool=pool)
+            print(f"{workers:2d} process(es): {rendered / elapsed:8.1f} tickets/sec ({elapsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
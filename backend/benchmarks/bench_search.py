@@ -0,0 +1,104 @@
+"""
+bench_search.py
+---------
+Purpose:
+Latency benchmark for event search: ranked full-text search
+(api/search.py) versus the icontains filters used by the event list.
+
+Seeds approved events with generated titles/descriptions, then runs the
+same query terms through both paths and reports median latency. On
+SQLite the in-process fallback index is used, and its one-off build
+time is reported separately; on MySQL the FULLTEXT index is used.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search --events 100000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from .harness import setup_django, test_database, timed
+
+WORDS = (
+    "robotics hackathon career fair jazz concert yoga workshop python data science "
+    "startup pitch chess club film night debate poetry reading volunteering soccer "
+    "basketball networking alumni research seminar lecture gaming tournament art "
+    "exhibition photography hiking climbing coffee chat mentoring cooking dance salsa"
+).split()
+RARE_WORDS = "quantum origami astrophysics".split()  # each in ~0.1% of events
+QUERIES = ["robotics", "jazz concert", "data science seminar", "quantum", "origami astrophysics", "zeppelin"]
+
+
+def seed(count, batch=5000):
+    from django.utils import timezone
+    from api.models import Event, User
+
+    rng = random.Random(341)
+    organizer = User.objects.create_user(
+        email='bench-org@test.com', password='password123', name='bench-org',
+        role='organizer', status='active',
+    )
+    now = timezone.now()
+    for start in range(0, count, batch):
+        Event.objects.bulk_create([
+            Event(
+                title=' '.join(rng.sample(WORDS, 3)).title(),
+                description=' '.join(rng.choices(WORDS, k=30) + rng.choices(RARE_WORDS, k=rng.random() < 0.003)),
+                location=f"Room {rng.randint(1, 900)}",
+                date=now.date(), start_time=now.time(), end_time=now.time(),
+                status='approved', is_approved=True, capacity=100, organizer=organizer,
+            )
+            for _ in range(start, min(start + batch, count))
+        ])
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.db import connection
+        from django.db.models import Q
+        from api.models import Event
+        from api.search import get_index, search_events
+
+        seed(args.events)
+        visible = Event.objects.filter(status='approved')
+        print(f"events={args.events} backend={connection.vendor}")
+
+        if connection.vendor != 'mysql':
+            results = {}
+            with timed(results, 'build'):
+                get_index()
+            print(f"fallback index build: {results['build']:.2f}s (once per process)")
+
+        def icontains(query):
+            condition = Q()
+            for term in query.split():
+                condition |= Q(title__icontains=term) | Q(description__icontains=term) | Q(location__icontains=term)
+            return list(visible.filter(condition)[:args.limit])
+
+        print(f"{'query':<24} {'icontains':>12} {'ranked search':>14}")
+        for query in QUERIES:
+            baseline = median_ms(lambda: icontains(query), args.repeat)
+            ranked = median_ms(lambda: search_events(visible, query, args.limit), args.repeat)
+            print(f"{query:<24} {baseline:>9.1f} ms {ranked:>11.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
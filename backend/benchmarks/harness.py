@@ -0,0 +1,63 @@
+"""
+harness.py
+---------
+Purpose:
+Shared setup for the benchmark scripts.
+
+- setup_django(): configure settings and load the apps.
+- test_database(): create a throwaway test database for the duration of a run.
+- timed(): measure the wall-clock time of a block.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Configure Django the same way manage.py does."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+    # Expected 4xx responses (sold out, duplicates) would otherwise flood the output
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+@contextmanager
+def test_database():
+    """
+    Create a fresh test database and media directory, then destroy them.
+
+    SQLite's in-memory test database cannot take concurrent writers, so a
+    temporary file is used instead when the project runs on SQLite.
+    """
+    from django.conf import settings
+    from django.db import connection, connections
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    db_settings = settings.DATABASES['default']
+    if db_settings['ENGINE'].endswith('sqlite3'):
+        db_settings.setdefault('TEST', {})
+        db_settings['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+    settings.MEDIA_ROOT = tempfile.mkdtemp()
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def timed(results, key):
+    """Store the elapsed seconds of the wrapped block in results[key]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[key] = time.perf_counter() - start
@@ -22,38 +22,20 @@ function OrganizerAnalytics() {
   useEffect(() => {
     async function fetchEventAnalytics() {
       try {
-        const res = await api.get("/api/events/");
-        const eventsData = res.data;
+        // One request for every event's figures and the organizer totals
+        const res = await api.get("/api/organizer/analytics/");
+        const { events: eventsData, totals } = res.data;
 
-        const eventsWithAnalytics = await Promise.all(
-          eventsData.map(async (event) => {
-            try {
-              const analyticsRes = await api.get(`/api/tickets/data/${event.id}/`);
-              return { ...event, analytics: analyticsRes.data };
-            } catch (err) {
-              console.error("Error fetching analytics for event:", event.id, err);
-              return { ...event, analytics: { tickets: [], summary: { total_tickets: 0, used_tickets: 0, capacity_left: 0 } } };
-            }
-          })
-        );
-
-        setEvents(eventsWithAnalytics);
-        setFilteredEvents(eventsWithAnalytics);
-        
-        // Calculate overall stats
-        const stats = eventsWithAnalytics.reduce((acc, event) => {
-          const tickets = event.analytics?.tickets || [];
-          return {
-            totalEvents: acc.totalEvents + 1,
-            totalTickets: acc.totalTickets + tickets.length,
-            checkedInTickets: acc.checkedInTickets + tickets.filter(t => t.status === "used").length,
-            totalCapacity: acc.totalCapacity + (event.capacity || 0)
-          };
-        }, { totalEvents: 0, totalTickets: 0, checkedInTickets: 0, totalCapacity: 0 });
-        
-        setOverallStats(stats);
+        setEvents(eventsData);
+        setFilteredEvents(eventsData);
+        setOverallStats({
+          totalEvents: totals.events,
+          totalTickets: totals.claimed,
+          checkedInTickets: totals.used,
+          totalCapacity: totals.capacity_left
+        });
       } catch (err) {
-        console.error("Error fetching events:", err);
+        console.error("Error fetching analytics:", err);
       } finally {
         setLoading(false);
       }
@@ -72,20 +54,24 @@ function OrganizerAnalytics() {
     } else if (filter === "title") {
       filtered = filtered.sort((a, b) => a.title.localeCompare(b.title));
     } else if (filter === "used") {
-      filtered = filtered.sort(
-        (a, b) => (b.analytics?.tickets.filter(t => t.status === "used").length || 0) -
-                  (a.analytics?.tickets.filter(t => t.status === "used").length || 0)
-      );
+      filtered = filtered.sort((a, b) => b.used - a.used);
     } else if (filter === "capacity") {
-      filtered = filtered.sort((a, b) => (b.capacity || 0) - (a.capacity || 0));
+      filtered = filtered.sort((a, b) => b.capacity_left - a.capacity_left);
     }
 
     setFilteredEvents(filtered);
   }, [search, filter, events]);
 
-  const openModal = (event) => {
-    setSelectedEvent(event);
+  const openModal = async (event) => {
+    setSelectedEvent({ ...event, tickets: [] });
     setModalOpen(true);
+    // Attendee lists are only loaded for the event being viewed
+    try {
+      const res = await api.get(`/api/tickets/data/${event.id}/`);
+      setSelectedEvent({ ...event, tickets: res.data.tickets });
+    } catch (err) {
+      console.error("Error fetching attendees for event:", event.id, err);
+    }
   };
 
   const closeModal = () => {
@@ -168,12 +154,11 @@ function OrganizerAnalytics() {
           </div>
         ) : (
           filteredEvents.map(event => {
-            const tickets = event.analytics?.tickets || [];
-            const totalTickets = tickets.length;
-            const usedTickets = tickets.filter(t => t.status === "used").length;
-            const claimedTickets = tickets.filter(t => t.status === "active").length;
-            const availableTickets = event.capacity || 0;
-            const attendanceRate = totalTickets > 0 ? ((usedTickets / totalTickets) * 100).toFixed(1) : 0;
+            const totalTickets = event.claimed;
+            const usedTickets = event.used;
+            const claimedTickets = event.active;
+            const availableTickets = event.capacity_left;
+            const attendanceRate = event.attendance_rate.toFixed(1);
 
             return (
               <div key={event.id} className="analytics-card">
@@ -194,6 +179,12 @@ function OrganizerAnalytics() {
                       <span className="detail-label">Attendance Rate</span>
                       <span className="detail-value highlight">{attendanceRate}%</span>
                     </div>
+                    <div className="detail-row">
+                      <span className="detail-label">Average Rating</span>
+                      <span className="detail-value">
+                        {event.average_rating !== null ? `${event.average_rating} / 5 (${event.rating_count})` : "No ratings yet"}
+                      </span>
+                    </div>
                     <div className="stats-grid">
                       <div className="mini-stat">
                         <span className="mini-stat-value">{totalTickets}</span>
@@ -235,9 +226,9 @@ function OrganizerAnalytics() {
         {selectedEvent && (
           <div className="attendee-modal-content">
             <div className="attendee-section">
-              <h4>✅ Checked-in Attendees ({selectedEvent.analytics.tickets.filter(t => t.status === "used").length})</h4>
+              <h4>✅ Checked-in Attendees ({selectedEvent.tickets.filter(t => t.status === "used").length})</h4>
               <div className="attendee-list">
-                {selectedEvent.analytics.tickets
+                {selectedEvent.tickets
                   .filter(t => t.status === "used")
                   .map((t, index) => (
                     <div key={`${t.student_email}-${t.event_title}-used`} className="attendee-item">
@@ -252,9 +243,9 @@ function OrganizerAnalytics() {
             </div>
 
             <div className="attendee-section">
-              <h4>🎫 Claimed Tickets ({selectedEvent.analytics.tickets.filter(t => t.status === "active").length})</h4>
+              <h4>🎫 Claimed Tickets ({selectedEvent.tickets.filter(t => t.status === "active").length})</h4>
               <div className="attendee-list">
-                {selectedEvent.analytics.tickets
+                {selectedEvent.tickets
                   .filter(t => t.status === "active")
                   .map((t, index) => (
                     <div key={`${t.student_email}-${t.event_title}`} className="attendee-item">
@@ -3,6 +3,29 @@ import api from "../api";
 import "../styles/PageStyle.css";
 import { Link } from "react-router-dom"; 
 
+// QR images are rendered on demand by an authenticated endpoint,
+// so they are fetched through the api client rather than a plain <img src>.
+function TicketQR({ ticket }) {
+  const [src, setSrc] = useState(null);
+
+  useEffect(() => {
+    if (!ticket.qr_ready) return;
+    let objectUrl;
+    api.get(`/api/student/tickets/${ticket.id}/qr.png`, { responseType: "blob" })
+      .then((res) => {
+        objectUrl = URL.createObjectURL(res.data);
+        setSrc(objectUrl);
+      })
+      .catch((err) => console.error("Error fetching QR code:", err));
+    return () => objectUrl && URL.revokeObjectURL(objectUrl);
+  }, [ticket.id, ticket.qr_ready]);
+
+  if (!ticket.qr_ready || !src) {
+    return <p>QR code is being generated…</p>;
+  }
+  return <img src={src} alt="QR Code" />;
+}
+
 function StudentTickets() {
   const [tickets, setTickets] = useState([]);
   const [filteredTickets, setFilteredTickets] = useState([]);
@@ -12,15 +35,9 @@ function StudentTickets() {
   useEffect(() => {
     async function fetchTicketsWithEvents() {
       try {
-        const ticketRes = await api.get("/api/student/tickets/");
-        const ticketData = ticketRes.data;
-
-        const ticketsWithEvents = await Promise.all(
-          ticketData.map(async (ticket) => {
-            const eventRes = await api.get(`/api/events/${ticket.event}/`);
-            return { ...ticket, event: eventRes.data };
-          })
-        );
+        // expand=event embeds each ticket's event, so this is a single request
+        const ticketRes = await api.get("/api/student/tickets/", { params: { expand: "event" } });
+        const ticketsWithEvents = ticketRes.data;
 
         setTickets(ticketsWithEvents);
         setFilteredTickets(ticketsWithEvents);
@@ -136,10 +153,7 @@ function StudentTickets() {
   </div>
 
   <div className="ticket-qr">
-    <img 
-      src={ticket.qr_code} 
-      alt="QR Code" 
-    />
+    <TicketQR ticket={ticket} />
   </div>
 </div>
           ))